@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache for built exam PDFs.
+
+build_math_pdf.py consults this cache before rendering graphs or running
+xelatex. An entry is keyed by a hash of everything that can change the
+output:
+
+- the normalized problem JSON (after the --exam-type override)
+- the --exam-type override itself
+- the source of latex_generator.py, hancom_to_latex.py, graph_generator.py,
+  tikz_graphs.py
+- the detected Korean font and the TeX engine version
+- the graph image format (png/pdf/pgf)
+
+Layout:
+    <root>/<key[:2]>/<key>/exam.pdf      compiled PDF
+    <root>/<key[:2]>/<key>/exam.tex      generated LaTeX (for --keep-tex),
+                                         graphs referenced by file name
+    <root>/<key[:2]>/<key>/graph_N.*     graph images (for --keep-tex)
+
+Kept images are named <output stem>_graph_N.* (kept_graph_path), so several
+builds can keep their artifacts in one directory; the kept .tex refers to
+them by that name.
+
+Entries are staged in a temporary directory and published with a single
+rename, so concurrent builders never see half-written entries. Reads touch
+the entry's mtime; eviction removes least-recently-used entries until the
+cache fits its size budget.
+
+Usage:
+    from build_cache import BuildCache
+    cache = BuildCache(root, max_bytes=1 << 30)
+    key = cache.key_for(data, exam_type, font, engine)
+    if not cache.restore(key, output, keep_tex):
+        ...  # build, then
+        cache.store(key, pdf_path, tex_path, image_paths)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: plain copies
+    fcntl = None
+
+# Resolve paths relative to this script
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Modules whose source affects the generated PDF
+CACHE_SOURCES = (
+    "latex_generator.py",
+    "hancom_to_latex.py",
+    "graph_generator.py",
+    "tikz_graphs.py",
+)
+
+# Bump to invalidate every existing entry after a layout change
+CACHE_FORMAT = 2
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB
+
+# ioctl cloning a file's extents (Linux btrfs/xfs/...; elsewhere it fails)
+_FICLONE = 0x40049409
+
+
+def _sources_digest() -> str:
+    """Hash the source files that the build output depends on."""
+    h = hashlib.sha256()
+    for name in CACHE_SOURCES:
+        path = SCRIPT_DIR / name
+        h.update(name.encode())
+        if path.is_file():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _clone(src: Path, dst: Path) -> bool:
+    """Reflink src to a new file dst (copy-on-write); False if unsupported."""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            fcntl.ioctl(fout.fileno(), _FICLONE, fin.fileno())
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def _copy_out(src: Path, dst: Path) -> None:
+    """Copy a cached file to dst (reflink where possible), replacing dst atomically.
+
+    Never a hardlink: the outputs belong to the user, and editing or
+    rewriting one in place would silently change the cache entry too.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        if not _clone(src, tmp):
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def kept_graph_path(output: Path, image_name: str) -> Path:
+    """Where --keep-tex puts graph image *image_name* of the build of *output*."""
+    return output.with_name(f"{output.stem}_{image_name}")
+
+
+def retarget_graphs(tex_source: str, renames: dict[str, str]) -> str:
+    """Point the \\includegraphics / \\input graph references at new paths.
+
+    Args:
+        tex_source: LaTeX source written by latex_generator
+        renames: Old image path (as written in the source) → new path
+    """
+    for old, new in renames.items():
+        tex_source = tex_source.replace(f"{{{old}}}", f"{{{new}}}")
+    return tex_source
+
+
+def _tree_size(path: Path) -> int:
+    """Total size in bytes of the regular files under path."""
+    total = 0
+    for f in path.rglob("*"):
+        try:
+            if f.is_file():
+                total += f.stat().st_size
+        except OSError:
+            pass  # removed by a concurrent eviction
+    return total
+
+
+class BuildCache:
+    """Size-bounded, LRU-evicted cache of PDF build outputs."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    # ─── Keys ─────────────────────────────────────────────────────
+
+    def key_for(
+        self,
+        data: dict,
+        exam_type: str | None,
+        korean_font: str,
+        engine: str,
+        graph_format: str = "png",
+    ) -> str:
+        """Compute the cache key for a build of *data*."""
+        payload = json.dumps(
+            {
+                "format": CACHE_FORMAT,
+                "problems": data,
+                "exam_type": exam_type,
+                "sources": _sources_digest(),
+                "font": korean_font,
+                "engine": engine,
+                "graph_format": graph_format,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    # ─── Lookup ───────────────────────────────────────────────────
+
+    def restore(self, key: str, output: Path, keep_tex: bool = False) -> bool:
+        """Copy a cached build to *output*.
+
+        Returns:
+            True on a cache hit, False if the entry is missing or incomplete.
+        """
+        entry = self._entry(key)
+        pdf = entry / "exam.pdf"
+        if not pdf.is_file():
+            return False
+        try:
+            _copy_out(pdf, output)
+            if keep_tex:
+                renames = {}
+                for img in sorted(entry.glob("graph_*")):
+                    kept = kept_graph_path(output, img.name)
+                    _copy_out(img, kept)
+                    renames[img.name] = kept.name
+                tex = entry / "exam.tex"
+                if tex.is_file():
+                    tex_out = output.with_suffix(".tex")
+                    tmp = tex_out.with_name(f".{tex_out.name}.{os.getpid()}.tmp")
+                    tmp.write_text(retarget_graphs(tex.read_text(encoding="utf-8"), renames),
+                                   encoding="utf-8")
+                    os.replace(tmp, tex_out)
+            now = time.time()
+            os.utime(entry, (now, now))  # LRU bookkeeping
+        except FileNotFoundError:
+            return False  # evicted while we were reading it
+        return True
+
+    # ─── Store ────────────────────────────────────────────────────
+
+    def store(
+        self,
+        key: str,
+        pdf_path: Path,
+        tex_path: Path | None = None,
+        image_paths: dict[int, Path] | None = None,
+    ) -> None:
+        """Publish build outputs under *key*, then enforce the size budget."""
+        entry = self._entry(key)
+        if entry.is_dir():
+            return
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.root))
+        try:
+            shutil.copy2(pdf_path, staging / "exam.pdf")
+            renames = {}
+            for img in (image_paths or {}).values():
+                if img.is_file():
+                    shutil.copy2(img, staging / img.name)
+                    renames[str(img)] = img.name
+            if tex_path is not None and tex_path.is_file():
+                # The work directory is gone by the time the entry is used
+                (staging / "exam.tex").write_text(
+                    retarget_graphs(tex_path.read_text(encoding="utf-8"), renames),
+                    encoding="utf-8",
+                )
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                pass  # another builder published the same key first
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    # ─── Eviction ─────────────────────────────────────────────────
+
+    def evict(self) -> None:
+        """Remove least-recently-used entries until under max_bytes."""
+        entries: list[tuple[float, int, Path]] = []
+        for shard in self.root.iterdir() if self.root.is_dir() else ():
+            if not shard.is_dir() or shard.name.startswith("."):
+                continue
+            for entry in shard.iterdir():
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append((mtime, _tree_size(entry), entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Rename first so readers never see a partially deleted entry
+            doomed = entry.with_name(f".evict-{entry.name}-{os.getpid()}")
+            try:
+                os.rename(entry, doomed)
+            except OSError:
+                continue  # already evicted by someone else
+            shutil.rmtree(doomed, ignore_errors=True)
+            total -= size
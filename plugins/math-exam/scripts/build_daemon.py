@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""Warm build daemon for build_math_pdf.py.
+
+Importing matplotlib/numpy and configuring fonts costs about a second per
+build_math_pdf.py invocation. The daemon keeps a pool of worker processes
+with latex_generator, hancom_to_latex and graph_generator already loaded
+and serves build requests over a Unix domain socket (and optionally
+localhost HTTP), so each request only pays for the build itself.
+
+Requests beyond --jobs wait in a queue; requests beyond --jobs + --max-queue
+are rejected immediately as busy instead of piling up.
+
+Protocol (Unix socket): one JSON object per line in, one JSON object per
+line out.
+    {"op": "build", "problems": "/abs/p.json", "output": "/abs/exam.pdf",
+     "exam_type": null, "keep_tex": false, "preamble_fmt": false,
+     "build_cache": false, "cache_max_mb": 1024, "graph_format": "png",
+     "trace": null}
+    → {"ok": true, "output": "...", "log": "...", "elapsed": 0.41, "wait": 0.0}
+    {"op": "status"}
+    → {"jobs": 4, "max_queue": 16, "running": 1, "queued": 0, ...}
+
+HTTP (--http PORT, bound to 127.0.0.1 only):
+    POST /build   same JSON body as above (200 ok, 400 bad request,
+                  500 build failed, 503 queue full)
+    GET  /status
+
+Every HTTP request must carry the token from <cache>/daemon.token (mode
+0600, new on every start) in an X-Build-Token header; POST bodies must be
+Content-Type: application/json, and requests with an Origin header (sent
+by browsers) are refused, so web pages cannot submit builds. The socket
+is created with mode 0600. output and trace must lie under one of the
+--allow-root directories (default: the directory serve was started in).
+
+Usage:
+    # Start the daemon
+    python3 build_daemon.py serve --jobs 4 [--http 8765]
+
+    # Submit a build (same flags as build_math_pdf.py)
+    python3 build_daemon.py build --problems problems.json --output exam.pdf
+
+    # Show queue/worker counters
+    python3 build_daemon.py status
+"""
+
+from __future__ import annotations
+
+import argparse
+import hmac
+import json
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from build_cache import DEFAULT_MAX_BYTES, BuildCache
+from build_math_pdf import _build_job, _make_parser, _warm_worker
+from build_trace import BuildTrace
+from toolchain import cache_root
+
+EXAM_TYPES = ("worksheet", "학력평가", "수능", "exam")
+GRAPH_FORMATS = ("png", "pdf", "pgf", "tikz")
+
+DEFAULT_MAX_QUEUE = 16
+
+
+def _default_socket() -> Path:
+    return cache_root() / "daemon.sock"
+
+
+def _token_file() -> Path:
+    return cache_root() / "daemon.token"
+
+
+def _write_token(path: Path) -> str:
+    """Create a fresh HTTP token readable only by the daemon's user."""
+    token = secrets.token_hex(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token + "\n")
+    return token
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Requests
+# ═══════════════════════════════════════════════════════════════════════
+
+def _under_roots(path: Path, roots: list[Path]) -> bool:
+    """True if path (resolved, symlinks included) lies under one of roots."""
+    resolved = Path(os.path.realpath(path))
+    return any(resolved.is_relative_to(root) for root in roots)
+
+
+def _parse_request(req: dict, output_roots: list[Path] | None = None) -> dict:
+    """Validate a build request and convert its paths.
+
+    Args:
+        req: Decoded request
+        output_roots: Resolved directories output/trace must lie under
+            (None: any absolute path)
+
+    Raises:
+        ValueError: If the request is malformed
+    """
+    if not isinstance(req, dict):
+        raise ValueError("request must be a JSON object")
+
+    def _path(key: str) -> Path | None:
+        value = req.get(key)
+        if value is None:
+            return None
+        if not isinstance(value, str) or not os.path.isabs(value):
+            raise ValueError(f"{key} must be an absolute path")
+        return Path(value)
+
+    job = {
+        "problems": _path("problems"),
+        "tex": _path("tex"),
+        "output": _path("output"),
+        "trace": _path("trace"),
+        "exam_type": req.get("exam_type"),
+        "keep_tex": bool(req.get("keep_tex", False)),
+        "preamble_fmt": bool(req.get("preamble_fmt", False)),
+        "build_cache": bool(req.get("build_cache", False)),
+        "equation_cache": bool(req.get("equation_cache", False)),
+        "lint": bool(req.get("lint", True)),
+        "stream": bool(req.get("stream", False)),
+        "fragment_cache": bool(req.get("fragment_cache", False)),
+        "cache_max_mb": req.get("cache_max_mb", DEFAULT_MAX_BYTES // (1024 * 1024)),
+        "graph_format": req.get("graph_format", "png"),
+    }
+    if (job["problems"] is None) == (job["tex"] is None):
+        raise ValueError("exactly one of problems or tex is required")
+    if job["output"] is None:
+        raise ValueError("output is required")
+    if job["exam_type"] is not None and job["exam_type"] not in EXAM_TYPES:
+        raise ValueError(f"unknown exam_type: {job['exam_type']}")
+    if job["graph_format"] not in GRAPH_FORMATS:
+        raise ValueError(f"unknown graph_format: {job['graph_format']}")
+    if not isinstance(job["cache_max_mb"], int) or job["cache_max_mb"] < 1:
+        raise ValueError("cache_max_mb must be a positive integer")
+    if output_roots is not None:
+        for key in ("output", "trace"):
+            if job[key] is not None and not _under_roots(job[key], output_roots):
+                raise ValueError(f"{key} must be under "
+                                 + " or ".join(str(r) for r in output_roots))
+    return job
+
+
+def _request_from_args(args: argparse.Namespace) -> dict:
+    """Turn build_math_pdf.py flags into a daemon request (absolute paths)."""
+    def _abs(path: Path | None) -> str | None:
+        return str(path.resolve()) if path is not None else None
+
+    return {
+        "op": "build",
+        "problems": _abs(args.problems),
+        "tex": _abs(args.tex),
+        "output": _abs(args.output),
+        "trace": _abs(args.trace),
+        "exam_type": args.exam_type,
+        "keep_tex": args.keep_tex,
+        "preamble_fmt": args.preamble_fmt,
+        "build_cache": args.build_cache,
+        "equation_cache": args.equation_cache,
+        "lint": args.lint,
+        "stream": args.stream,
+        "fragment_cache": args.fragment_cache,
+        "cache_max_mb": args.cache_max_mb,
+        "graph_format": args.graph_format,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Daemon core
+# ═══════════════════════════════════════════════════════════════════════
+
+class BuildDaemon:
+    """Bounded job queue in front of a pool of warm build workers."""
+
+    def __init__(
+        self,
+        jobs: int,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        output_roots: list[Path] | None = None,
+    ):
+        self.jobs = jobs
+        self.max_queue = max_queue
+        self.output_roots = output_roots
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._pending = 0  # submitted, not yet finished (running + queued)
+        self._counts = {"completed": 0, "failed": 0, "rejected": 0}
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.jobs, initializer=_warm_worker)
+
+    def warm_up(self) -> None:
+        """Start every worker now so the first requests don't pay for imports."""
+        for future in [self._pool.submit(os.getpid) for _ in range(self.jobs)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started, 1),
+                "jobs": self.jobs,
+                "max_queue": self.max_queue,
+                "running": min(self._pending, self.jobs),
+                "queued": max(0, self._pending - self.jobs),
+                **self._counts,
+            }
+
+    def handle(self, req: dict) -> dict:
+        """Dispatch one request and return its JSON-serializable response."""
+        op = req.get("op", "build") if isinstance(req, dict) else None
+        if op == "status":
+            return self.status()
+        if op != "build":
+            return {"ok": False, "error": f"unknown op: {op}"}
+        try:
+            job = _parse_request(req, self.output_roots)
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        return self.build(job)
+
+    def build(self, job: dict) -> dict:
+        """Run one build on the pool, blocking until it finishes."""
+        with self._lock:
+            if self._pending >= self.jobs + self.max_queue:
+                self._counts["rejected"] += 1
+                return {"ok": False, "busy": True, "error": "queue full"}
+            self._pending += 1
+            pool = self._pool
+
+        cache = None
+        if job["build_cache"]:
+            cache = BuildCache(cache_root() / "builds",
+                               max_bytes=job["cache_max_mb"] * 1024 * 1024)
+        start = time.perf_counter()
+        try:
+            ok, log, elapsed, events = pool.submit(
+                _build_job, job["problems"], job["output"], job["exam_type"],
+                job["keep_tex"], job["preamble_fmt"], cache,
+                job["trace"] is not None, job["tex"], job["graph_format"],
+                job["equation_cache"], job["lint"], job["stream"],
+                job["fragment_cache"],
+            ).result()
+        except BrokenProcessPool as e:  # a worker died (e.g. killed by OOM)
+            self._replace_pool(pool)
+            ok, log, elapsed, events = False, f"ERROR: worker failed: {e}\n", 0.0, []
+        finally:
+            with self._lock:
+                self._pending -= 1
+        total = time.perf_counter() - start
+        with self._lock:
+            self._counts["completed" if ok else "failed"] += 1
+
+        if job["trace"] is not None:
+            trace = BuildTrace()
+            trace.extend(events)
+            trace.write(job["trace"])
+        return {
+            "ok": ok,
+            "output": str(job["output"]),
+            "log": log,
+            "elapsed": round(elapsed, 3),
+            "wait": round(max(0.0, total - elapsed), 3),
+        }
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is broken:
+                self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Transports
+# ═══════════════════════════════════════════════════════════════════════
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+            except ValueError:
+                resp = {"ok": False, "error": "invalid JSON"}
+            else:
+                resp = self.server.build_daemon.handle(req)
+            self.wfile.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, daemon: BuildDaemon):
+        self.build_daemon = daemon
+        super().__init__(str(path), _SocketHandler)
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    server_version = "math-exam-build-daemon"
+
+    def _reply(self, code: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        """Reply 403 unless the request carries the token and no Origin."""
+        if self.headers.get("Origin") is not None:
+            self._reply(403, {"ok": False, "error": "cross-origin requests are not allowed"})
+            return False
+        token = self.headers.get("X-Build-Token", "")
+        if not hmac.compare_digest(token.encode(), self.server.token.encode()):
+            self._reply(403, {"ok": False, "error": "missing or wrong X-Build-Token"})
+            return False
+        return True
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        if self.path != "/status":
+            self._reply(404, {"ok": False, "error": "not found"})
+            return
+        self._reply(200, self.server.build_daemon.status())
+
+    def do_POST(self) -> None:
+        if self.path != "/build":
+            self._reply(404, {"ok": False, "error": "not found"})
+            return
+        if not self._authorized():
+            return
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self._reply(415, {"ok": False, "error": "Content-Type must be application/json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(400, {"ok": False, "error": "invalid Content-Length"})
+            return
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+            job = _parse_request(req, self.server.build_daemon.output_roots)
+        except ValueError as e:
+            self._reply(400, {"ok": False, "error": str(e)})
+            return
+        resp = self.server.build_daemon.build(job)
+        code = 200 if resp["ok"] else 503 if resp.get("busy") else 500
+        self._reply(code, resp)
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 (stdlib signature)
+        pass  # keep the daemon's stdout to one line per build
+
+
+def _claim_socket(path: Path) -> None:
+    """Remove a stale socket file, refusing if a daemon is still listening."""
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(str(path))
+        except OSError:
+            path.unlink()
+            return
+    raise SystemExit(f"Build daemon already running at {path}")
+
+
+def serve(
+    socket_path: Path,
+    jobs: int,
+    max_queue: int,
+    http_port: int | None = None,
+    allow_roots: list[Path] | None = None,
+) -> None:
+    """Run the daemon until interrupted (Ctrl-C or SIGTERM).
+
+    Args:
+        allow_roots: Directories builds may write output/trace under
+            (default: the current directory)
+    """
+    _claim_socket(socket_path)
+    roots = [Path(os.path.realpath(r)) for r in (allow_roots or [Path.cwd()])]
+    daemon = BuildDaemon(jobs, max_queue, roots)
+    print(f"Warming up {jobs} worker(s)...")
+    daemon.warm_up()
+
+    # Created owner-only: anyone who can connect can make the daemon write files
+    old_umask = os.umask(0o077)
+    try:
+        server = _UnixServer(socket_path, daemon)
+    finally:
+        os.umask(old_umask)
+    os.chmod(socket_path, 0o600)
+    http = None
+    token_path = _token_file()
+    if http_port is not None:
+        http = ThreadingHTTPServer(("127.0.0.1", http_port), _HTTPHandler)
+        http.daemon_threads = True
+        http.build_daemon = daemon
+        http.token = _write_token(token_path)
+        threading.Thread(target=http.serve_forever, daemon=True).start()
+        print(f"HTTP: http://127.0.0.1:{http.server_address[1]}/build "
+              f"(X-Build-Token from {token_path})")
+    print("Output roots: " + ", ".join(str(r) for r in roots))
+
+    def _terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    print(f"Build daemon listening on {socket_path} "
+          f"({jobs} worker(s), queue {max_queue}). Ctrl-C to stop.", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping build daemon.")
+    finally:
+        server.server_close()
+        if http is not None:
+            http.shutdown()
+            http.server_close()
+            token_path.unlink(missing_ok=True)
+        daemon.shutdown()
+        try:
+            socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Client
+# ═══════════════════════════════════════════════════════════════════════
+
+def request(socket_path: Path, req: dict, timeout: float | None = None) -> dict:
+    """Send one request to a running daemon and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        try:
+            s.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise SystemExit(
+                f"No build daemon at {socket_path} "
+                f"(start one with: build_daemon.py serve)"
+            ) from None
+        s.sendall(json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n")
+        with s.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise SystemExit("Build daemon closed the connection without a reply")
+    return json.loads(line)
+
+
+def _client_build(argv: list[str]) -> None:
+    """`build_daemon.py build ...`: build_math_pdf.py flags, run by the daemon."""
+    parser = _make_parser()
+    parser.prog = "build_daemon.py build"
+    parser.add_argument("--socket", type=Path, default=None,
+                        help="Daemon socket (default: <cache>/daemon.sock)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Give up after this many seconds")
+    args = parser.parse_args(argv)
+
+    if args.batch or args.watch:
+        parser.error("--batch and --watch are not supported through the daemon")
+    if not args.problems and not args.tex:
+        parser.error("Either --problems or --tex is required")
+    if args.problems and args.tex:
+        parser.error("--problems and --tex are mutually exclusive")
+    if not args.output:
+        parser.error("--output is required")
+
+    resp = request(args.socket or _default_socket(), _request_from_args(args), args.timeout)
+    if "error" in resp:
+        print(f"ERROR: {resp['error']}", file=sys.stderr)
+        raise SystemExit(1)
+    sys.stdout.write(resp["log"])
+    if args.trace:
+        print(f"Trace: {args.trace}")
+    if not resp["ok"]:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Warm build daemon for math exam PDFs"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Run the daemon")
+    p_serve.add_argument("--socket", type=Path, default=None,
+                         help="Unix socket path (default: <cache>/daemon.sock)")
+    p_serve.add_argument("--http", type=int, metavar="PORT", default=None,
+                         help="Also serve HTTP on 127.0.0.1:PORT")
+    p_serve.add_argument("--jobs", "-j", type=int, default=None,
+                         help="Concurrent builds (default: CPU count)")
+    p_serve.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                         help="Builds allowed to wait for a worker before new "
+                              f"requests are rejected (default: {DEFAULT_MAX_QUEUE})")
+    p_serve.add_argument("--allow-root", type=Path, action="append", default=None,
+                         metavar="DIR",
+                         help="Directory builds may write output/trace under "
+                              "(repeatable; default: current directory)")
+
+    sub.add_parser("build", add_help=False,
+                   help="Submit a build (accepts build_math_pdf.py flags)")
+
+    p_status = sub.add_parser("status", help="Show daemon counters")
+    p_status.add_argument("--socket", type=Path, default=None)
+
+    # `build` forwards everything after it to build_math_pdf's own parser
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        _client_build(sys.argv[2:])
+        return
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        if args.jobs is not None and args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        jobs = args.jobs or os.cpu_count() or 1
+        if args.max_queue < 0:
+            parser.error("--max-queue must be non-negative")
+        serve(args.socket or _default_socket(), jobs, args.max_queue, args.http,
+              args.allow_root)
+    elif args.command == "status":
+        resp = request(args.socket or _default_socket(), {"op": "status"}, timeout=10)
+        for key, value in resp.items():
+            print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
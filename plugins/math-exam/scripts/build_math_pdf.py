@@ -17,20 +17,50 @@ Usage:
 
     # Compile an existing .tex file directly
     python build_math_pdf.py --tex custom.tex -o exam.pdf
+
+    # Batch mode: build every JSON in a directory / glob / manifest
+    python build_math_pdf.py --batch problems/ --output-dir out/ --jobs 8
+
+    # Large books: one problem at a time (JSONL input always streams)
+    python build_math_pdf.py -p review.jsonl -o review.pdf
+    python build_math_pdf.py -p review.json --stream -o review.pdf
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
+import io
 import json
+import os
+import random
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Dict
 
-from latex_generator import generate_latex
+from build_cache import DEFAULT_MAX_BYTES, BuildCache, kept_graph_path, retarget_graphs
+from build_trace import BuildTrace, peak_rss_kb
+from equation_cache import enable_equation_cache, flush_equation_cache
+from exam_variants import make_variants
+from fragment_cache import active_fragment_cache, enable_fragment_cache, flush_fragment_cache
+from hancom_lint import lint_problems
+from hancom_to_latex import conversion_stats
+from latex_generator import (
+    format_preamble,
+    write_latex,
+)
+from problem_stream import (
+    collect_problem_files, is_jsonl, iter_problems, load_problem_data, read_header,
+)
+from tikz_graphs import generate_tikz, tikz_supported
+from toolchain import cache_root, toolchain
 
 # Resolve paths relative to this script
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -41,31 +71,205 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 # ═══════════════════════════════════════════════════════════════════════
 
 def _find_xelatex() -> Path | None:
-    """Find xelatex binary on the system."""
-    # Check PATH first
-    xelatex = shutil.which("xelatex")
-    if xelatex:
-        return Path(xelatex)
-
-    # Common TeX Live locations
-    candidates = [
-        Path("/Library/TeX/texbin/xelatex"),          # macOS (MacTeX)
-        Path("/usr/local/texlive/2025/bin/x86_64-linux/xelatex"),
-        Path("/usr/local/texlive/2024/bin/x86_64-linux/xelatex"),
-        Path("/usr/bin/xelatex"),                       # Linux package
-    ]
-    for p in candidates:
-        if p.is_file():
-            return p
-    return None
+    """Find xelatex binary on the system (cached toolchain probe)."""
+    xelatex = toolchain().xelatex
+    return Path(xelatex) if xelatex else None
+
+
+def _xelatex_missing() -> SystemExit:
+    """Print TeX Live install instructions and return the exit to raise."""
+    print("ERROR: xelatex not found!", file=sys.stderr)
+    print("", file=sys.stderr)
+    print("Install TeX Live:", file=sys.stderr)
+    print("  macOS:  brew install --cask basictex", file=sys.stderr)
+    print("          (then: sudo tlmgr install collection-langkorean kotex-utf)",
+          file=sys.stderr)
+    print("  Linux:  sudo apt install texlive-xetex texlive-lang-korean",
+          file=sys.stderr)
+    print("", file=sys.stderr)
+    print("After installing, restart your terminal or run:", file=sys.stderr)
+    print('  eval "$(/usr/libexec/path_helper)"', file=sys.stderr)
+    return SystemExit(1)
+
+
+def _ensure_preamble_format(xelatex: Path) -> Path | None:
+    """Return a cached .fmt for format_preamble(), building it if needed.
+
+    The format is keyed by a hash of the preamble text and the xelatex
+    version, so editing the preamble or upgrading TeX Live produces a new
+    file automatically. The font selection is not part of the format
+    (XeTeX cannot dump native fonts) — it stays in each document.
+
+    Returns:
+        Path to the .fmt file, or None if it could not be built (the caller
+        then falls back to a normal compile).
+    """
+    preamble = format_preamble()
+    key = hashlib.sha256(
+        (preamble + "\n" + toolchain().xelatex_version).encode("utf-8")
+    ).hexdigest()[:16]
+    fmt_dir = cache_root() / "fmt"
+    name = f"math-exam-{key}"
+    fmt_path = fmt_dir / f"{name}.fmt"
+    if fmt_path.is_file():
+        return fmt_path
+
+    fmt_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=fmt_dir) as tmpdir:
+        tmp = Path(tmpdir)
+        src = tmp / f"{name}.tex"
+        src.write_text(preamble + "\n\\dump\n", encoding="utf-8")
+        cmd = [
+            str(xelatex),
+            "-ini",
+            "-interaction=nonstopmode",
+            f"-jobname={name}",
+            "-output-directory", str(tmp),
+            "&xelatex",
+            str(src),
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(tmp))
+        built = tmp / f"{name}.fmt"
+        if result.returncode != 0 or not built.is_file():
+            print("  WARNING: could not build preamble format; "
+                  "compiling without it", file=sys.stderr)
+            return None
+        # Atomic publish — concurrent builders may race on the same key
+        os.replace(built, fmt_path)
+    print(f"  Preamble format cached: {fmt_path}")
+    return fmt_path
+
+
+# Safety cap on compile passes (LaTeX normally settles within three)
+MAX_XELATEX_PASSES = 3
+
+# Files whose contents feed back into the next pass
+_RERUN_SUFFIXES = (".aux", ".toc", ".lof", ".lot", ".out")
+
+# Log messages that ask for another pass (LaTeX kernel, hyperref, etc.)
+_RERUN_RE = re.compile(
+    r"Rerun to get|Label\(s\) may have changed|Rerun LaTeX"
+)
+
+# aux lines that every run writes and nothing in our documents reads
+_AUX_NOISE_RE = re.compile(r"^\\relax$|^\\gdef\s*\\@abspage@last\{\d+\}$")
+
+
+def _aux_fingerprint(work_dir: Path, stem: str) -> str:
+    """Hash the cross-reference files of a job, ignoring boilerplate lines."""
+    h = hashlib.sha256()
+    for suffix in _RERUN_SUFFIXES:
+        path = work_dir / (stem + suffix)
+        if not path.is_file():
+            continue
+        for line in path.read_text(errors="replace").splitlines():
+            if not _AUX_NOISE_RE.match(line.strip()):
+                h.update(f"{suffix}:{line}\n".encode("utf-8", "replace"))
+    return h.hexdigest()
+
+
+def _needs_rerun(work_dir: Path, stem: str, before: str) -> bool:
+    """Decide whether another xelatex pass would change the output."""
+    if _aux_fingerprint(work_dir, stem) != before:
+        return True
+    log_path = work_dir / (stem + ".log")
+    if log_path.is_file() and _RERUN_RE.search(log_path.read_text(errors="replace")):
+        return True
+    return False
+
+
+# Runs argv[2:] and writes "<cpu seconds> <max RSS KB>" of that child to fd
+# argv[1]. On Linux a child's ru_maxrss includes the memory image it was
+# forked from, so forking xelatex straight from the build process would
+# report the build's own peak; forked from this small interpreter, the
+# figure is xelatex's (or the wrapper's few MB, whichever is larger).
+_RUSAGE_WRAPPER = """
+import os, signal, sys
+fd = int(sys.argv[1])
+pid = os.fork()
+if pid == 0:
+    os.close(fd)
+    try:
+        os.execvp(sys.argv[2], sys.argv[2:])
+    finally:
+        os._exit(127)
+_, status, ru = os.wait4(pid, 0)
+max_rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+os.write(fd, f"{ru.ru_utime + ru.ru_stime} {max_rss_kb}".encode())
+code = os.waitstatus_to_exitcode(status)
+if code < 0:  # die of the same signal
+    if -code not in (signal.SIGKILL, signal.SIGSTOP):
+        signal.signal(-code, signal.SIG_DFL)
+    os.kill(os.getpid(), -code)
+sys.exit(code)
+"""
+
+
+def _run_measured(
+    cmd: list[str],
+    cwd: Path,
+    env: dict | None,
+) -> tuple[subprocess.CompletedProcess, dict]:
+    """Like subprocess.run(capture_output=True), plus the child's own usage.
+
+    The command is started from a minimal Python wrapper (_RUSAGE_WRAPPER)
+    so its max RSS is not inflated by the image of this process.
 
+    Returns:
+        (result, usage) where usage holds ``cpu_ms`` and ``max_rss_kb`` of
+        the command (max RSS has a floor of the wrapper's few MB), or is
+        empty where unsupported.
+    """
+    if not hasattr(os, "wait4"):
+        result = subprocess.run(cmd, capture_output=True, text=True,
+                                cwd=str(cwd), env=env)
+        return result, {}
+
+    read_fd, write_fd = os.pipe()
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, "-I", "-S", "-c", _RUSAGE_WRAPPER, str(write_fd), *cmd],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=str(cwd), env=env, pass_fds=(write_fd,),
+        )
+    finally:
+        os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as report:
+        out, err = proc.communicate()
+        fields = report.read().split()
+    result = subprocess.CompletedProcess(
+        cmd, proc.returncode,
+        out.decode(errors="replace"),
+        err.decode(errors="replace"),
+    )
+    if len(fields) != 2:
+        return result, {}  # the wrapper could not start the command
+    usage = {
+        "cpu_ms": round(float(fields[0]) * 1000, 3),
+        "max_rss_kb": int(fields[1]),
+    }
+    return result, usage
 
-def _run_xelatex(tex_path: Path, work_dir: Path) -> Path:
-    """Run xelatex on a .tex file (2-pass for cross-references).
+
+def _run_xelatex(
+    tex_path: Path,
+    work_dir: Path,
+    preamble_fmt: bool = False,
+    trace: BuildTrace | None = None,
+) -> Path:
+    """Run xelatex on a .tex file, rerunning only when needed.
+
+    A second (or third) pass runs only if the .aux/.toc data changed or
+    the log asks for a rerun; our generated documents use nothing but
+    \\thepage, so they normally finish in a single pass.
 
     Args:
         tex_path: Path to the .tex file
         work_dir: Working directory for xelatex output
+        preamble_fmt: If True and the document starts with the standard
+            preamble, compile against a cached precompiled format
+        trace: Optional trace; each pass is recorded with the subprocess's
+            CPU time and max RSS
 
     Returns:
         Path to the generated .pdf file
@@ -75,18 +279,7 @@ def _run_xelatex(tex_path: Path, work_dir: Path) -> Path:
     """
     xelatex = _find_xelatex()
     if xelatex is None:
-        print("ERROR: xelatex not found!", file=sys.stderr)
-        print("", file=sys.stderr)
-        print("Install TeX Live:", file=sys.stderr)
-        print("  macOS:  brew install --cask basictex", file=sys.stderr)
-        print("          (then: sudo tlmgr install collection-langkorean kotex-utf)",
-              file=sys.stderr)
-        print("  Linux:  sudo apt install texlive-xetex texlive-lang-korean",
-              file=sys.stderr)
-        print("", file=sys.stderr)
-        print("After installing, restart your terminal or run:", file=sys.stderr)
-        print('  eval "$(/usr/libexec/path_helper)"', file=sys.stderr)
-        raise SystemExit(1)
+        raise _xelatex_missing()
 
     cmd = [
         str(xelatex),
@@ -94,18 +287,48 @@ def _run_xelatex(tex_path: Path, work_dir: Path) -> Path:
         "-output-directory", str(work_dir),
         str(tex_path),
     ]
+    env = None
 
-    # Pass 1
-    result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(work_dir))
-    if result.returncode != 0:
-        _report_xelatex_error(result, tex_path, work_dir)
-        raise SystemExit(1)
+    if preamble_fmt:
+        source = tex_path.read_text(encoding="utf-8")
+        head = format_preamble()
+        fmt_path = _ensure_preamble_format(xelatex) if source.startswith(head) else None
+        if fmt_path is not None:
+            # The format already holds the preamble; compile only the rest
+            body_path = work_dir / (tex_path.stem + ".body.tex")
+            body_path.write_text(source[len(head):], encoding="utf-8")
+            cmd = [
+                str(xelatex),
+                "-interaction=nonstopmode",
+                f"-fmt={fmt_path.stem}",
+                f"-jobname={tex_path.stem}",
+                "-output-directory", str(work_dir),
+                str(body_path),
+            ]
+            # Trailing separator keeps the default format search path
+            env = dict(os.environ, TEXFORMATS=f"{fmt_path.parent}{os.pathsep}")
 
-    # Pass 2 (resolve cross-references like page numbers)
-    result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(work_dir))
-    if result.returncode != 0:
-        _report_xelatex_error(result, tex_path, work_dir)
-        raise SystemExit(1)
+    # Rerun only while cross-reference data is still changing
+    passes = 0
+    while True:
+        before = _aux_fingerprint(work_dir, tex_path.stem)
+        passes += 1
+        if trace is not None:
+            start = time.time()
+            result, usage = _run_measured(cmd, work_dir, env)
+            trace.add(f"xelatex pass {passes}", start * 1e6,
+                      (time.time() - start) * 1e6, cat="xelatex", **usage)
+        else:
+            result = subprocess.run(cmd, capture_output=True, text=True,
+                                    cwd=str(work_dir), env=env)
+        if result.returncode != 0:
+            _report_xelatex_error(result, tex_path, work_dir)
+            raise SystemExit(1)
+        if passes >= MAX_XELATEX_PASSES:
+            break
+        if not _needs_rerun(work_dir, tex_path.stem, before):
+            break
+    print(f"  xelatex: {passes} pass{'es' if passes > 1 else ''}")
 
     pdf_name = tex_path.stem + ".pdf"
     pdf_path = work_dir / pdf_name
@@ -135,6 +358,7 @@ def _report_xelatex_error(result: subprocess.CompletedProcess, tex_path: Path, w
             for line in error_lines[:20]:  # Limit output
                 print(f"    {line}", file=sys.stderr)
         print(f"\n  Full log: {log_path}", file=sys.stderr)
+        _report_missing_packages(tex_path)
     else:
         # Fallback to stderr output
         if result.stderr:
@@ -143,16 +367,172 @@ def _report_xelatex_error(result: subprocess.CompletedProcess, tex_path: Path, w
                 print(f"    {line}", file=sys.stderr)
 
 
+# TeX Live package names for .sty files that ship under another name
+_TLMGR_PACKAGES = {
+    "kotex": "kotex-utf",
+    "amssymb": "amsfonts",
+    "amsthm": "amscls",
+    "graphicx": "graphics",
+    "multicol": "tools",
+    "tabularx": "tools",
+}
+
+
+def _report_missing_packages(tex_path: Path) -> None:
+    """Name the LaTeX packages the document loads that are not installed."""
+    try:
+        source = tex_path.read_text(encoding="utf-8")
+    except OSError:
+        return
+    used = {name.strip()
+            for group in re.findall(r"\\usepackage(?:\[[^\]]*\])?\{([^}]*)\}", source)
+            for name in group.split(",")}
+    missing = toolchain().missing_packages(sorted(used))
+    if missing:
+        print(f"\n  Missing LaTeX packages: {', '.join(missing)}", file=sys.stderr)
+        tlmgr = dict.fromkeys(_TLMGR_PACKAGES.get(m, m) for m in missing)
+        print("  Install: sudo tlmgr install " + " ".join(tlmgr), file=sys.stderr)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 #  Build orchestration
 # ═══════════════════════════════════════════════════════════════════════
 
+def _render_graph(spec: dict, img_path: Path) -> tuple[str | None, dict]:
+    """Render one graph; return an error message instead of raising.
+
+    Runs in a graph worker process, so failures are reported per problem
+    rather than tearing down the whole pool. A .tikz path is written by
+    tikz_graphs without importing matplotlib.
+
+    Returns:
+        (error or None, timing) — timing holds the wall-clock start,
+        duration, CPU time and peak RSS for --trace
+    """
+    start = time.time()
+    cpu0 = time.process_time()
+    error = None
+    try:
+        if img_path.suffix == ".tikz":
+            generate_tikz(spec, img_path)
+        else:
+            from graph_generator import generate_graph
+            generate_graph(spec, img_path)
+    except Exception as e:  # noqa: BLE001 — reported by the caller
+        error = f"{type(e).__name__}: {e}"
+    timing = {
+        "ts": start * 1e6,
+        "dur": (time.time() - start) * 1e6,
+        "pid": os.getpid(),
+        "cpu_ms": round((time.process_time() - cpu0) * 1000, 3),
+        "max_rss_kb": peak_rss_kb(),
+    }
+    return error, timing
+
+
+def _graph_path(work: Path, prob_num: int, spec: dict, graph_format: str) -> Path:
+    """Image path for one graph; TikZ falls back to PNG for unsupported types."""
+    if graph_format == "tikz" and not tikz_supported(spec):
+        graph_format = "png"
+    return work / f"graph_{prob_num}.{graph_format}"
+
+
+def _start_graphs(
+    graph_problems: list[tuple[int, dict]],
+    image_paths: dict[int, Path],
+    graph_jobs: int | None,
+) -> tuple[ProcessPoolExecutor | None, list[tuple[int, Future]]]:
+    """Start rendering graphs; returns the pool (if any) and per-problem futures.
+
+    TikZ graphs are written in-process right away. matplotlib graphs go to
+    a process pool when more than one worker is allowed.
+    """
+    matplotlib_graphs = [
+        n for n, _ in graph_problems if image_paths[n].suffix != ".tikz"
+    ]
+    pool: ProcessPoolExecutor | None = None
+    if matplotlib_graphs:
+        # Imported here so forked workers start with matplotlib loaded
+        import graph_generator  # noqa: F401
+
+        workers = min(graph_jobs or os.cpu_count() or 1, len(matplotlib_graphs))
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+
+    pending: list[tuple[int, Future]] = []
+    for prob_num, prob in graph_problems:
+        img_path = image_paths[prob_num]
+        if pool is not None and img_path.suffix != ".tikz":
+            future = pool.submit(_render_graph, prob["graph"], img_path)
+        else:
+            future = Future()
+            future.set_result(_render_graph(prob["graph"], img_path))
+        pending.append((prob_num, future))
+    return pool, pending
+
+
+def _build_cache_key(
+    cache: BuildCache,
+    data: dict,
+    exam_type: str | None,
+    graph_format: str = "png",
+) -> str | None:
+    """Cache key for *data*, or None when the TeX engine is unavailable."""
+    xelatex = _find_xelatex()
+    if xelatex is None:
+        return None
+    tc = toolchain()
+    return cache.key_for(data, exam_type, tc.korean_font,
+                         tc.xelatex_version, graph_format)
+
+
+def _lint_preflight(data: dict, problems_file: Path) -> None:
+    """Print hancom_lint findings; raise SystemExit(1) if any is an error."""
+    issues = lint_problems(data)
+    for issue in issues:
+        print(issue.format(str(problems_file)), file=sys.stderr)
+    errors = sum(issue.severity == "error" for issue in issues)
+    if errors:
+        print(f"ERROR: {errors} equation error(s) in {problems_file} "
+              f"(--no-lint to build anyway)", file=sys.stderr)
+        raise SystemExit(1)
+
+
+def _scan_problems(
+    problems_file: Path,
+    graph_problems: list[tuple[int, dict]] | None,
+    digest,
+):
+    """Yield the problems of *problems_file* one at a time (stream mode).
+
+    Graph problems are appended to *graph_problems* as (number, {"graph":
+    spec}) and every problem is fed to *digest*, so one pass over the file
+    provides the lint input, the graph jobs and the cache key. The pass
+    that writes the .tex feeds a second digest (graph_problems=None), so a
+    file edited between the two passes is detected.
+    """
+    for prob_num, prob in enumerate(iter_problems(problems_file), 1):
+        digest.update(json.dumps(prob, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+        if graph_problems is not None and "graph" in prob:
+            graph_problems.append((prob_num, {"graph": prob["graph"]}))
+        yield prob
+
+
 def build(
     problems_file: Path | None,
     tex_file: Path | None,
     output: Path,
     exam_type: str | None = None,
     keep_tex: bool = False,
+    preamble_fmt: bool = False,
+    cache: BuildCache | None = None,
+    graph_jobs: int | None = None,
+    watch_state: _WatchState | None = None,
+    trace: BuildTrace | None = None,
+    graph_format: str = "png",
+    lint: bool = True,
+    stream: bool = False,
 ) -> None:
     """Main build logic: JSON → .tex → PDF.
 
@@ -162,8 +542,30 @@ def build(
         output: Desired output PDF path
         exam_type: Override exam type (worksheet, 학력평가, etc.)
         keep_tex: If True, copy .tex and images alongside the PDF
+        preamble_fmt: If True, compile against a cached precompiled preamble
+        cache: Optional build cache; on a hit the cached PDF (and --keep-tex
+            artifacts) are copied to *output* without running xelatex
+        graph_jobs: Worker processes for graph rendering (default: CPU
+            count; 1 renders serially in-process)
+        watch_state: Incremental state from --watch; builds in its
+            persistent work directory and skips unchanged graphs/problems
+        trace: Optional trace collecting per-stage wall/CPU time and RSS
+        graph_format: "png" (300 dpi), vector "pdf" / "pgf", or "tikz"
+            (pgfplots inside the .tex, png fallback for other graph types)
+        lint: Check the Hancom scripts first (hancom_lint) and stop on
+            errors before any graph or xelatex work
+        stream: Never hold all problems in memory: a first pass over the
+            file lints them and collects the graphs, a second one writes
+            the .tex problem by problem (always on for JSONL input)
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
+    # Spans are cheap, so record into a throwaway trace when not tracing
+    recorder = trace if trace is not None else BuildTrace()
+    cache_key: str | None = None
+    if watch_state is not None:
+        workspace = contextlib.nullcontext(str(watch_state.work_dir))
+    else:
+        workspace = tempfile.TemporaryDirectory()
+    with workspace as tmpdir:
         work = Path(tmpdir)
 
         if tex_file:
@@ -179,72 +581,623 @@ def build(
             if not problems_file.is_file():
                 raise SystemExit(f"Problems file not found: {problems_file}")
 
-            with open(problems_file, encoding="utf-8") as f:
-                data = json.load(f)
+            stream = stream or is_jsonl(problems_file)
+            try:
+                with recorder.span("load_json", file=str(problems_file), stream=stream):
+                    if stream:
+                        data = read_header(problems_file)
+                    else:
+                        with open(problems_file, encoding="utf-8") as f:
+                            data = json.load(f)
 
-            # CLI --exam-type overrides JSON
-            if exam_type:
-                data["exam_type"] = exam_type
+                # CLI --exam-type overrides JSON
+                if exam_type:
+                    data["exam_type"] = exam_type
 
-            # Generate graph images
-            image_paths: dict[int, Path] = {}
-            problems = data.get("problems", [])
-            graph_problems = [
-                (i, p) for i, p in enumerate(problems, 1) if "graph" in p
-            ]
-            if graph_problems:
-                from graph_generator import generate_graph
-
-                for prob_num, prob in graph_problems:
-                    graph_spec = prob["graph"]
-                    img_name = f"graph_{prob_num}.png"
-                    img_path = work / img_name
-                    generate_graph(graph_spec, img_path)
-                    image_paths[prob_num] = img_path
-                    print(f"  Graph: problem {prob_num} → {img_name}")
-
-            # Generate .tex
-            tex_source = generate_latex(data, image_paths)
-            tex_path = work / "exam.tex"
-            tex_path.write_text(tex_source, encoding="utf-8")
-            print(f"  LaTeX: {tex_path}")
+                if stream:
+                    graph_problems: list[tuple[int, dict]] = []
+                    digest = hashlib.sha256()
+                    scan = _scan_problems(problems_file, graph_problems, digest)
+                    with recorder.span("lint" if lint else "scan_problems", cat="latex"):
+                        if lint:
+                            _lint_preflight({"problems": scan}, problems_file)
+                        else:
+                            for _ in scan:
+                                pass
+                    # The cache key covers the problems through their digest
+                    key_data = {**data, "problems_sha256": digest.hexdigest()}
+                else:
+                    if lint:
+                        with recorder.span("lint", cat="latex"):
+                            _lint_preflight(data, problems_file)
+                    key_data = data
+            except ValueError as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+                raise SystemExit(1)
+
+            if cache is not None:
+                with recorder.span("cache_lookup", cat="cache") as span_args:
+                    cache_key = _build_cache_key(cache, key_data, exam_type, graph_format)
+                    hit = bool(cache_key) and cache.restore(cache_key, output, keep_tex)
+                    span_args["hit"] = hit
+                if hit:
+                    print(f"  Cache hit: {cache_key[:12]}")
+                    print(f"\nOUTPUT: {output}")
+                    return
+
+            # Render graph images (in parallel) while the .tex is generated
+            if stream:
+                # Parsed again lazily while the .tex is written
+                written = hashlib.sha256()
+                data = {**data, "problems": _scan_problems(problems_file, None, written)}
+            else:
+                problems = data.get("problems", [])
+                graph_problems = [
+                    (i, p) for i, p in enumerate(problems, 1) if "graph" in p
+                ]
+            image_paths: dict[int, Path] = {
+                prob_num: _graph_path(work, prob_num, prob["graph"], graph_format)
+                for prob_num, prob in graph_problems
+            }
+            if watch_state is not None:
+                graph_problems = watch_state.changed_graphs(graph_problems, image_paths)
+            pool, pending = _start_graphs(graph_problems, image_paths, graph_jobs)
+
+            try:
+                # Generate .tex (image paths are deterministic, so this does
+                # not have to wait for the graphs)
+                if watch_state is not None:
+                    fragments = watch_state.fragments
+                else:
+                    fragments = active_fragment_cache()  # --fragment-cache
+                persistent = watch_state is None and fragments is not None
+                frag_before = (fragments.hits, fragments.misses) if persistent else (0, 0)
+                conv_before = conversion_stats()
+                with recorder.span("generate_latex", cat="latex") as span_args:
+                    tex_path = work / "exam.tex"
+                    with open(tex_path, "w", encoding="utf-8") as f:
+                        write_latex(data, image_paths, f, fragments)
+                    if stream and written.hexdigest() != digest.hexdigest():
+                        # Lint, graphs and the cache key saw other content
+                        print(f"ERROR: {problems_file} changed during the build; "
+                              "run it again", file=sys.stderr)
+                        raise SystemExit(1)
+                    if persistent:
+                        reused = fragments.hits - frag_before[0]
+                        rendered = fragments.misses - frag_before[1]
+                        span_args.update(fragments_reused=reused, fragments_rendered=rendered)
+                        print(f"  Fragments: {reused} reused, {rendered} rendered")
+                conv_after = conversion_stats()
+                conv_seconds = conv_after["seconds"] - conv_before["seconds"]
+                recorder.add(
+                    "hancom_to_latex", recorder.events[-1]["ts"], conv_seconds * 1e6,
+                    cat="latex",
+                    count=conv_after["calls"] - conv_before["calls"],
+                    hits=conv_after["hits"] - conv_before["hits"],
+                    disk_hits=conv_after["disk_hits"] - conv_before["disk_hits"],
+                    total_ms=round(conv_seconds * 1000, 3),
+                )
+                print(f"  LaTeX: {tex_path}")
+
+                graph_errors = 0
+                graph_types = {n: p["graph"].get("type", "custom") for n, p in graph_problems}
+                for prob_num, future in pending:
+                    error, timing = future.result()
+                    recorder.add(
+                        "generate_graph", timing.pop("ts"), timing.pop("dur"),
+                        cat="graph", pid=timing.pop("pid"), tid=0,
+                        graph_type=graph_types[prob_num], problem=prob_num,
+                        error=error, **timing,
+                    )
+                    if watch_state is not None:
+                        watch_state.graph_done(prob_num, error)
+                    if error:
+                        graph_errors += 1
+                        print(f"ERROR: graph for problem {prob_num} failed: {error}",
+                              file=sys.stderr)
+                    else:
+                        print(f"  Graph: problem {prob_num} → {image_paths[prob_num].name}")
+            finally:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+            if graph_errors:
+                raise SystemExit(1)
 
         else:
             raise SystemExit("Either --problems or --tex is required")
 
         # Compile with xelatex
-        print("  Compiling with xelatex (2 passes)...")
-        pdf_path = _run_xelatex(tex_path, work)
+        print("  Compiling with xelatex...")
+        pdf_path = _run_xelatex(tex_path, work, preamble_fmt=preamble_fmt, trace=trace)
         print(f"  PDF generated: {pdf_path}")
 
+        if cache is not None and cache_key:
+            with recorder.span("cache_store", cat="cache"):
+                cache.store(cache_key, pdf_path, tex_path, image_paths)
+
         # Copy PDF to output
-        output.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(pdf_path, output)
-        print(f"\nOUTPUT: {output}")
+        with recorder.span("copy_output", output=str(output)):
+            output.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(pdf_path, output)
+            print(f"\nOUTPUT: {output}")
+
+            # Optionally keep .tex and images
+            if keep_tex:
+                tex_out = output.with_suffix(".tex")
+                if problems_file:
+                    # Graph images get the output stem as prefix, so batch
+                    # jobs sharing an output directory keep their own
+                    renames = {}
+                    for prob_num, img_path in image_paths.items():
+                        img_out = kept_graph_path(output, img_path.name)
+                        if img_path.is_file():
+                            shutil.copy2(img_path, img_out)
+                            renames[str(img_path)] = img_out.name
+                            print(f"  Kept: {img_out}")
+                    tex_out.write_text(
+                        retarget_graphs(tex_path.read_text(encoding="utf-8"), renames),
+                        encoding="utf-8",
+                    )
+                else:
+                    shutil.copy2(tex_path, tex_out)
+                print(f"  Kept: {tex_out}")
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Batch mode
+# ═══════════════════════════════════════════════════════════════════════
+
+def _warm_worker() -> None:
+    """Pre-import matplotlib/numpy in a long-lived worker (build_daemon).
+
+    Batch workers don't do this: they import graph_generator on their first
+    graph anyway, and graph-free jobs should never pay for matplotlib.
+    """
+    toolchain()
+    try:
+        import graph_generator  # noqa: F401  (matplotlib/numpy warm-up)
+    except ImportError:
+        pass
+
+
+def _build_job(
+    problems_file: Path | None,
+    output: Path,
+    exam_type: str | None,
+    keep_tex: bool,
+    preamble_fmt: bool,
+    cache: BuildCache | None,
+    tracing: bool = False,
+    tex_file: Path | None = None,
+    graph_format: str = "png",
+    equation_cache: bool = False,
+    lint: bool = True,
+    stream: bool = False,
+    fragment_cache: bool = False,
+) -> tuple[bool, str, float, list[dict]]:
+    """Run build() for one batch (or build_daemon) entry, capturing its output.
+
+    Returns:
+        (ok, captured log, elapsed seconds, trace events). Failures —
+        including the SystemExit raised by build() and _run_xelatex() — are
+        reported instead of propagated so one bad JSON cannot abort the batch.
+        Trace events are empty unless *tracing* is set. With
+        *equation_cache*, conversions go through the persistent equation
+        cache and are committed before returning; *fragment_cache* does the
+        same for rendered problem fragments.
+    """
+    if equation_cache:
+        enable_equation_cache()
+    if fragment_cache:
+        enable_fragment_cache()
+    trace = BuildTrace() if tracing else None
+    buf = io.StringIO()
+    start_us = time.time() * 1e6
+    start = time.perf_counter()
+    ok = True
+    with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+        try:
+            build(
+                problems_file=problems_file,
+                tex_file=tex_file,
+                output=output,
+                exam_type=exam_type,
+                keep_tex=keep_tex,
+                preamble_fmt=preamble_fmt,
+                cache=cache,
+                # Parallelism comes from the batch pool; avoid nested pools
+                graph_jobs=1,
+                trace=trace,
+                graph_format=graph_format,
+                lint=lint,
+                stream=stream,
+            )
+        except SystemExit as e:
+            ok = False
+            if e.code not in (None, 0, 1):
+                print(f"ERROR: {e.code}", file=sys.stderr)
+        except Exception as e:  # noqa: BLE001 — report, don't abort the batch
+            ok = False
+            print(f"ERROR: {type(e).__name__}: {e}", file=sys.stderr)
+        finally:
+            flush_equation_cache()
+            flush_fragment_cache()
+    elapsed = time.perf_counter() - start
+    if trace is not None:
+        trace.add("build", start_us, elapsed * 1e6, file=str(problems_file or tex_file), ok=ok)
+    return ok, buf.getvalue(), elapsed, trace.events if trace is not None else []
+
+
+def build_batch(
+    inputs: list[Path],
+    output_dir: Path | None,
+    exam_type: str | None = None,
+    keep_tex: bool = False,
+    jobs: int | None = None,
+    preamble_fmt: bool = False,
+    cache: BuildCache | None = None,
+    trace: BuildTrace | None = None,
+    graph_format: str = "png",
+    equation_cache: bool = False,
+    lint: bool = True,
+    stream: bool = False,
+    fragment_cache: bool = False,
+) -> int:
+    """Build many problem JSONs with a bounded process pool.
+
+    Args:
+        inputs: Problem JSON files to build
+        output_dir: Directory for the PDFs (default: next to each JSON)
+        exam_type: Override exam type for every job
+        keep_tex: If True, keep .tex and images alongside each PDF
+        jobs: Worker processes (default: CPU count)
+        preamble_fmt: If True, compile against a cached precompiled preamble
+        cache: Optional build cache shared by all workers
+        trace: Optional trace; each worker's events are merged into it
+        graph_format: "png", "pdf", "pgf" or "tikz"
+        equation_cache: If True, workers share the persistent equation cache
+        lint: If False, skip the hancom_lint pre-flight of each job
+        stream: If True, every job streams its problems (see build())
+        fragment_cache: If True, workers share the persistent fragment cache
+
+    Returns:
+        Number of failed jobs
+    """
+    if not inputs:
+        print("No problem JSON files found for batch build.", file=sys.stderr)
+        return 0
+
+    def _output_for(src: Path) -> Path:
+        if output_dir is None:
+            return src.with_suffix(".pdf")
+        return output_dir / (src.stem + ".pdf")
+
+    outputs = [_output_for(src) for src in inputs]
+    seen: dict[Path, Path] = {}
+    for src, out in zip(inputs, outputs):
+        if out in seen:
+            raise SystemExit(f"Batch output collision: {seen[out]} and {src} → {out}")
+        seen[out] = src
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(inputs)))
+    print(f"Batch: {len(inputs)} file(s), {jobs} worker(s)")
+
+    failed: list[Path] = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(_build_job, src, out, exam_type, keep_tex, preamble_fmt, cache,
+                        trace is not None, None, graph_format, equation_cache,
+                        lint, stream, fragment_cache): (src, out)
+            for src, out in zip(inputs, outputs)
+        }
+        for future in as_completed(futures):
+            src, out = futures[future]
+            try:
+                ok, log, elapsed, events = future.result()
+            except Exception as e:  # worker crashed (e.g. killed by OOM)
+                ok, log, elapsed, events = False, f"ERROR: worker failed: {e}\n", 0.0, []
+            if trace is not None:
+                trace.extend(events)
+            if ok:
+                print(f"  OK    {src} → {out} ({elapsed:.1f}s)")
+            else:
+                failed.append(src)
+                print(f"  FAIL  {src} ({elapsed:.1f}s)")
+                for line in log.rstrip().splitlines():
+                    print(f"        {line}")
+
+    total = time.perf_counter() - start
+    print(f"\nBatch: {len(inputs) - len(failed)}/{len(inputs)} succeeded "
+          f"in {total:.1f}s", end="")
+    if failed:
+        print(f" ({len(failed)} FAILED)")
+        for src in sorted(failed):
+            print(f"  - {src}")
+    else:
+        print()
+    return len(failed)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Variants mode
+# ═══════════════════════════════════════════════════════════════════════
+
+def _variant_output(output: Path, number: int) -> Path:
+    """exam.pdf → exam_v<number>.pdf"""
+    return output.with_name(f"{output.stem}_v{number}{output.suffix or '.pdf'}")
+
+
+def build_variants(
+    problems_file: Path,
+    output: Path,
+    variants: int,
+    seed: int,
+    exam_type: str | None = None,
+    keep_tex: bool = False,
+    preamble_fmt: bool = False,
+    graph_jobs: int | None = None,
+    jobs: int | None = None,
+    graph_format: str = "png",
+    lint: bool = True,
+) -> int:
+    """Build shuffled versions of one exam from a single shared render.
+
+    Graphs are rendered once per original problem and each distinct Hancom
+    script is converted once; only the .tex assembly is repeated per
+    variant, and the xelatex runs happen in parallel. For variant k this
+    writes <output stem>_v<k>.pdf and <output stem>_v<k>.answers.json.
+
+    Args:
+        problems_file: Path to problems JSON
+        output: Base output .pdf path
+        variants: Number of variants to build
+        seed: Shuffle seed; the same seed always yields the same variants
+        exam_type: Override exam type
+        keep_tex: If True, keep each variant's .tex and the graph images
+        preamble_fmt: If True, compile against a cached precompiled preamble
+        graph_jobs: Worker processes for graph rendering (default: CPU count)
+        jobs: Parallel xelatex runs (default: CPU count)
+        graph_format: "png", "pdf", "pgf" or "tikz"
+        lint: If False, skip the hancom_lint pre-flight
+
+    Returns:
+        Number of variants that failed to compile
+    """
+    if not problems_file.is_file():
+        raise SystemExit(f"Problems file not found: {problems_file}")
+    xelatex = _find_xelatex()
+    if xelatex is None:
+        raise _xelatex_missing()
+
+    # Shuffling needs every problem at once, so JSONL is loaded whole
+    data = load_problem_data(problems_file)
+    if exam_type:
+        data["exam_type"] = exam_type
+    if lint:
+        _lint_preflight(data, problems_file)
+
+    with tempfile.TemporaryDirectory(prefix="math_exam_variants_") as tmpdir:
+        work = Path(tmpdir)
+
+        # Render each original graph once; variants point at the same files
+        problems = data.get("problems", [])
+        graph_problems = [
+            (i, p) for i, p in enumerate(problems, 1) if "graph" in p
+        ]
+        graph_files: dict[int, Path] = {
+            prob_num: _graph_path(work, prob_num, prob["graph"], graph_format)
+            for prob_num, prob in graph_problems
+        }
+        pool, pending = _start_graphs(graph_problems, graph_files, graph_jobs)
+
+        try:
+            tex_files = []
+            conv_before = conversion_stats()["converted"]
+            # Variants share their equations; the converter's LRU makes
+            # every variant after the first nearly free
+            for variant in make_variants(data, variants, seed):
+                image_paths = {
+                    new_num: graph_files[orig]
+                    for new_num, orig in enumerate(variant.order, 1)
+                    if orig in graph_files
+                }
+                variant_dir = work / f"v{variant.number}"
+                variant_dir.mkdir()
+                tex_path = variant_dir / "exam.tex"
+                with open(tex_path, "w", encoding="utf-8") as f:
+                    write_latex(variant.data, image_paths, f)
+                tex_files.append((variant, tex_path))
+            conversions = conversion_stats()["converted"] - conv_before
+            print(f"  LaTeX: {variants} variant(s), {conversions} equation conversion(s)")
+
+            graph_errors = 0
+            for prob_num, future in pending:
+                error, _ = future.result()
+                if error:
+                    graph_errors += 1
+                    print(f"ERROR: graph for problem {prob_num} failed: {error}",
+                          file=sys.stderr)
+                else:
+                    print(f"  Graph: problem {prob_num} → {graph_files[prob_num].name}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        if graph_errors:
+            raise SystemExit(1)
+
+        if preamble_fmt:
+            # Build the shared format once instead of racing in every run
+            _ensure_preamble_format(xelatex)
+
+        # Variants share one kept copy of each graph
+        kept_names = {
+            str(path): kept_graph_path(output, path.name).name
+            for path in graph_files.values()
+        }
+
+        workers = max(1, min(jobs or os.cpu_count() or 1, variants))
+        print(f"  Compiling {variants} variant(s) with xelatex ({workers} in parallel)...")
+        failed = 0
+        # xelatex runs in subprocesses, so threads are enough to overlap them
+        with ThreadPoolExecutor(max_workers=workers) as compile_pool:
+            compiles = [
+                (variant, tex_path,
+                 compile_pool.submit(_run_xelatex, tex_path, tex_path.parent, preamble_fmt))
+                for variant, tex_path in tex_files
+            ]
+            for variant, tex_path, future in compiles:
+                try:
+                    pdf_path = future.result()
+                except SystemExit:
+                    failed += 1
+                    print(f"ERROR: variant {variant.number} failed to compile",
+                          file=sys.stderr)
+                    continue
+
+                out = _variant_output(output, variant.number)
+                out.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(pdf_path, out)
+                answers = out.with_suffix(".answers.json")
+                mapping = {"source": str(problems_file), **variant.mapping()}
+                answers.write_text(
+                    json.dumps(mapping, ensure_ascii=False, indent=2) + "\n",
+                    encoding="utf-8",
+                )
+                print(f"  Variant {variant.number}: {out} (answers: {answers.name})")
+                if keep_tex:
+                    out.with_suffix(".tex").write_text(
+                        retarget_graphs(tex_path.read_text(encoding="utf-8"), kept_names),
+                        encoding="utf-8",
+                    )
 
-        # Optionally keep .tex and images
         if keep_tex:
-            tex_out = output.with_suffix(".tex")
-            shutil.copy2(tex_path, tex_out)
-            print(f"  Kept: {tex_out}")
+            for img_path in graph_files.values():
+                if img_path.is_file():
+                    shutil.copy2(img_path, kept_graph_path(output, img_path.name))
 
-            # Also copy graph images if generated from JSON
-            if problems_file:
-                for prob_num, img_path in image_paths.items():
-                    img_out = output.parent / img_path.name
-                    if img_path.is_file():
-                        shutil.copy2(img_path, img_out)
-                        print(f"  Kept: {img_out}")
+    print(f"\nVariants: {variants - failed}/{variants} built (seed {seed})")
+    return failed
 
 
-def main() -> None:
+# ═══════════════════════════════════════════════════════════════════════
+#  Watch mode
+# ═══════════════════════════════════════════════════════════════════════
+
+# Fragment cache entries kept before a --watch session starts over
+_WATCH_MAX_FRAGMENTS = 4096
+
+
+class _WatchState:
+    """Incremental build state kept across --watch rebuilds."""
+
+    def __init__(self, work_dir: Path):
+        self.work_dir = work_dir
+        self.graph_specs: dict[int, str] = {}    # problem number → rendered spec
+        self.pending_specs: dict[int, str] = {}
+        self.fragments: dict = {}                # latex_generator fragment cache
+
+    def changed_graphs(
+        self,
+        graph_problems: list[tuple[int, dict]],
+        image_paths: dict[int, Path],
+    ) -> list[tuple[int, dict]]:
+        """Filter to the graphs whose spec changed since the last render."""
+        changed = []
+        for prob_num, prob in graph_problems:
+            spec = json.dumps(prob["graph"], sort_keys=True, ensure_ascii=False)
+            if self.graph_specs.get(prob_num) == spec and image_paths[prob_num].is_file():
+                continue
+            self.pending_specs[prob_num] = spec
+            changed.append((prob_num, prob))
+        return changed
+
+    def graph_done(self, prob_num: int, error: str | None) -> None:
+        """Record a finished render (failed renders are retried next time)."""
+        spec = self.pending_specs.pop(prob_num, None)
+        if error or spec is None:
+            self.graph_specs.pop(prob_num, None)
+        else:
+            self.graph_specs[prob_num] = spec
+
+    def trim(self) -> None:
+        """Drop stale fragments so a long session does not grow unbounded."""
+        if len(self.fragments) > _WATCH_MAX_FRAGMENTS:
+            self.fragments.clear()
+
+
+def watch(
+    problems_file: Path,
+    output: Path,
+    exam_type: str | None = None,
+    keep_tex: bool = False,
+    preamble_fmt: bool = False,
+    graph_jobs: int | None = None,
+    interval: float = 0.5,
+    graph_format: str = "png",
+    lint: bool = True,
+    stream: bool = False,
+) -> None:
+    """Rebuild *output* whenever *problems_file* changes (Ctrl-C to stop).
+
+    The work directory persists between rebuilds (next to the output, as
+    ``.<name>.watch/``), so unchanged graphs are not re-rendered, unchanged
+    problems reuse their LaTeX fragments, and xelatex keeps its .aux data.
+    """
+    work_dir = (output.parent / f".{output.stem}.watch").resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    state = _WatchState(work_dir)
+
+    print(f"Watching {problems_file} (Ctrl-C to stop)")
+    last_seen: tuple[int, int] | None = None
+    try:
+        while True:
+            try:
+                st = problems_file.stat()
+                stamp = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                stamp = None
+            if stamp is not None and stamp != last_seen:
+                last_seen = stamp
+                start = time.perf_counter()
+                print(f"\n── Rebuilding {time.strftime('%H:%M:%S')} ──")
+                try:
+                    build(
+                        problems_file=problems_file,
+                        tex_file=None,
+                        output=output,
+                        exam_type=exam_type,
+                        keep_tex=keep_tex,
+                        preamble_fmt=preamble_fmt,
+                        graph_jobs=graph_jobs,
+                        watch_state=state,
+                        graph_format=graph_format,
+                        lint=lint,
+                        stream=stream,
+                    )
+                    print(f"  Rebuilt in {time.perf_counter() - start:.1f}s")
+                except SystemExit as e:
+                    if e.code not in (None, 0, 1):
+                        print(f"ERROR: {e.code}", file=sys.stderr)
+                    print("  Build failed; waiting for the next change", file=sys.stderr)
+                except Exception as e:  # noqa: BLE001 — keep watching
+                    print(f"ERROR: {type(e).__name__}: {e}", file=sys.stderr)
+                    print("  Build failed; waiting for the next change", file=sys.stderr)
+                state.trim()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    """Command-line flags shared by main() and the build_daemon client."""
     parser = argparse.ArgumentParser(
         description="Build math exam/worksheet PDF from problem data"
     )
     parser.add_argument(
         "--problems", "-p",
         type=Path,
-        help="JSON file containing problem data",
+        help="JSON (or JSONL) file containing problem data",
     )
     parser.add_argument(
         "--tex",
@@ -260,26 +1213,234 @@ def main() -> None:
     parser.add_argument(
         "--keep-tex",
         action="store_true",
-        help="Keep intermediate .tex file alongside the PDF",
+        help="Keep intermediate .tex file (and <stem>_graph_N images) alongside the PDF",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild incrementally whenever --problems changes",
+    )
+    parser.add_argument(
+        "--graph-jobs",
+        type=int,
+        default=None,
+        help="Worker processes for graph rendering (default: CPU count; "
+             "batch mode renders each job's graphs serially)",
+    )
+    parser.add_argument(
+        "--graph-format",
+        choices=["png", "pdf", "pgf", "tikz"],
+        default="png",
+        help="Graph image format: 300-dpi png (default), vector pdf/pgf "
+             "(smaller PDFs, no raster decoding; pgf text uses the exam font), "
+             "or tikz: function graphs drawn by pgfplots inside the .tex "
+             "without matplotlib (other graph types fall back to png)",
+    )
+    parser.add_argument(
+        "--preamble-fmt",
+        action="store_true",
+        help="Compile against a cached precompiled xelatex format of the "
+             "standard preamble (faster for short documents)",
+    )
+    parser.add_argument(
+        "--build-cache",
+        action="store_true",
+        help="Reuse PDFs from an on-disk cache keyed by the problem JSON, "
+             "generator sources, font and TeX engine",
+    )
+    parser.add_argument(
+        "--equation-cache",
+        action="store_true",
+        help="Keep Hancom → LaTeX conversions in a persistent on-disk cache "
+             "shared across runs (keyed by the converter version)",
+    )
+    parser.add_argument(
+        "--fragment-cache",
+        action="store_true",
+        help="Keep each problem's rendered LaTeX in a persistent on-disk "
+             "cache keyed by its content and layout, so a rebuild after a "
+             "small edit only renders the changed problems",
+    )
+    parser.add_argument(
+        "--no-lint",
+        dest="lint",
+        action="store_false",
+        help="Skip the Hancom script check (hancom_lint) that runs before "
+             "rendering and stops the build on errors",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read and render the problems one at a time instead of loading "
+             "the whole JSON (bounded memory for large books; always on for "
+             ".jsonl input: a header line, then one problem per line)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Build cache size limit in MB; least-recently-used entries are "
+             "evicted (default: %(default)s)",
     )
     parser.add_argument(
         "--output", "-o",
         type=Path,
-        required=True,
         help="Output .pdf file path",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="SPEC",
+        help="Build many JSONs: a directory, a glob pattern, or a manifest "
+             "file listing one JSON path per line",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Batch mode: directory for the PDFs (default: next to each JSON)",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Batch mode: number of worker processes; variants mode: "
+             "parallel xelatex runs (default: CPU count)",
+    )
+    parser.add_argument(
+        "--variants",
+        type=int,
+        metavar="N",
+        help="Build N versions with shuffled problem and choice order "
+             "(<output>_v1.pdf …) plus an answer-mapping JSON for each",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Variants mode: shuffle seed (default: random, printed)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="FILE",
+        help="Write per-stage wall time, CPU time and peak RSS as a Chrome "
+             "trace-event JSON (open in chrome://tracing or Perfetto)",
+    )
+    return parser
+
+
+def main() -> None:
+    parser = _make_parser()
     args = parser.parse_args()
 
+    if args.graph_jobs is not None and args.graph_jobs < 1:
+        parser.error("--graph-jobs must be at least 1")
+
+    trace = BuildTrace() if args.trace else None
+
+    if args.equation_cache:
+        enable_equation_cache()
+    if args.fragment_cache:
+        enable_fragment_cache()
+
+    cache = None
+    if args.build_cache:
+        cache = BuildCache(cache_root() / "builds",
+                           max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    if args.batch:
+        if args.problems or args.tex:
+            parser.error("--batch cannot be combined with --problems or --tex")
+        if args.jobs is not None and args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        failures = build_batch(
+            inputs=collect_problem_files(args.batch),
+            output_dir=args.output_dir,
+            exam_type=args.exam_type,
+            keep_tex=args.keep_tex,
+            jobs=args.jobs,
+            preamble_fmt=args.preamble_fmt,
+            cache=cache,
+            trace=trace,
+            graph_format=args.graph_format,
+            equation_cache=args.equation_cache,
+            lint=args.lint,
+            stream=args.stream,
+            fragment_cache=args.fragment_cache,
+        )
+        if trace is not None:
+            trace.write(args.trace)
+            print(f"Trace: {args.trace}")
+        raise SystemExit(1 if failures else 0)
+
     if not args.problems and not args.tex:
-        parser.error("Either --problems or --tex is required")
-
-    build(
-        problems_file=args.problems,
-        tex_file=args.tex,
-        output=args.output,
-        exam_type=args.exam_type,
-        keep_tex=args.keep_tex,
-    )
+        parser.error("Either --problems, --tex or --batch is required")
+    if not args.output:
+        parser.error("--output is required")
+
+    if args.variants is not None:
+        if args.variants < 1:
+            parser.error("--variants must be at least 1")
+        if not args.problems or args.tex or args.watch:
+            parser.error("--variants requires --problems (without --tex or --watch)")
+        if args.build_cache or args.trace:
+            parser.error("--variants cannot be combined with --build-cache or --trace")
+        if args.jobs is not None and args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        seed = args.seed if args.seed is not None else random.randrange(1_000_000)
+        print(f"Variants: {args.variants}, seed {seed}")
+        failures = build_variants(
+            problems_file=args.problems,
+            output=args.output,
+            variants=args.variants,
+            seed=seed,
+            exam_type=args.exam_type,
+            keep_tex=args.keep_tex,
+            preamble_fmt=args.preamble_fmt,
+            graph_jobs=args.graph_jobs,
+            graph_format=args.graph_format,
+            jobs=args.jobs,
+            lint=args.lint,
+        )
+        raise SystemExit(1 if failures else 0)
+
+    if args.watch:
+        if not args.problems:
+            parser.error("--watch requires --problems")
+        if args.trace:
+            parser.error("--trace cannot be combined with --watch")
+        watch(
+            problems_file=args.problems,
+            output=args.output,
+            exam_type=args.exam_type,
+            keep_tex=args.keep_tex,
+            preamble_fmt=args.preamble_fmt,
+            graph_jobs=args.graph_jobs,
+            graph_format=args.graph_format,
+            lint=args.lint,
+            stream=args.stream,
+        )
+        return
+
+    try:
+        build(
+            problems_file=args.problems,
+            tex_file=args.tex,
+            output=args.output,
+            exam_type=args.exam_type,
+            keep_tex=args.keep_tex,
+            preamble_fmt=args.preamble_fmt,
+            cache=cache,
+            graph_jobs=args.graph_jobs,
+            graph_format=args.graph_format,
+            trace=trace,
+            lint=args.lint,
+            stream=args.stream,
+        )
+    finally:
+        # Written even when the build fails: that is when the trace is most useful
+        if trace is not None:
+            trace.write(args.trace)
+            print(f"Trace: {args.trace}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Structured per-stage timing trace for the PDF build pipeline.
+
+Records wall time, CPU time and peak RSS for each build stage and writes
+them in the Chrome trace-event format, which loads directly in
+chrome://tracing, Perfetto (ui.perfetto.dev) or speedscope.
+
+Each stage becomes a complete ("X") event:
+    {"name": "generate_graph", "cat": "graph", "ph": "X",
+     "ts": <µs>, "dur": <µs>, "pid": ..., "tid": ...,
+     "args": {"cpu_ms": ..., "max_rss_kb": ..., "graph_type": "trig", ...}}
+
+Timestamps are wall-clock microseconds, so events recorded in graph or
+batch worker processes line up with the parent's events.
+
+Usage:
+    from build_trace import BuildTrace
+    trace = BuildTrace()
+    with trace.span("load_json"):
+        ...
+    trace.write(Path("trace.json"))
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _now_us() -> float:
+    """Wall-clock timestamp in microseconds (comparable across processes)."""
+    return time.time() * 1e6
+
+
+def rusage_max_rss_kb(ru) -> int:
+    """Normalize ru_maxrss to kilobytes (macOS reports bytes)."""
+    if platform.system() == "Darwin":
+        return ru.ru_maxrss // 1024
+    return ru.ru_maxrss
+
+
+def peak_rss_kb() -> int | None:
+    """Peak resident set size of this process so far, in KB."""
+    if resource is None:
+        return None
+    return rusage_max_rss_kb(resource.getrusage(resource.RUSAGE_SELF))
+
+
+class BuildTrace:
+    """Collects trace events for one or more builds."""
+
+    def __init__(self):
+        self.events: list[dict] = []
+
+    @contextmanager
+    def span(self, name: str, cat: str = "build", **args) -> Iterator[dict]:
+        """Time a block of code as one complete event.
+
+        Yields the event's ``args`` dict, so the block can attach extra
+        fields (counts, sizes) once it knows them.
+        """
+        start = _now_us()
+        cpu0 = time.process_time()
+        try:
+            yield args
+        finally:
+            args["cpu_ms"] = round((time.process_time() - cpu0) * 1000, 3)
+            rss = peak_rss_kb()
+            if rss is not None:
+                args["max_rss_kb"] = rss
+            self.add(name, start, _now_us() - start, cat=cat, **args)
+
+    def add(
+        self,
+        name: str,
+        ts: float,
+        dur: float,
+        cat: str = "build",
+        pid: int | None = None,
+        tid: int | None = None,
+        **args,
+    ) -> None:
+        """Record a complete event measured elsewhere (e.g. in a worker)."""
+        self.events.append({
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round(ts, 1),
+            "dur": round(dur, 1),
+            "pid": os.getpid() if pid is None else pid,
+            "tid": threading.get_ident() if tid is None else tid,
+            "args": args,
+        })
+
+    def extend(self, events: list[dict]) -> None:
+        """Merge events recorded by another BuildTrace (e.g. a batch worker)."""
+        self.events.extend(events)
+
+    def write(self, path: Path) -> None:
+        """Write the trace as a Chrome trace-event JSON file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "traceEvents": sorted(self.events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+        }
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=1),
+                        encoding="utf-8")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Import-time budget check for the build scripts.
+
+Graph-free builds and HTML previews, --tex builds and TikZ-only graph
+builds must never load matplotlib, numpy or scipy; only PNG/PDF/PGF/SVG
+graph rendering may. This runs
+each scenario in a fresh ``python -X importtime`` interpreter and fails if
+a heavy module shows up in sys.modules or the cumulative import time of the
+scenario exceeds its budget.
+
+Usage:
+    python3 check_imports.py                  # exit 1 on any violation
+    python3 check_imports.py --top 10         # also list the slowest imports
+    python3 check_imports.py --budget-scale 2 # slower machine / CI
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+EXAMPLE = SCRIPT_DIR.parent / "examples" / "sample_exam_2020_march.json"
+
+HEAVY_MODULES = ("matplotlib", "numpy", "scipy")
+
+_REPORT = f"""
+import json, sys
+print(json.dumps(sorted(m for m in sys.modules
+                        if m.split(".")[0] in {HEAVY_MODULES!r})))
+"""
+
+# (name, budget in ms, code run from scripts/)
+SCENARIOS: list[tuple[str, float, str]] = [
+    ("import build_math_pdf", 250, "import build_math_pdf"),
+    ("import build_daemon", 300, "import build_daemon"),
+    ("json build, no graphs", 300, f"""
+import json
+from pathlib import Path
+import build_math_pdf
+from latex_generator import generate_latex
+data = json.loads(Path({str(EXAMPLE)!r}).read_text(encoding="utf-8"))
+generate_latex(data, {{}})
+"""),
+    ("tikz graphs", 300, """
+import tempfile
+from pathlib import Path
+from build_math_pdf import _graph_path, _start_graphs
+from latex_generator import generate_latex
+# Spec keys as read by tikz_graphs._tikz_quadratic: y = a(x - p)^2 + q
+spec = {"type": "quadratic", "a": 1, "p": 2, "q": -3}
+data = {"problems": [{"number": 1, "text": "그래프", "graph": spec}]}
+with tempfile.TemporaryDirectory() as work:
+    paths = {1: _graph_path(Path(work), 1, spec, "tikz")}
+    _, pending = _start_graphs([(1, data["problems"][0])], paths, None)
+    error, _ = pending[0][1].result()
+    assert error is None, error
+    # The plot must come from the spec, not from the quadratic defaults
+    assert "(x-(2))" in generate_latex(data, paths), "spec ignored by the TikZ backend"
+"""),
+    ("html preview, no graphs", 250, f"""
+import json
+from pathlib import Path
+import html_preview
+from html_generator import generate_html
+data = json.loads(Path({str(EXAMPLE)!r}).read_text(encoding="utf-8"))
+generate_html(data, {{}})
+"""),
+]
+
+
+def _parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+    """Parse ``-X importtime`` lines into (self_us, cumulative_us, name)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cum_us), name.rstrip()[1:]))
+    return rows
+
+
+def run_scenario(code: str) -> tuple[float, list[str], list[tuple[int, int, str]]]:
+    """Run *code* in a fresh interpreter.
+
+    Returns:
+        (total import ms, heavy modules loaded, importtime rows)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + _REPORT],
+        cwd=SCRIPT_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = _parse_importtime(proc.stderr)
+    # Top-level entries (no indentation) already include their children.
+    total_us = sum(cum for _, cum, name in rows if not name.startswith(" "))
+    return total_us / 1000, json.loads(proc.stdout.strip().splitlines()[-1]), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check import time and heavy imports of the build scripts"
+    )
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every budget by this factor")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per scenario; the fastest counts (default 3)")
+    parser.add_argument("--top", type=int, default=0,
+                        help="Show the N slowest imports per scenario")
+    args = parser.parse_args()
+
+    failed = False
+    for name, budget_ms, code in SCENARIOS:
+        budget_ms *= args.budget_scale
+        try:
+            runs = [run_scenario(code) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(f"  FAIL  {name}: {e}")
+            failed = True
+            continue
+        total_ms, heavy, rows = min(runs, key=lambda r: r[0])
+
+        problems = []
+        if heavy:
+            problems.append("loaded " + ", ".join(sorted({m.split('.')[0] for m in heavy})))
+        if total_ms > budget_ms:
+            problems.append(f"over budget ({budget_ms:.0f} ms)")
+        status = "FAIL" if problems else "ok"
+        detail = f" — {'; '.join(problems)}" if problems else ""
+        print(f"  {status:<4}  {name}: {total_ms:.1f} ms{detail}")
+        failed = failed or bool(problems)
+
+        if args.top:
+            for self_us, cum_us, mod in sorted(rows, key=lambda r: -r[1])[:args.top]:
+                print(f"          {cum_us / 1000:7.1f} ms  {mod.strip()}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Persistent cache of Hancom → LaTeX conversions (second tier under the LRU).
+
+hancom_to_latex keeps recent conversions in an in-process LRU; this module
+adds an sqlite store that survives across runs and is shared by every build
+process of the user. Each converter version gets its own database file,
+named by converter_version() (a hash of hancom_to_latex.py), so editing a
+mapping table or the parser starts from an empty cache automatically.
+
+Layout:
+    <cache root>/equations/<converter version>.sqlite
+
+New conversions are buffered and committed in batches (and on flush() /
+interpreter exit). The cache is best-effort: any sqlite error disables it
+for the rest of the process and conversions simply run uncached.
+
+Usage:
+    from equation_cache import enable_equation_cache
+    enable_equation_cache()     # hancom_to_latex now reads/writes the store
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from hancom_to_latex import configure_cache, converter_version
+from toolchain import cache_root
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# Pending conversions are committed once this many accumulate
+COMMIT_EVERY = 256
+
+# Databases of other converter versions are removed once this old (seconds);
+# younger ones may still belong to another checkout in use
+STALE_AFTER = 7 * 24 * 3600
+
+
+class EquationCache:
+    """sqlite-backed script → LaTeX store for one converter version."""
+
+    def __init__(self, root: Path, version: str):
+        self.root = root
+        self.version = version
+        self.path = root / f"{version}.sqlite"
+        # Opened lazily and per process: a connection must not cross a fork
+        self._db: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._pending: list[tuple[str, str]] = []
+        self._broken = False
+
+    def _connect(self) -> sqlite3.Connection | None:
+        import sqlite3  # lazy: only builds that enable the cache pay for it
+
+        if self._broken:
+            return None
+        if self._db is not None and self._pid == os.getpid():
+            return self._db
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS conversions "
+                       "(script TEXT PRIMARY KEY, latex TEXT NOT NULL)")
+        except (OSError, sqlite3.Error):
+            self._broken = True
+            return None
+        self._db, self._pid = db, os.getpid()
+        self._pending = []
+        return db
+
+    def get(self, script: str) -> str | None:
+        import sqlite3
+
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT latex FROM conversions WHERE script = ?",
+                             (script,)).fetchone()
+        except sqlite3.Error:
+            self._broken = True
+            return None
+        return row[0] if row else None
+
+    def put(self, script: str, latex: str) -> None:
+        if self._connect() is None:
+            return
+        self._pending.append((script, latex))
+        if len(self._pending) >= COMMIT_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit buffered conversions."""
+        if not self._pending or self._db is None or self._pid != os.getpid():
+            return
+        import sqlite3
+
+        rows, self._pending = self._pending, []
+        try:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO conversions (script, latex) VALUES (?, ?)",
+                    rows,
+                )
+        except sqlite3.Error:
+            self._broken = True
+
+    def prune_stale(self) -> None:
+        """Remove old databases written by other converter versions."""
+        now = time.time()
+        for path in self.root.glob("*.sqlite*"):
+            if path.name.startswith(self.version):
+                continue
+            try:
+                if now - path.stat().st_mtime > STALE_AFTER:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+_active: EquationCache | None = None
+
+
+def enable_equation_cache(root: Path | None = None) -> EquationCache:
+    """Attach the persistent cache to hancom_to_latex (idempotent).
+
+    Args:
+        root: Cache directory (default: <cache root>/equations)
+
+    Returns:
+        The active EquationCache
+    """
+    global _active
+    root = root or cache_root() / "equations"
+    if _active is None or _active.root != root:
+        if _active is not None:
+            _active.flush()
+        _active = EquationCache(root, converter_version())
+        _active.prune_stale()
+        configure_cache(disk=_active)
+    return _active
+
+
+def flush_equation_cache() -> None:
+    """Commit pending conversions of the active cache, if any."""
+    if _active is not None:
+        _active.flush()
+
+
+atexit.register(flush_equation_cache)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Shuffled exam variants (문제 순서 / 선지 순서 섞기).
+
+Produces N versions of one problem set for anti-cheating printing. Each
+variant shuffles the problem order and the order of each problem's
+choices, deterministically from (seed, variant number).
+
+Rules:
+- Problems are shuffled within their section only. A problem with
+  "section_label" (e.g. 주관식) starts a new section; the label stays at
+  the top of the section, whichever problem lands there.
+- "shuffle_choices": false on a problem keeps its choices in order
+  (e.g. ascending numeric answers).
+- An optional "answer" (1-based choice number) is remapped per variant.
+
+Usage:
+    from exam_variants import make_variants
+    for variant in make_variants(data, n=4, seed=2025):
+        variant.data        # problem JSON for this variant
+        variant.order       # new problem number → original number
+        variant.mapping()   # answer-mapping JSON
+"""
+
+from __future__ import annotations
+
+import copy
+import random
+from dataclasses import dataclass
+
+
+@dataclass
+class Variant:
+    """One shuffled version of an exam."""
+
+    number: int
+    seed: int
+    data: dict
+    order: list[int]                 # order[i] = original number of problem i+1
+    choice_orders: list[list[int]]   # per new problem: original choice numbers
+
+    def mapping(self) -> dict:
+        """Answer-mapping JSON: where each problem and choice came from."""
+        problems = []
+        for new_num, (orig, choice_order) in enumerate(
+            zip(self.order, self.choice_orders), 1
+        ):
+            entry = {"number": new_num, "original": orig, "choices": choice_order}
+            answer = self.data["problems"][new_num - 1].get("answer")
+            if answer is not None:
+                entry["answer"] = answer
+            problems.append(entry)
+        return {"variant": self.number, "seed": self.seed, "problems": problems}
+
+
+def _sections(problems: list[dict]) -> list[list[int]]:
+    """Split problem indices into sections starting at each section_label."""
+    sections: list[list[int]] = []
+    for i, prob in enumerate(problems):
+        if not sections or prob.get("section_label"):
+            sections.append([])
+        sections[-1].append(i)
+    return sections
+
+
+def _shuffle_choices(prob: dict, rng: random.Random) -> list[int]:
+    """Shuffle prob["choices"] in place; return original choice numbers."""
+    choices = prob.get("choices") or []
+    order = list(range(1, len(choices) + 1))
+    if len(choices) < 2 or prob.get("shuffle_choices") is False:
+        return order
+    rng.shuffle(order)
+    prob["choices"] = [choices[k - 1] for k in order]
+
+    answer = prob.get("answer")
+    if isinstance(answer, int) and answer in order:
+        prob["answer"] = order.index(answer) + 1
+    return order
+
+
+def make_variant(data: dict, number: int, seed: int) -> Variant:
+    """Build variant *number* (1-based) of *data*; the input is not modified."""
+    rng = random.Random(f"{seed}:{number}")
+    problems = data.get("problems", [])
+
+    order: list[int] = []
+    shuffled: list[dict] = []
+    for section in _sections(problems):
+        label = problems[section[0]].get("section_label")
+        picked = section[:]
+        rng.shuffle(picked)
+        for pos, i in enumerate(picked):
+            prob = copy.deepcopy(problems[i])
+            prob.pop("section_label", None)
+            if pos == 0 and label:
+                prob["section_label"] = label
+            order.append(i + 1)
+            shuffled.append(prob)
+
+    choice_orders = [_shuffle_choices(prob, rng) for prob in shuffled]
+
+    variant_data = {k: v for k, v in data.items() if k != "problems"}
+    variant_data["problems"] = shuffled
+    return Variant(number, seed, variant_data, order, choice_orders)
+
+
+def make_variants(data: dict, n: int, seed: int) -> list[Variant]:
+    """Build variants 1..n of *data*."""
+    return [make_variant(data, k, seed) for k in range(1, n + 1)]
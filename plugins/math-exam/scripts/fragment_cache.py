@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Persistent cache of rendered problem fragments (latex_generator).
+
+Rendering a problem escapes its text and converts every equation, sub-
+problem and choice. The fragment only depends on the problem dict, the
+layout (exam / worksheet) and whether it has a graph — the number and the
+graph block are placeholders filled in per document — so it can be reused
+by every later build. Rebuilding a 5,000-problem book after editing one
+problem then renders one problem.
+
+Layout:
+    <cache root>/fragments/<fragment version>.sqlite
+
+The store is an EquationCache (same batching, fork safety and best-effort
+error handling) holding fragment_key() → JSON list of lines. The database
+is named by fragment_version(), a hash of latex_generator.py and the
+converter, so changing either starts from an empty cache.
+
+Usage:
+    from fragment_cache import enable_fragment_cache
+    fragments = enable_fragment_cache()
+    write_latex(data, image_paths, f, fragments)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+from pathlib import Path
+
+from equation_cache import EquationCache
+from latex_generator import fragment_version
+from toolchain import cache_root
+
+
+class FragmentCache:
+    """fragment key → rendered lines, backed by an sqlite store.
+
+    Provides the get(key) / item assignment interface latex_generator uses
+    for its fragment cache, and counts hits and misses.
+    """
+
+    def __init__(self, root: Path, version: str):
+        self.store = EquationCache(root, version)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def root(self) -> Path:
+        return self.store.root
+
+    def get(self, key: str) -> list[str] | None:
+        raw = self.store.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def __setitem__(self, key: str, lines: list[str]) -> None:
+        self.store.put(key, json.dumps(lines, ensure_ascii=False))
+
+    def flush(self) -> None:
+        """Commit buffered fragments."""
+        self.store.flush()
+
+
+_active: FragmentCache | None = None
+
+
+def enable_fragment_cache(root: Path | None = None) -> FragmentCache:
+    """Open the persistent fragment cache for this process (idempotent).
+
+    Args:
+        root: Cache directory (default: <cache root>/fragments)
+
+    Returns:
+        The active FragmentCache
+    """
+    global _active
+    root = root or cache_root() / "fragments"
+    if _active is None or _active.root != root:
+        if _active is not None:
+            _active.flush()
+        _active = FragmentCache(root, fragment_version())
+        _active.store.prune_stale()
+    return _active
+
+
+def active_fragment_cache() -> FragmentCache | None:
+    """The cache opened by enable_fragment_cache(), if any."""
+    return _active
+
+
+def flush_fragment_cache() -> None:
+    """Commit pending fragments of the active cache, if any."""
+    if _active is not None:
+        _active.flush()
+
+
+atexit.register(flush_fragment_cache)
@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
-"""Generate math exam-style graphs as PNG images.
+"""Generate math exam-style graphs as PNG, PDF, PGF or SVG images.
 
 Produces clean, black-and-white graphs suitable for Korean math exams (수능/모의고사).
 Supports 고1~고3 curriculum: polynomials, trig, exp/log, conics, normal dist, etc.
 
+The output format follows the file suffix: .png (300 dpi raster), .pdf
+(vector, for \\includegraphics), .pgf (vector drawing commands typeset by
+LaTeX itself, for \\input; text uses the document's fonts) or .svg (for the
+HTML preview; text is left to the browser's fonts).
+
+Importing this module loads matplotlib/numpy, so callers import it lazily,
+only when an exam actually has a matplotlib-rendered graph. The exam style
+(fonts, minus sign, math font) is applied per figure, not to the global
+rcParams.
+
 Usage:
     from graph_generator import generate_graph
     png_path = generate_graph(graph_spec, output_path)
+    pdf_path = generate_graph(graph_spec, "graph_1.pdf")
 """
 
-import platform
 from pathlib import Path
 
 import matplotlib as mpl
@@ -18,18 +28,33 @@ import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
 
+from toolchain import toolchain
+
 # ---------------------------------------------------------------------------
 # Font configuration
 # ---------------------------------------------------------------------------
-if platform.system() == "Darwin":
-    mpl.rcParams["font.family"] = "AppleGothic"
-elif platform.system() == "Windows":
-    mpl.rcParams["font.family"] = "Malgun Gothic"
-else:
-    mpl.rcParams["font.family"] = "NanumGothic"
+_registered_fonts: set[str] = set()
+
 
-mpl.rcParams["axes.unicode_minus"] = False
-mpl.rcParams["mathtext.fontset"] = "cm"  # Computer Modern for math
+def _exam_rc() -> dict:
+    """Exam style, applied around each figure in generate_graph().
+
+    Uses the Korean font from the cached toolchain probe; its file is
+    registered with matplotlib directly, so a stale matplotlib font cache
+    does not fall back to a font without Hangul glyphs.
+    """
+    tc = toolchain()
+    if tc.korean_font_file and tc.korean_font_file not in _registered_fonts:
+        _registered_fonts.add(tc.korean_font_file)
+        try:
+            fm.fontManager.addfont(tc.korean_font_file)
+        except (OSError, RuntimeError, ValueError):
+            pass
+    return {
+        "font.family": tc.korean_font,
+        "axes.unicode_minus": False,
+        "mathtext.fontset": "cm",  # Computer Modern for math
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -1096,10 +1121,13 @@ def _plot_integral_area(ax, spec):
                 ha="right", va="top", fontsize=10)
 
 
+def _normal_pdf(x, mu, sigma):
+    """Normal density (no scipy needed for a closed-form formula)."""
+    return np.exp(-0.5 * ((x - mu) / sigma) ** 2) / (sigma * np.sqrt(2 * np.pi))
+
+
 def _plot_normal(ax, spec):
     """Plot normal distribution bell curve."""
-    from scipy.stats import norm
-
     mu = spec.get("mu", 0)
     sigma = spec.get("sigma", 1)
     shade_from = spec.get("shade_from", None)
@@ -1107,7 +1135,7 @@ def _plot_normal(ax, spec):
     label = spec.get("label", "")
 
     x = np.linspace(mu - 4 * sigma, mu + 4 * sigma, 1000)
-    y = norm.pdf(x, mu, sigma)
+    y = _normal_pdf(x, mu, sigma)
 
     ax.plot(x, y, "k-", linewidth=1.5)
 
@@ -1128,11 +1156,11 @@ def _plot_normal(ax, spec):
     # Shaded region
     if shade_from is not None and shade_to is not None:
         x_fill = np.linspace(shade_from, shade_to, 300)
-        ax.fill_between(x_fill, norm.pdf(x_fill, mu, sigma),
+        ax.fill_between(x_fill, _normal_pdf(x_fill, mu, sigma),
                          alpha=0.3, color="gray")
 
     if label:
-        peak = norm.pdf(mu, mu, sigma)
+        peak = _normal_pdf(mu, mu, sigma)
         ax.text(mu, peak + 0.02, f"${label}$", ha="center", fontsize=10)
 
 
@@ -1277,16 +1305,41 @@ GRAPH_TYPES = {
 }
 
 
-def generate_graph(spec: dict, output_path: str | Path) -> Path:
-    """Generate a graph PNG from specification.
+GRAPH_FORMATS = ("png", "pdf", "pgf", "svg")
+
+
+def _format_rc(fmt: str) -> dict:
+    """Per-format savefig settings; vector formats keep text as text."""
+    if fmt == "pdf":
+        return {"pdf.fonttype": 42}  # embed TrueType, not Type 3 glyphs
+    if fmt == "pgf":
+        # Text is typeset by the exam document; matplotlib still measures
+        # it with xelatex, so give that run the same Hangul font
+        return {
+            "pgf.rcfonts": False,
+            "pgf.texsystem": "xelatex",
+            "pgf.preamble": "\\usepackage{kotex}\n"
+                            f"\\setmainhangulfont{{{toolchain().korean_font}}}",
+        }
+    if fmt == "svg":
+        # Text as <text> elements; fixed id salt so identical specs give
+        # identical files
+        return {"svg.fonttype": "none", "svg.hashsalt": "math-exam"}
+    return {}
+
+
+def generate_graph(spec: dict, output_path: str | Path, fmt: str | None = None) -> Path:
+    """Generate a graph image from specification.
 
     Args:
         spec: Graph specification dict with "type" key and type-specific params.
               Common keys: xlim, ylim, label, points
-        output_path: Where to save the PNG.
+        output_path: Where to save the image.
+        fmt: "png", "pdf", "pgf" or "svg" (default: from the output_path suffix,
+             falling back to png).
 
     Returns:
-        Path to the generated PNG file.
+        Path to the generated image file.
     """
     output_path = Path(output_path)
     graph_type = spec.get("type", "custom")
@@ -1294,6 +1347,11 @@ def generate_graph(spec: dict, output_path: str | Path) -> Path:
     if graph_type not in GRAPH_TYPES:
         raise ValueError(f"Unknown graph type: {graph_type}. "
                          f"Available: {list(GRAPH_TYPES.keys())}")
+    if fmt is None:
+        suffix = output_path.suffix.lstrip(".").lower()
+        fmt = suffix if suffix in GRAPH_FORMATS else "png"
+    if fmt not in GRAPH_FORMATS:
+        raise ValueError(f"Unknown graph format: {fmt}. Available: {list(GRAPH_FORMATS)}")
 
     _default_sizes = {
         "number_line": (3.5, 0.6),
@@ -1301,11 +1359,12 @@ def generate_graph(spec: dict, output_path: str | Path) -> Path:
     }
     figsize = spec.get("figsize", _default_sizes.get(graph_type, (2.8, 2.8)))
 
-    fig, ax = _new_fig(figsize=figsize, dpi=300)
-    GRAPH_TYPES[graph_type](ax, spec)
+    with mpl.rc_context({**_exam_rc(), **_format_rc(fmt)}):
+        fig, ax = _new_fig(figsize=figsize, dpi=300)
+        GRAPH_TYPES[graph_type](ax, spec)
 
-    fig.savefig(str(output_path), dpi=300, bbox_inches="tight",
-                pad_inches=0.05, facecolor="white", transparent=False)
+        fig.savefig(str(output_path), format=fmt, dpi=300, bbox_inches="tight",
+                    pad_inches=0.05, facecolor="white", transparent=False)
     plt.close(fig)
     return output_path
 
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Bulk Hancom → LaTeX conversion of JSONL or plain-line corpora.
+
+Reads records from a file or stdin, converts them in chunks across a
+process pool and writes the results in input order. At most a few chunks
+per worker are in flight, so memory use does not grow with the corpus.
+A record that fails is reported on stderr and in the output, and the run
+continues; the exit code is 1 if any record failed.
+
+Formats:
+    jsonl   one JSON object per line; the script is read from --field
+            (default "equation") and the LaTeX stored in --output-field
+            (default "latex"), or "error" on failure. A bare JSON string
+            record is answered with a JSON string.
+    lines   one Hancom script per line → one LaTeX line (empty on failure)
+    auto    jsonl if the first non-blank line starts with '{' or '"'
+
+Usage:
+    python3 hancom_convert.py corpus.jsonl -o converted.jsonl
+    cat scripts.txt | python3 hancom_convert.py --format lines > latex.txt
+    python3 hancom_convert.py corpus.jsonl --jobs 8 --chunk-size 2000 --equation-cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, TextIO
+
+from hancom_to_latex import hancom_to_latex
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Chunks submitted ahead of the one being written, per worker
+_WINDOW_PER_JOB = 2
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Worker side
+# ═══════════════════════════════════════════════════════════════════════
+
+# Commits the persistent cache after each chunk (pool workers exit without
+# running atexit handlers)
+_flush_cache = None
+
+
+def _init_worker(equation_cache: bool) -> None:
+    global _flush_cache
+    if equation_cache:
+        from equation_cache import enable_equation_cache, flush_equation_cache
+        enable_equation_cache()
+        _flush_cache = flush_equation_cache
+
+
+def _convert_record(line: str, fmt: str, field: str, out_field: str) -> tuple[str, str | None]:
+    """Convert one input line; return (output line, error message or None)."""
+    if fmt == "lines":
+        try:
+            return hancom_to_latex(line).replace("\n", " "), None
+        except Exception as e:  # noqa: BLE001 — reported per record
+            return "", f"{type(e).__name__}: {e}"
+
+    if not line.strip():
+        return "", None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return json.dumps({"error": f"invalid JSON: {e}"}, ensure_ascii=False), \
+            f"invalid JSON: {e}"
+    if isinstance(record, str):
+        script, record = record, None
+    elif isinstance(record, dict):
+        script = record.get(field)
+    else:
+        script = None
+    try:
+        if not isinstance(script, str):
+            raise ValueError(f"no string field '{field}'")
+        latex = hancom_to_latex(script)
+    except Exception as e:  # noqa: BLE001 — reported per record
+        error = f"{type(e).__name__}: {e}"
+        out = dict(record) if isinstance(record, dict) else {}
+        out["error"] = error
+        return json.dumps(out, ensure_ascii=False), error
+    if record is None:
+        return json.dumps(latex, ensure_ascii=False), None
+    record[out_field] = latex
+    return json.dumps(record, ensure_ascii=False), None
+
+
+def _convert_chunk(
+    start: int, lines: list[str], fmt: str, field: str, out_field: str,
+) -> tuple[list[str], list[tuple[int, str]]]:
+    """Convert a chunk of input lines.
+
+    Args:
+        start: 1-based line number of lines[0]
+        lines: Input lines without their newline
+        fmt: "jsonl" or "lines"
+        field: JSONL field holding the Hancom script
+        out_field: JSONL field receiving the LaTeX
+
+    Returns:
+        (output lines, [(line number, error message), ...])
+    """
+    out: list[str] = []
+    errors: list[tuple[int, str]] = []
+    for lineno, line in enumerate(lines, start):
+        result, error = _convert_record(line, fmt, field, out_field)
+        out.append(result)
+        if error is not None:
+            errors.append((lineno, error))
+    if _flush_cache is not None:
+        _flush_cache()
+    return out, errors
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Streaming pipeline
+# ═══════════════════════════════════════════════════════════════════════
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[tuple[int, list[str]]]:
+    """Group input lines (newlines stripped) into (first line number, chunk)."""
+    it = (line.rstrip("\r\n") for line in lines)
+    start = 1
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def convert_stream(
+    lines: Iterable[str],
+    fmt: str = "jsonl",
+    field: str = "equation",
+    out_field: str = "latex",
+    jobs: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    equation_cache: bool = False,
+) -> Iterator[tuple[list[str], list[tuple[int, str]]]]:
+    """Convert a stream of input lines, yielding chunk results in input order.
+
+    Args:
+        lines: Input lines (a file object works)
+        fmt: "jsonl" or "lines"
+        field: JSONL field holding the Hancom script
+        out_field: JSONL field receiving the LaTeX
+        jobs: Worker processes; 1 converts in this process
+        chunk_size: Records per task sent to a worker
+        equation_cache: If True, use the persistent equation cache
+
+    Yields:
+        (output lines, [(line number, error message), ...]) per chunk
+    """
+    chunks = _chunks(lines, chunk_size)
+    if jobs <= 1:
+        _init_worker(equation_cache)
+        for start, chunk in chunks:
+            yield _convert_chunk(start, chunk, fmt, field, out_field)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(equation_cache,)) as pool:
+        # Bounded look-ahead: results are written strictly in order and the
+        # reader never runs more than a few chunks ahead of the writer
+        pending: deque[Future] = deque()
+        for start, chunk in chunks:
+            pending.append(pool.submit(_convert_chunk, start, chunk, fmt, field, out_field))
+            if len(pending) >= jobs * _WINDOW_PER_JOB:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _detect_format(lines: Iterator[str]) -> tuple[str, Iterator[str]]:
+    """Peek at the first non-blank line; return (format, the full stream)."""
+    head: list[str] = []
+    fmt = "lines"
+    for line in lines:
+        head.append(line)
+        if line.strip():
+            fmt = "jsonl" if line.lstrip()[0] in '{"' else "lines"
+            break
+    return fmt, itertools.chain(head, lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert Hancom equation scripts in bulk (JSONL or plain lines)"
+    )
+    parser.add_argument("input", nargs="?", default="-",
+                        help="Input file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=("auto", "jsonl", "lines"), default="auto",
+                        help="Input format (default: auto)")
+    parser.add_argument("--field", default="equation",
+                        help="JSONL field with the Hancom script (default: %(default)s)")
+    parser.add_argument("--output-field", default="latex",
+                        help="JSONL field for the LaTeX result (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Records per worker task (default: %(default)s)")
+    parser.add_argument("--equation-cache", action="store_true",
+                        help="Share conversions through the persistent equation cache")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    jobs = args.jobs or os.cpu_count() or 1
+
+    src: TextIO = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst: TextIO = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    name = "<stdin>" if args.input == "-" else args.input
+    fmt, lines = (args.format, iter(src)) if args.format != "auto" else _detect_format(iter(src))
+
+    records = failed = 0
+    start = time.perf_counter()
+    try:
+        for out, errors in convert_stream(lines, fmt, args.field, args.output_field,
+                                          jobs, args.chunk_size, args.equation_cache):
+            dst.write("\n".join(out))
+            dst.write("\n")
+            records += len(out)
+            failed += len(errors)
+            for lineno, message in errors:
+                print(f"{name}:{lineno}: error: {message}", file=sys.stderr)
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+        if src is not sys.stdin:
+            src.close()
+    elapsed = time.perf_counter() - start
+
+    rate = records / elapsed if elapsed > 0 else 0.0
+    print(f"{records} record(s), {failed} failed, {fmt}, {jobs} worker(s): "
+          f"{elapsed:.2f}s ({rate:,.0f} records/s)", file=sys.stderr)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Fast structural validation of the Hancom scripts in a problems JSON.
+
+The converter is deliberately forgiving: an unclosed brace or a stray '&'
+still produces LaTeX, and the mistake only shows up as a wrong formula or
+as an xelatex error pointing into the generated .tex. This linter checks
+the scripts before anything is rendered and reports the problem, the JSON
+field and the character offset inside that field.
+
+Checks (one linear pass over the tokens of each script):
+    error    unmatched '}' / unclosed '{'
+    error    'left' without 'right', 'right' without 'left'
+    error    'over' with an empty numerator or denominator
+    error    '#' or '&' outside cases / eqalign / pile / matrix
+    error    sqrt / root / accent / font / environment / SUP / SUB without
+             an argument ('sqrt }' would become \\sqrt{}})
+    warning  unknown keyword that looks like a typo of a known one
+
+Checked fields: problems[i].equation, problems[i].sub_problems[j].equation
+and $...$-wrapped problems[i].choices[k].
+
+Usage:
+    from hancom_lint import lint_problems
+    issues = lint_problems(data)
+
+    python3 hancom_lint.py exams/                 # every *.json in a directory
+    python3 hancom_lint.py a.json 'exams/**/*.json'
+    python3 hancom_lint.py exams/ --strict        # warnings fail too
+"""
+
+from __future__ import annotations
+
+import difflib
+from dataclasses import dataclass
+
+from hancom_to_latex import _DISPATCH, _TOKEN_RE, BRACKET_MAP, MATRIX_ENVS
+from problem_stream import script_fields
+
+# Keywords whose argument group may contain '#' and '&'
+_ENV_KEYWORDS = frozenset(("cases", "eqalign", "pile", *MATRIX_ENVS))
+
+# Every word the converter understands (anything else passes through as
+# italic letters)
+_KNOWN_WORDS = frozenset(
+    tok for tok in (*_DISPATCH, *BRACKET_MAP, "over", "of", "right", "SUB", "SUP")
+    if tok.isalpha()
+)
+
+# Tokens after which 'over' has no numerator
+_NO_NUMERATOR = frozenset(("{", "(", "[", "#", "&", "over"))
+# Tokens before which 'over' has no denominator
+_NO_DENOMINATOR = frozenset(("}", ")", "]", "right", "#", "&", "over"))
+
+# Tokens that read the next primary as their argument: the converter's
+# handlers (sqrt, root, accents, font styles, environments) except the
+# brackets, plus sub/superscripts
+_TAKES_ARGUMENT = frozenset(
+    tok for tok, handler in _DISPATCH.items()
+    if callable(handler) and tok not in ("{", "(", "[", "left")
+) | {"_", "^", "SUB", "SUP"}
+# Tokens that cannot start an argument: the converter would emit them
+# inside the command's braces ('sqrt }' → \sqrt{}})
+_NO_ARGUMENT = frozenset(("}", "#", "&"))
+_CLOSING = {"{": "}", "(": ")", "[": "]"}
+
+
+@dataclass
+class LintIssue:
+    """One finding, located by problem, JSON field and character offset."""
+
+    severity: str          # "error" | "warning"
+    message: str
+    problem: int | str     # problem number as printed on the exam
+    field: str             # e.g. "problems[2].sub_problems[0].equation"
+    offset: int            # character offset inside the field value
+    source: str = ""       # the field value, for excerpts
+
+    def format(self, prefix: str = "") -> str:
+        """Render as ``prefix:field:offset: severity: message`` + excerpt."""
+        head = f"{prefix}:" if prefix else ""
+        line = (f"{head}{self.field}:{self.offset}: {self.severity}: "
+                f"{self.message} (problem {self.problem})")
+        if not self.source:
+            return line
+        start = max(0, self.offset - 30)
+        excerpt = self.source[start:self.offset + 30]
+        return f"{line}\n    {excerpt}\n    {' ' * (self.offset - start)}^"
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Script checks
+# ═══════════════════════════════════════════════════════════════════════
+
+def _primary_end(tokens: list[tuple[str, int]], j: int) -> int:
+    """Index after the group or single token starting at tokens[j]."""
+    closing = _CLOSING.get(tokens[j][0]) if j < len(tokens) else None
+    if closing is None:
+        return j + 1
+    opening, depth = tokens[j][0], 0
+    for k in range(j, len(tokens)):
+        if tokens[k][0] == opening:
+            depth += 1
+        elif tokens[k][0] == closing:
+            depth -= 1
+            if depth == 0:
+                return k + 1
+    return len(tokens)
+
+
+def _argument_positions(tokens: list[tuple[str, int]], i: int) -> list[int]:
+    """Token indexes where the arguments of tokens[i] start.
+
+    root takes two ('root n of x'); every other command one.
+    """
+    if tokens[i][0] != "root":
+        return [i + 1]
+    j = _primary_end(tokens, i + 1)
+    if j < len(tokens) and tokens[j][0] == "of":
+        j += 1
+    return [i + 1, j]
+
+
+def lint_script(script: str) -> list[tuple[str, int, str]]:
+    """Check one Hancom script.
+
+    Args:
+        script: Hancom equation script
+
+    Returns:
+        (severity, character offset, message) tuples in source order
+    """
+    tokens = [(m.group(), m.start()) for m in _TOKEN_RE.finditer(script)]
+    issues: list[tuple[str, int, str]] = []
+    # Open constructs: ("{", offset, opens an environment) / ("left", offset, False)
+    stack: list[tuple[str, int, bool]] = []
+    env_depth = 0
+    prev: str | None = None
+    n = len(tokens)
+    i = 0
+    while i < n:
+        tok, offset = tokens[i]
+        if tok in _TAKES_ARGUMENT:
+            for j in _argument_positions(tokens, i):
+                if j >= n or tokens[j][0] in _NO_ARGUMENT:
+                    issues.append(("error", offset, f"'{tok}' has no argument"))
+                    break
+        if tok == "{":
+            is_env = prev in _ENV_KEYWORDS
+            env_depth += is_env
+            stack.append(("{", offset, is_env))
+        elif tok == "}":
+            while stack and stack[-1][0] == "left":
+                issues.append(("error", stack.pop()[1], "'left' without matching 'right'"))
+            if stack:
+                env_depth -= stack.pop()[2]
+            else:
+                issues.append(("error", offset, "unmatched '}'"))
+        elif tok == "left" or tok == "right":
+            if tok == "left":
+                stack.append(("left", offset, False))
+            elif stack and stack[-1][0] == "left":
+                stack.pop()
+            else:
+                issues.append(("error", offset, "'right' without matching 'left'"))
+            # The delimiter is consumed as-is ('left {' is not a group)
+            if i + 1 < n:
+                i += 1
+            prev = tokens[i][0]
+            i += 1
+            continue
+        elif tok == "#" or tok == "&":
+            if not env_depth:
+                issues.append(("error", offset,
+                               f"'{tok}' outside cases/eqalign/pile/matrix"))
+        elif tok == "over":
+            empty_group = prev == "}" and i >= 2 and tokens[i - 2][0] == "{"
+            if prev is None or prev in _NO_NUMERATOR or empty_group:
+                issues.append(("error", offset, "'over' has an empty numerator"))
+            nxt = tokens[i + 1][0] if i + 1 < n else None
+            if (nxt is None or nxt in _NO_DENOMINATOR
+                    or (nxt == "{" and i + 2 < n and tokens[i + 2][0] == "}")):
+                issues.append(("error", offset, "'over' has an empty denominator"))
+        elif (len(tok) >= 3 and tok.islower() and tok.isalpha()
+              and tok not in _KNOWN_WORDS):
+            # Plain multi-letter products (abc, xy) are common; only flag
+            # words close to a real keyword
+            guess = difflib.get_close_matches(tok, _KNOWN_WORDS, n=1, cutoff=0.75)
+            if guess:
+                issues.append(("warning", offset,
+                               f"unknown keyword '{tok}' (did you mean '{guess[0]}'?)"))
+        prev = tok
+        i += 1
+
+    for kind, offset, _ in stack:
+        message = "unclosed '{'" if kind == "{" else "'left' without matching 'right'"
+        issues.append(("error", offset, message))
+    issues.sort(key=lambda issue: issue[1])
+    return issues
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Problems JSON
+# ═══════════════════════════════════════════════════════════════════════
+
+def lint_problems(data: dict) -> list[LintIssue]:
+    """Check every Hancom script of a problems JSON.
+
+    Args:
+        data: Parsed problems JSON ("problems" may be any iterable,
+            e.g. problem_stream.iter_problems)
+
+    Returns:
+        Issues in problem/field order (empty when everything is clean)
+    """
+    issues: list[LintIssue] = []
+    for number, field, value, shift in script_fields(data):
+        if not isinstance(value, str):
+            issues.append(LintIssue("error", "equation must be a string",
+                                    number, field, 0))
+            continue
+        script = value[shift:len(value) - shift]
+        for severity, offset, message in lint_script(script):
+            issues.append(LintIssue(severity, message, number, field,
+                                    offset + shift, value))
+    return issues
+
+
+def main():
+    import argparse
+    import sys
+    import time
+    from pathlib import Path
+
+    from problem_stream import JSONL_SUFFIXES, collect_problem_files, iter_problems
+
+    parser = argparse.ArgumentParser(
+        description="Check Hancom equation scripts in problems JSON files"
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="JSON/JSONL files, directories (*.json inside) or glob patterns")
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit non-zero on warnings as well as errors")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                        help="Only print the summary line")
+    args = parser.parse_args()
+
+    files: list[Path] = []
+    for spec in args.inputs:
+        path = Path(spec)
+        files += [path] if path.suffix in (".json", *JSONL_SUFFIXES) and path.is_file() \
+            else collect_problem_files(spec)
+
+    counts = {"error": 0, "warning": 0}
+    start = time.perf_counter()
+    for path in files:
+        try:
+            # Problems are read one at a time, so book-sized files lint in
+            # constant memory
+            issues = lint_problems({"problems": iter_problems(path)})
+        except (OSError, ValueError) as e:
+            print(f"{path}: error: {e}", file=sys.stderr)
+            counts["error"] += 1
+            continue
+        for issue in issues:
+            counts[issue.severity] += 1
+            if not args.quiet:
+                print(issue.format(str(path)))
+    elapsed = time.perf_counter() - start
+
+    per_file = elapsed * 1000 / max(1, len(files))
+    print(f"{len(files)} file(s): {counts['error']} error(s), "
+          f"{counts['warning']} warning(s) in {elapsed * 1000:.1f} ms "
+          f"({per_file:.2f} ms/file)", file=sys.stderr)
+    if counts["error"] or (args.strict and counts["warning"]):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
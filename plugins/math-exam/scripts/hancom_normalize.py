@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""Canonical form and structural hash of Hancom equations, and bulk dedup.
+
+Two scripts that parse to the same structure are the same equation, no
+matter how they were typed: whitespace, redundant braces ({1} over {2}
+vs 1 over 2), SUP/SUB vs ^/_ and keyword synonyms (le/leq, +-/pm) all
+disappear in the canonical form. canonical_hancom() parses the script
+(parse_hancom) and prints the tree back as Hancom in one fixed spelling;
+equation_hash() hashes that form, so it is stable across processes and
+runs (unlike hash()). For every script hancom_lint accepts, the
+canonical form renders to exactly the same LaTeX as the original (see
+_self_test).
+
+Some scripts parse a structural token as a plain symbol: the '_' of
+'{_n}C{_r}', the 'SUP' of '~ { SUP }'. Only braces keep such a token a
+symbol, so it is printed braced ('{_} n C {_} r'). A '}' symbol ('{ pile }'
+makes it the environment body) cannot be braced; to_hancom() refuses that
+tree and canonical_hancom() falls back to the script's tokens joined by
+single spaces, which parse the same way.
+
+Usage:
+    from hancom_normalize import canonical_hancom, equation_hash
+    canonical_hancom("{x} SUP {2} + {1} over {2}")   # 'x^2 + 1 over 2'
+
+    python3 hancom_normalize.py canon "{x} SUP {2}" "x^2"
+    python3 hancom_normalize.py dedup problems/ [--min-tokens 3]
+    python3 hancom_normalize.py test           # built-in round-trip cases
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+
+from hancom_to_latex import (
+    _DISPATCH, _TOKEN_RE, ACCENTS, BRACKET_MAP, FONT_STYLES, MATRIX_ENVS,
+    Env, Frac, Group, LeftRight, Node, Op, Root, Script, Sqrt, Symbol, Text,
+    parse_hancom,
+)
+
+# Tokens that change how the following tokens parse; never emitted bare as
+# an argument
+_STRUCTURAL = frozenset(
+    tok for tok, handler in _DISPATCH.items() if not isinstance(handler, str)
+) | {"over", "of", "right", "SUB", "SUP"}
+
+# Tokens that cannot be printed bare as a symbol: unbraced they close a
+# group, attach to a neighbour or start a construct
+_UNPRINTABLE = _STRUCTURAL | {"}", ")", "]", "_", "^"}
+
+_BARE_RE = re.compile(r"[A-Za-z]+|\d+(?:\.\d+)?")
+
+
+class Unprintable(ValueError):
+    """An AST holds a structural token as a symbol (malformed script)."""
+
+
+@lru_cache(maxsize=1)
+def _spellings() -> tuple[dict, dict, dict, dict]:
+    """Canonical Hancom spelling of every symbol, delimiter, environment and
+    command, derived from the parser itself (first table entry wins).
+
+    Returns:
+        (symbol token → canonical token, LaTeX delimiter → token,
+         LaTeX environment → keyword, LaTeX command → keyword)
+    """
+    by_latex: dict[str, str] = {}
+    symbols: dict[str, str] = {}
+    for tok, latex in _DISPATCH.items():
+        if isinstance(latex, str):
+            symbols[tok] = by_latex.setdefault(latex, tok)
+
+    delimiters: dict[str, str] = {}
+    for tok in BRACKET_MAP:
+        node = parse_hancom(f"left {tok} x right )")
+        if type(node) is LeftRight:
+            delimiters.setdefault(node.left, tok)
+
+    environments: dict[str, str] = {}
+    for tok in (*MATRIX_ENVS, "pile", "eqalign", "cases"):
+        node = parse_hancom(f"{tok} {{x}}")
+        if type(node) is Env:
+            environments.setdefault(node.name, tok)
+
+    commands: dict[str, str] = {}
+    for tok in (*FONT_STYLES, *ACCENTS):
+        node = parse_hancom(f"{tok} x")
+        if type(node) is Op:
+            commands.setdefault(node.command, tok)
+    return symbols, delimiters, environments, commands
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Canonical form
+# ═══════════════════════════════════════════════════════════════════════
+
+def _pieces(node: Node, ctx: str, spellings) -> list:
+    """Hancom pieces for *node*: strings and (child, context) pairs.
+
+    ctx is "seq" (an item of an expression), "arg" (an operand: braced
+    unless it is a single plain token) or "base" (of a sub/superscript).
+    """
+    symbols, delimiters, environments, commands = spellings
+    kind = type(node)
+    if kind is Symbol:
+        tok = symbols.get(node.name, node.name)
+        if tok in _UNPRINTABLE or node.name in _UNPRINTABLE:
+            # Braces make '_' of '{_n}C{_r}' or ')' a symbol again; a '}'
+            # would close them
+            if tok == "}":
+                raise Unprintable("'}' parsed as a symbol has no Hancom spelling")
+            return ["{", tok, "}"]
+        if ctx == "seq" or (_BARE_RE.fullmatch(tok) and tok not in _STRUCTURAL):
+            return [tok]
+        return ["{", tok, "}"]
+    if kind is Text:
+        return ['"', node.text, '"']
+    if kind is Group and node.open:
+        return [node.open, *_joined(node.items), node.close]
+    if kind is Script and ctx != "arg":
+        # a_1^2 chains stay unbraced: the parser rebuilds the same nesting
+        return [(node.base, "base"), node.op, (node.arg, "arg")]
+
+    if kind is Group:
+        inner = _joined(node.items)
+    elif kind is Frac:
+        inner = [(node.num, "arg"), " over ", (node.den, "arg")]
+    elif kind is Sqrt:
+        inner = ["sqrt ", (node.arg, "arg")]
+    elif kind is Root:
+        inner = ["root ", (node.index, "arg"), " of ", (node.arg, "arg")]
+    elif kind is Script:
+        inner = [(node.base, "base"), node.op, (node.arg, "arg")]
+    elif kind is LeftRight:
+        inner = ["left ", delimiters.get(node.left, node.left), " ",
+                 (node.body, "seq"), " right ", delimiters.get(node.right, node.right)]
+    elif kind is Env:
+        inner = [environments.get(node.name, node.name), "{", (node.body, "seq"), "}"]
+    elif kind is Op:
+        inner = [commands.get(node.command, node.command), " ", (node.arg, "arg")]
+    else:
+        raise TypeError(f"not a Hancom AST node: {node!r}")
+    # Brace groups are transparent in an expression (flattened), needed
+    # around any compound operand
+    if ctx == "seq":
+        return inner
+    return ["{", *inner, "}"]
+
+
+def _joined(items) -> list:
+    parts: list = []
+    for i, item in enumerate(items):
+        if i:
+            parts.append(" ")
+        parts.append((item, "seq"))
+    return parts
+
+
+def to_hancom(node: Node) -> str:
+    """Print an AST as canonical Hancom script (without recursion).
+
+    Raises:
+        Unprintable: If a structural token ('}', 'SUP', ...) was parsed as a
+            symbol; no spelling reproduces that tree
+    """
+    spellings = _spellings()
+    out: list[str] = []
+    stack: list = [(node, "seq")]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+        else:
+            stack.extend(reversed(_pieces(item[0], item[1], spellings)))
+    return re.sub(r"\s+", " ", "".join(out)).strip()
+
+
+def canonical_hancom(script: str) -> str:
+    """Canonical spelling of a Hancom script (same structure, same LaTeX).
+
+    Unprintable trees fall back to the script's tokens separated by single
+    spaces: still the same LaTeX, but only whitespace is normalized.
+
+    Raises:
+        EquationTooComplex: If the script exceeds the parser limits
+    """
+    tree = parse_hancom(script)
+    try:
+        return to_hancom(tree)
+    except Unprintable:
+        return " ".join(_TOKEN_RE.findall(script))
+
+
+def equation_hash(script: str) -> str:
+    """Stable structural hash of a Hancom script (16 hex digits)."""
+    canonical = canonical_hancom(script)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Bulk dedup
+# ═══════════════════════════════════════════════════════════════════════
+
+def _problem_key(prob: dict, canon=canonical_hancom) -> str:
+    """Hash of what a problem asks: text, equations, choices and graph."""
+    def equation(script) -> str:
+        return canon(script) if isinstance(script, str) else ""
+
+    def choice(c) -> str:
+        if isinstance(c, str) and len(c) > 1 and c.startswith("$") and c.endswith("$"):
+            return "$" + equation(c[1:-1]) + "$"
+        return " ".join(str(c).split())
+
+    content = [
+        " ".join(str(prob.get("text", "")).split()),
+        equation(prob.get("equation", "")),
+        [[" ".join(str(s.get("text", "")).split()), equation(s.get("equation", ""))]
+         for s in prob.get("sub_problems", [])],
+        [choice(c) for c in prob.get("choices", [])],
+        prob.get("graph"),
+    ]
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def dedup(files, min_tokens: int = 3) -> dict:
+    """Index equations and problems of many JSON files in one pass.
+
+    Args:
+        files: Problem JSON / JSONL paths
+        min_tokens: Ignore equations whose canonical form has fewer tokens
+            (single numbers and letters repeat everywhere)
+
+    Returns:
+        {"equations": {hash: {"canonical", "locations": [(file, field, raw)]}},
+         "problems": {hash: [(file, number), ...]}, "errors": [...],
+         "files", "problems_seen", "equations_seen"} — only groups with
+        more than one member are kept
+    """
+    from problem_stream import load_problem_data, script_fields
+
+    # Each distinct script is canonicalized once for both indexes
+    memo: dict[str, str] = {}
+
+    def canon(script: str) -> str:
+        result = memo.get(script)
+        if result is None:
+            result = memo[script] = canonical_hancom(script)
+        return result
+
+    equations: dict[str, dict] = {}
+    problems: dict[str, list] = {}
+    errors: list[str] = []
+    n_files = n_problems = n_equations = 0
+    for path in files:
+        try:
+            data = load_problem_data(path)
+        except (OSError, ValueError) as e:
+            errors.append(f"{path}: {e}")
+            continue
+        n_files += 1
+        for number, field, value, shift in script_fields(data):
+            if not isinstance(value, str):
+                continue
+            script = value[shift:len(value) - shift]
+            try:
+                canonical = canon(script)
+            except ValueError as e:
+                errors.append(f"{path}:{field}: {e}")
+                continue
+            n_equations += 1
+            if len(_TOKEN_RE.findall(canonical)) < min_tokens:
+                continue
+            key = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+            entry = equations.setdefault(key, {"canonical": canonical, "locations": []})
+            entry["locations"].append((str(path), field, script))
+        for i, prob in enumerate(data.get("problems", [])):
+            n_problems += 1
+            try:
+                key = _problem_key(prob, canon)
+            except ValueError as e:
+                errors.append(f"{path}:problems[{i}]: {e}")
+                continue
+            problems.setdefault(key, []).append((str(path), prob.get("number", i + 1)))
+
+    return {
+        "equations": {k: v for k, v in equations.items() if len(v["locations"]) > 1},
+        "problems": {k: v for k, v in problems.items() if len(v) > 1},
+        "errors": errors,
+        "files": n_files,
+        "problems_seen": n_problems,
+        "equations_seen": n_equations,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Self-test
+# ═══════════════════════════════════════════════════════════════════════
+
+def _self_test() -> bool:
+    """Check canonical spellings and that canonical forms render the same."""
+    from hancom_to_latex import hancom_to_latex
+
+    # (script, expected canonical form)
+    spellings = [
+        ("{x} SUP {2} + {1} over {2}", "x^2 + 1 over 2"),
+        ("x SUP 2", "x^2"),
+        ("a SUB 1 SUP 2", "a_1^2"),
+        ("x le y", "x le y"),
+        ("x leq y", "x le y"),
+        ("+- 3", "pm 3"),
+        ("sqrt {x+1}", "sqrt {x + 1}"),
+        ("root 3 of x", "root 3 of x"),
+        ("left ( x right )", "left ( x right )"),
+        ("pile {a # b}", "pile{a # b}"),
+        # Structural tokens parsed as symbols stay braced
+        ("{_n}C{_r}", "{_} n C {_} r"),
+        ("~ { SUP }", "~ {SUP}"),
+        ("{  ) }   sin", "{)} sin"),
+        # ... except '}', which falls back to the tokens
+        ("{ pile }", "{ pile }"),
+    ]
+    # Canonical form must render exactly like the original
+    renders = [script for script, _ in spellings] + [
+        "{ times ) }",
+        "SUP { SUB le } leq sin",
+        "+- { _ int }",
+        "bold of { ] of int } alpha",
+        "{ ) hat y } ] pile lbrace 1.5",
+        "lbrace sum lim { _ ` sqrt ( }",
+        "f'(x) = lim _{h -> 0} {f(x+h) - f(x)} over h",
+        "cases {x & x >= 0 # -x & x < 0}",
+        "int _{0} ^{2} (3x^2 + 2x) dx",
+        "bmatrix {1 & 2 # 3 & 4}",
+        "hat {a} + vec b + rm {AB}",
+    ]
+
+    passed = failed = 0
+    for script, expected in spellings:
+        got = canonical_hancom(script)
+        if got == expected:
+            passed += 1
+        else:
+            failed += 1
+            print(f"  FAIL canon: {script!r}\n    expected: {expected!r}\n    got:      {got!r}")
+    for script in renders:
+        canonical = canonical_hancom(script)
+        if hancom_to_latex(canonical) == hancom_to_latex(script):
+            passed += 1
+        else:
+            failed += 1
+            print(f"  FAIL render: {script!r} → {canonical!r}")
+    if equation_hash("{x} SUP {2}") == equation_hash("x^2"):
+        passed += 1
+    else:
+        failed += 1
+        print("  FAIL hash: {x} SUP {2} vs x^2")
+
+    print(f"\nSelf-test: {passed}/{passed + failed} passed", end="")
+    print(f" ({failed} FAILED)" if failed else " — all OK!")
+    return failed == 0
+
+
+def main():
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(
+        description="Canonical Hancom equations and duplicate detection"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_canon = sub.add_parser("canon", help="Print canonical form and hash of scripts")
+    p_canon.add_argument("scripts", nargs="+", help="Hancom equation scripts")
+    p_dedup = sub.add_parser("dedup", help="Report duplicate equations and problems")
+    p_dedup.add_argument("inputs", nargs="+",
+                         help="Directories (*.json inside), glob patterns or manifests")
+    p_dedup.add_argument("--min-tokens", type=int, default=3,
+                         help="Skip equations shorter than this many tokens "
+                              "(default: %(default)s)")
+    p_dedup.add_argument("--json", action="store_true",
+                         help="Print the report as JSON")
+    sub.add_parser("test", help="Run the built-in self-test")
+    args = parser.parse_args()
+
+    if args.command == "test":
+        raise SystemExit(0 if _self_test() else 1)
+    if args.command == "canon":
+        for script in args.scripts:
+            print(f"{equation_hash(script)}  {canonical_hancom(script)}")
+        return
+
+    from problem_stream import collect_problem_files
+
+    files = []
+    for spec in args.inputs:
+        files += collect_problem_files(spec)
+    start = time.perf_counter()
+    report = dedup(files, args.min_tokens)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=1))
+    else:
+        print(f"Duplicate equations: {len(report['equations'])} group(s)")
+        for key, entry in sorted(report["equations"].items(),
+                                 key=lambda kv: -len(kv[1]["locations"])):
+            print(f"  {key} ×{len(entry['locations'])}  {entry['canonical']}")
+            for path, field, raw in entry["locations"]:
+                print(f"      {path}:{field}  {raw}")
+        print(f"Duplicate problems: {len(report['problems'])} group(s)")
+        for key, members in report["problems"].items():
+            print(f"  {key} ×{len(members)}: "
+                  + ", ".join(f"{path} #{number}" for path, number in members))
+    for error in report["errors"]:
+        print(f"error: {error}", file=sys.stderr)
+    print(f"Indexed {report['files']} file(s), {report['problems_seen']} problem(s), "
+          f"{report['equations_seen']} equation(s) in {elapsed * 1000:.1f} ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
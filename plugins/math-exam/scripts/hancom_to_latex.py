@@ -7,8 +7,14 @@ LaTeX strings.
 
 Architecture:
     1. Tokenizer  – splits raw script into tokens (keywords, braces, operators)
-    2. Parser     – recursive-descent, consumes tokens and emits LaTeX directly
-    3. Mappings   – lookup tables for Greek letters, operators, accents, etc.
+    2. Parser     – recursive-descent, consumes tokens and emits LaTeX directly;
+                    an explicit-stack variant (_IterativeParser) builds a typed
+                    AST instead (parse_hancom), rendered by to_latex() to the
+                    same output in linear time without touching the recursion
+                    limit
+    3. Mappings   – lookup tables for Greek letters, operators, accents, etc.,
+                    merged at import time into one token → handler table
+                    (_DISPATCH) so each primary costs a single dict lookup
 
 Key design decision: 'over' (fraction) binds to adjacent atoms only, not the
 entire preceding expression.  So  x = {a} over {b}  →  x = \\frac{a}{b}.
@@ -17,11 +23,24 @@ Usage:
     from hancom_to_latex import hancom_to_latex
     latex = hancom_to_latex("{x+1} over {x-1}")
     # => "\\frac{x+1}{x-1}"
+
+    tree = parse_hancom("sqrt {x+1}")  # Sqrt(Group((Symbol('x'), ...)))
+    to_latex(tree)                     # same string as hancom_to_latex()
+
+    python3 hancom_to_latex.py                 # self-test
+    python3 hancom_to_latex.py --bench [JSON]  # conversion throughput
 """
 
 from __future__ import annotations
 
+import hashlib
 import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -339,127 +358,25 @@ class _Parser:
     # ─── Primary (core element) ───────────────────────────────────
 
     def parse_primary(self) -> str:
-        """Parse a primary element: group, keyword, number, etc."""
+        """Parse a primary element: group, keyword, number, etc.
+
+        One _DISPATCH lookup classifies the token: a string is its LaTeX,
+        a callable handles a construct. Tokens without an entry (letters,
+        numbers, operators) pass through unchanged.
+        """
         tok = self.peek()
         if tok is None:
             return ""
-
-        # ── Braced group ──
-        if tok == "{":
-            return self.parse_group()
-
-        # ── Quoted text → \text{...} ──
-        if tok.startswith('"') and tok.endswith('"'):
-            self.advance()
-            inner = tok[1:-1]
-            return f"\\text{{{inner}}}"
-
-        # ── Parenthesized group (not left/right) ──
-        if tok == "(":
-            self.advance()
-            inner = self._parse_until(")")
-            if self.peek() == ")":
-                self.advance()
-            return f"({inner})"
-
-        # ── Square brackets ──
-        if tok == "[":
-            self.advance()
-            inner = self._parse_until("]")
-            if self.peek() == "]":
-                self.advance()
-            return f"[{inner}]"
-
-        # ── Special spacing ──
-        if tok == "~":
-            self.advance()
-            return r"\;"
-
-        if tok == "`":
-            self.advance()
-            return r"\,"
-
-        # ── Line break / column (should be consumed by environments) ──
-        if tok == "#":
-            self.advance()
-            return r"\\"
-
-        if tok == "&":
-            self.advance()
-            return "&"
-
-        # ── Advance past the token for keyword processing ──
-        self.advance()
-
-        # ── sqrt ──
-        if tok == "sqrt":
-            arg = self.parse_primary()
-            return f"\\sqrt{{{arg}}}"
-
-        # ── root n of {x} → \sqrt[n]{x} ──
-        if tok == "root":
-            n = self.parse_primary()
-            if self.peek() == "of":
-                self.advance()
-            arg = self.parse_primary()
-            return f"\\sqrt[{n}]{{{arg}}}"
-
-        # ── left ... right (auto-sizing brackets) ──
-        if tok == "left":
-            lbracket = self._consume_bracket()
-            inner = self._parse_left_right_body()
-            if self.peek() == "right":
-                self.advance()
-                rbracket = self._consume_bracket()
-            else:
-                rbracket = "."
-            return f"\\left{lbracket} {inner} \\right{rbracket}"
-
-        # ── cases / eqalign / pile ──
-        if tok == "cases":
-            body = self._parse_env_body()
-            return f"\\begin{{cases}} {body} \\end{{cases}}"
-
-        if tok == "eqalign":
-            body = self._parse_env_body()
-            return f"\\begin{{aligned}} {body} \\end{{aligned}}"
-
-        if tok == "pile":
-            body = self._parse_env_body()
-            return f"\\begin{{gathered}} {body} \\end{{gathered}}"
-
-        # ── Matrix environments ──
-        if tok in MATRIX_ENVS:
-            env = MATRIX_ENVS[tok]
-            body = self._parse_env_body()
-            return f"\\begin{{{env}}} {body} \\end{{{env}}}"
-
-        # ── Large operators (int, sum, prod, etc.) ──
-        if tok in LARGE_OPS:
-            return LARGE_OPS[tok]
-
-        # ── Built-in functions ──
-        if tok in BUILTIN_FUNCTIONS:
-            if tok == "Lim":
-                return r"\lim"
-            return f"\\{tok}"
-
-        # ── Accents / decorations ──
-        if tok in ACCENTS:
-            arg = self.parse_primary()
-            return f"{ACCENTS[tok]}{{{arg}}}"
-
-        # ── Font styles (take argument) ──
-        if tok in FONT_STYLES:
-            arg = self.parse_primary()
-            return f"{FONT_STYLES[tok]}{{{arg}}}"
-
-        # ── Simple keyword mapping (Greek, operators, symbols) ──
-        if tok in KEYWORD_MAP:
-            return KEYWORD_MAP[tok]
-
-        # ── Fallthrough: letters, numbers, operators — pass through ──
-        return tok
+        self.pos += 1
+        handler = _DISPATCH.get(tok)
+        if handler is None:
+            # ── Quoted text → \text{...} ──
+            if tok[0] == '"' and tok[-1] == '"':
+                return f"\\text{{{tok[1:-1]}}}"
+            return tok
+        if isinstance(handler, str):
+            return handler
+        return handler(self, tok)
 
     # ─── Helpers ──────────────────────────────────────────────────
 
@@ -529,10 +446,637 @@ class _Parser:
         return self.parse_primary()
 
 
+# ─── parse_primary handlers: (parser, token) → LaTeX, token consumed ──
+
+def _enclosed(closing: str, opening: str, suffix: str) -> Callable[[_Parser, str], str]:
+    """Braced / parenthesized / bracketed group; the closing token is optional."""
+    def handle(p: _Parser, tok: str) -> str:
+        inner = p._parse_until(closing)
+        if p.peek() == closing:
+            p.advance()
+        return f"{opening}{inner}{suffix}"
+    return handle
+
+
+def _sqrt(p: _Parser, tok: str) -> str:
+    arg = p.parse_primary()
+    return f"\\sqrt{{{arg}}}"
+
+
+def _root(p: _Parser, tok: str) -> str:
+    """root n of {x} → \\sqrt[n]{x}"""
+    n = p.parse_primary()
+    if p.peek() == "of":
+        p.advance()
+    arg = p.parse_primary()
+    return f"\\sqrt[{n}]{{{arg}}}"
+
+
+def _left(p: _Parser, tok: str) -> str:
+    """left ... right (auto-sizing brackets)"""
+    lbracket = p._consume_bracket()
+    inner = p._parse_left_right_body()
+    if p.peek() == "right":
+        p.advance()
+        rbracket = p._consume_bracket()
+    else:
+        rbracket = "."
+    return f"\\left{lbracket} {inner} \\right{rbracket}"
+
+
+def _environment(env: str) -> Callable[[_Parser, str], str]:
+    """cases / eqalign / pile / matrices → \\begin{env} ... \\end{env}"""
+    def handle(p: _Parser, tok: str) -> str:
+        body = p._parse_env_body()
+        return f"\\begin{{{env}}} {body} \\end{{{env}}}"
+    return handle
+
+
+def _with_argument(command: str) -> Callable[[_Parser, str], str]:
+    """Accents and font styles: command{next primary}"""
+    def handle(p: _Parser, tok: str) -> str:
+        arg = p.parse_primary()
+        return f"{command}{{{arg}}}"
+    return handle
+
+
+def _build_dispatch(enclosed, environment, with_argument, sqrt, root, left) -> dict:
+    """Token → LaTeX string or handler, from every mapping table.
+
+    Tables are layered from lowest to highest precedence, so a token that
+    appears in several tables resolves as the original if-chain did
+    (structural tokens, then sqrt/root/left/environments, large operators,
+    functions, accents, font styles and finally KEYWORD_MAP). The handler
+    factories are parameters so the recursive and the iterative parser
+    share one layering.
+    """
+    table: dict = {}
+    table.update(KEYWORD_MAP)
+    table.update({tok: with_argument(cmd) for tok, cmd in FONT_STYLES.items()})
+    table.update({tok: with_argument(cmd) for tok, cmd in ACCENTS.items()})
+    table.update({tok: f"\\{tok}" for tok in BUILTIN_FUNCTIONS})
+    table["Lim"] = r"\lim"
+    table.update(LARGE_OPS)
+    table.update({tok: environment(env) for tok, env in MATRIX_ENVS.items()})
+    table.update({
+        "pile": environment("gathered"),
+        "eqalign": environment("aligned"),
+        "cases": environment("cases"),
+        "left": left,
+        "root": root,
+        "sqrt": sqrt,
+        # Structural tokens
+        "{": enclosed("}", "", ""),
+        "(": enclosed(")", "(", ")"),
+        "[": enclosed("]", "[", "]"),
+        "~": r"\;",
+        "`": r"\,",
+        # Line break / column (normally consumed by environments)
+        "#": r"\\",
+        "&": "&",
+    })
+    return table
+
+
+_DISPATCH = _build_dispatch(_enclosed, _environment, _with_argument,
+                            _sqrt, _root, _left)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  AST
+# ═══════════════════════════════════════════════════════════════════════
+#
+# parse_hancom() returns a tree of the node classes below instead of a
+# LaTeX string, so other consumers (validation, normalization, other
+# output formats) can work on the structure; to_latex() renders it exactly
+# as hancom_to_latex() would. Nodes are immutable by convention, compare
+# and hash by value, and pickle compactly.
+
+class Node:
+    """Base class of Hancom equation AST nodes."""
+
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, f) for f in self._fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, f) == getattr(other, f) for f in self._fields
+        )
+
+    def __hash__(self):
+        return hash((type(self).__name__, *(getattr(self, f) for f in self._fields)))
+
+    def __repr__(self):
+        args = ", ".join(repr(getattr(self, f)) for f in self._fields)
+        return f"{type(self).__name__}({args})"
+
+    def _template(self) -> list:
+        """LaTeX pieces: strings and child nodes, in output order."""
+        raise NotImplementedError
+
+
+class Symbol(Node):
+    """A single token: letter, number, operator, keyword (alpha, sin, int, ...)."""
+
+    __slots__ = _fields = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _template(self) -> list:
+        return [_LATEX_SYMBOLS.get(self.name, self.name)]
+
+
+class Text(Node):
+    """Quoted text → \\text{...}"""
+
+    __slots__ = _fields = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def _template(self) -> list:
+        return ["\\text{", self.text, "}"]
+
+
+class Group(Node):
+    """Sequence of nodes joined by spaces: an expression, {…}, (…) or […].
+
+    *open*/*close* are "" for braces and whole expressions. Items are never
+    empty groups, so an empty Group renders as an empty string.
+    """
+
+    __slots__ = _fields = ("items", "open", "close")
+
+    def __init__(self, items: tuple[Node, ...], open: str, close: str):
+        self.items = items
+        self.open = open
+        self.close = close
+
+    def _template(self) -> list:
+        parts: list = [self.open]
+        for i, item in enumerate(self.items):
+            if i:
+                parts.append(" ")
+            parts.append(item)
+        parts.append(self.close)
+        return parts
+
+
+class Frac(Node):
+    """num over den"""
+
+    __slots__ = _fields = ("num", "den")
+
+    def __init__(self, num: Node, den: Node):
+        self.num = num
+        self.den = den
+
+    def _template(self) -> list:
+        return ["\\frac{", self.num, "}{", self.den, "}"]
+
+
+class Sqrt(Node):
+    """sqrt arg"""
+
+    __slots__ = _fields = ("arg",)
+
+    def __init__(self, arg: Node):
+        self.arg = arg
+
+    def _template(self) -> list:
+        return ["\\sqrt{", self.arg, "}"]
+
+
+class Root(Node):
+    """root index of arg"""
+
+    __slots__ = _fields = ("index", "arg")
+
+    def __init__(self, index: Node, arg: Node):
+        self.index = index
+        self.arg = arg
+
+    def _template(self) -> list:
+        return ["\\sqrt[", self.index, "]{", self.arg, "}"]
+
+
+class Script(Node):
+    """base_arg or base^arg (*op* is "_" or "^"; SUB/SUP are normalized)."""
+
+    __slots__ = _fields = ("base", "op", "arg")
+
+    def __init__(self, base: Node, op: str, arg: Node):
+        self.base = base
+        self.op = op
+        self.arg = arg
+
+    def _template(self) -> list:
+        return [self.base, self.op, "{", self.arg, "}"]
+
+
+class LeftRight(Node):
+    """left ( body right ) — delimiters are stored as LaTeX (\\{, \\langle, .)."""
+
+    __slots__ = _fields = ("left", "body", "right")
+
+    def __init__(self, left: str, body: Node, right: str):
+        self.left = left
+        self.body = body
+        self.right = right
+
+    def _template(self) -> list:
+        return ["\\left", self.left, " ", self.body, " \\right", self.right]
+
+
+class Env(Node):
+    """cases / eqalign / pile / matrix body; *name* is the LaTeX environment."""
+
+    __slots__ = _fields = ("name", "body")
+
+    def __init__(self, name: str, body: Node):
+        self.name = name
+        self.body = body
+
+    def _template(self) -> list:
+        return [f"\\begin{{{self.name}}} ", self.body, f" \\end{{{self.name}}}"]
+
+
+class Op(Node):
+    """LaTeX command applied to one argument: accents (hat, vec) and font styles."""
+
+    __slots__ = _fields = ("command", "arg")
+
+    def __init__(self, command: str, arg: Node):
+        self.command = command
+        self.arg = arg
+
+    def _template(self) -> list:
+        return [self.command, "{", self.arg, "}"]
+
+
+_EMPTY = Group((), "", "")
+
+
+def _is_empty(node: Node) -> bool:
+    return type(node) is Group and not node.items and not node.open
+
+
+def _sequence(items: list) -> Node:
+    """Group for *items*; a single item stands for itself (same output)."""
+    if len(items) == 1:
+        return items[0]
+    return Group(tuple(items), "", "") if items else _EMPTY
+
+
+def _items(node: Node) -> tuple:
+    """Items of a sequence node, as _sequence() would have received them."""
+    if _is_empty(node):
+        return ()
+    if type(node) is Group and not node.open:
+        return node.items
+    return (node,)
+
+
+def _emit(node: Node) -> str:
+    """Render *node* to LaTeX (before whitespace cleanup), without recursion."""
+    out: list[str] = []
+    stack: list = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+        elif type(item) is Symbol:
+            out.append(_LATEX_SYMBOLS.get(item.name, item.name))
+        else:
+            stack.extend(reversed(item._template()))
+    return "".join(out)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Iterative parser (explicit stack) → AST
+# ═══════════════════════════════════════════════════════════════════════
+#
+# Same grammar as _Parser, but every rule is a generator that yields the
+# sub-rule it needs ("arg = yield p._primary()") and receives its result.
+# _IterativeParser.parse_tree() drives them from an explicit stack, so
+# nesting depth is bounded by max_depth instead of Python's recursion
+# limit. Rules build AST nodes, and _emit() renders them in one pass, so
+# nested constructs are never re-copied: time and memory stay linear in
+# the input.
+
+_STOP = _BOUNDARIES | {"#", "&"}
+
+# Constant tokens → LaTeX (Symbol rendering)
+_LATEX_SYMBOLS = {tok: latex for tok, latex in _DISPATCH.items() if isinstance(latex, str)}
+
+
+class EquationTooComplex(ValueError):
+    """An equation exceeds the configured length or nesting limit."""
+
+
+def _it_enclosed(closing: str, opening: str, suffix: str):
+    def handle(p: _IterativeParser, tok: str):
+        inner = yield p._until(closing)
+        if p.peek() == closing:
+            p.advance()
+        return Group(_items(inner), opening, suffix) if opening else inner
+    return handle
+
+
+def _it_sqrt(p: _IterativeParser, tok: str):
+    arg = yield p._primary()
+    return Sqrt(arg)
+
+
+def _it_root(p: _IterativeParser, tok: str):
+    n = yield p._primary()
+    if p.peek() == "of":
+        p.advance()
+    arg = yield p._primary()
+    return Root(n, arg)
+
+
+def _it_left(p: _IterativeParser, tok: str):
+    lbracket = p._consume_bracket()
+    inner = yield p._until("right")
+    if p.peek() == "right":
+        p.advance()
+        rbracket = p._consume_bracket()
+    else:
+        rbracket = "."
+    return LeftRight(lbracket, inner, rbracket)
+
+
+def _it_environment(env: str):
+    def handle(p: _IterativeParser, tok: str):
+        body = yield (p._group() if p.peek() == "{" else p._primary())
+        return Env(env, body)
+    return handle
+
+
+def _it_with_argument(command: str):
+    def handle(p: _IterativeParser, tok: str):
+        arg = yield p._primary()
+        return Op(command, arg)
+    return handle
+
+
+_ITER_DISPATCH = _build_dispatch(_it_enclosed, _it_environment, _it_with_argument,
+                                 _it_sqrt, _it_root, _it_left)
+
+_LINE_BREAK = Symbol("#")
+_COLUMN = Symbol("&")
+
+
+class _IterativeParser(_Parser):
+    """Explicit-stack variant of _Parser that builds an AST."""
+
+    def __init__(self, tokens: list[str], max_depth: int):
+        super().__init__(tokens)
+        self.max_depth = max_depth
+
+    def parse(self) -> str:
+        return _emit(self.parse_tree())
+
+    def parse_tree(self) -> Node:
+        stack = [self._expression()]
+        value = None
+        while stack:
+            try:
+                child = stack[-1].send(value)
+            except StopIteration as done:
+                stack.pop()
+                value = done.value
+                continue
+            if len(stack) >= self.max_depth:
+                raise EquationTooComplex(
+                    f"equation nested too deeply (more than {self.max_depth} parser frames)"
+                )
+            stack.append(child)
+            value = None
+        return value
+
+    # ─── Rules (generators; see parse_tree()) ─────────────────────
+
+    def _expression(self):
+        items = []
+        while not self.at_end():
+            if self.peek() in _STOP:
+                break
+            old_pos = self.pos
+            atom = yield self._atom()
+            if self.pos == old_pos:
+                items.append(Symbol(self.advance()))
+                continue
+            if not _is_empty(atom):
+                items.append(atom)
+        return _sequence(items)
+
+    def _atom(self):
+        base = self._leaf()
+        if base is None:
+            base = yield self._primary()
+        result = yield from self._scripts(base)
+        if self.peek() == "over":
+            self.advance()
+            denom = self._leaf()
+            if denom is None:
+                denom = yield self._primary()
+            denom = yield from self._scripts(denom)
+            return Frac(result, denom)
+        return result
+
+    def _scripts(self, base):
+        result = base
+        while self.peek() in ("_", "^", "SUB", "SUP"):
+            tok = self.advance()
+            arg = self._leaf()
+            if arg is None:
+                arg = yield self._primary()
+            result = Script(result, "_" if tok in ("_", "SUB") else "^", arg)
+        return result
+
+    def _leaf(self):
+        """Fast path: consume a primary that needs no sub-rule, else None."""
+        tok = self.peek()
+        if tok is None:
+            return _EMPTY
+        handler = _ITER_DISPATCH.get(tok)
+        if handler is None:
+            self.pos += 1
+            if tok[0] == '"' and tok[-1] == '"':
+                return Text(tok[1:-1])
+            return Symbol(tok)
+        if isinstance(handler, str):
+            self.pos += 1
+            return Symbol(tok)
+        return None
+
+    def _primary(self):
+        leaf = self._leaf()
+        if leaf is not None:
+            return leaf
+        tok = self.advance()
+        return (yield from _ITER_DISPATCH[tok](self, tok))
+
+    def _group(self):
+        self.expect("{")
+        inner = yield self._until("}")
+        if self.peek() == "}":
+            self.advance()
+        return inner
+
+    def _until(self, closing: str):
+        items = []
+        while not self.at_end() and self.peek() != closing:
+            tok = self.peek()
+            if tok == "#":
+                self.advance()
+                items.append(_LINE_BREAK)
+            elif tok == "&":
+                self.advance()
+                items.append(_COLUMN)
+            else:
+                old_pos = self.pos
+                part = yield self._expression()
+                if self.pos == old_pos:
+                    items.append(Symbol(self.advance()))
+                    continue
+                if not _is_empty(part):
+                    items.append(part)
+        return _sequence(items)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 #  Public API
 # ═══════════════════════════════════════════════════════════════════════
 
+# Conversion counters (read by build_math_pdf.py --trace)
+_STATS = {"calls": 0, "hits": 0, "disk_hits": 0, "converted": 0, "seconds": 0.0}
+
+# Exam banks repeat the same fragments ($-1$, {1} over {2}, ...) constantly,
+# so results are kept in a bounded LRU, optionally backed by a disk cache
+# (see equation_cache.py) that survives across runs.
+DEFAULT_CACHE_SIZE = 4096
+_cache: OrderedDict[str, str] = OrderedDict()
+_cache_size = DEFAULT_CACHE_SIZE
+_cache_lock = threading.Lock()
+_disk_cache = None
+
+
+def conversion_stats() -> dict:
+    """Return a snapshot of the conversion counters.
+
+    Returns:
+        {"calls", "hits" (in-memory LRU), "disk_hits", "converted"
+        (actually parsed), "seconds" (total time in hancom_to_latex)}
+    """
+    return dict(_STATS)
+
+
+def configure_cache(maxsize: int | None = None, disk=None) -> None:
+    """Resize the in-process LRU and/or attach a persistent second tier.
+
+    Args:
+        maxsize: Maximum number of cached conversions (0 disables the LRU)
+        disk: Object with ``get(script) -> str | None`` and
+            ``put(script, latex)``, e.g. equation_cache.EquationCache;
+            None leaves the current disk tier in place
+    """
+    global _cache_size, _disk_cache
+    with _cache_lock:
+        if maxsize is not None:
+            _cache_size = max(0, maxsize)
+            while len(_cache) > _cache_size:
+                _cache.popitem(last=False)
+        if disk is not None:
+            _disk_cache = disk
+
+
+def clear_cache() -> None:
+    """Drop every in-process cached conversion and parse tree (the disk
+    tier is kept)."""
+    with _cache_lock:
+        _cache.clear()
+    _parse_tree.cache_clear()
+
+
+def converter_version() -> str:
+    """Hash of this module's source; changes whenever the mappings change."""
+    source = Path(__file__).read_bytes()
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+# Parser selection and limits (configure_parser). "recursive" is the
+# faster default and switches to the iterative parser if Python's recursion
+# limit is hit; "iterative" always uses the explicit-stack parser.
+PARSER_MODES = ("recursive", "iterative")
+DEFAULT_MAX_LENGTH = 20_000   # characters per equation
+DEFAULT_MAX_DEPTH = 5_000     # iterative parser frames (~4 per nesting level)
+_parser_mode = "recursive"
+_max_length = DEFAULT_MAX_LENGTH
+_max_depth = DEFAULT_MAX_DEPTH
+
+
+def configure_parser(
+    mode: str | None = None,
+    max_length: int | None = None,
+    max_depth: int | None = None,
+) -> None:
+    """Select the parser and its limits for subsequent conversions.
+
+    Changing a limit clears the in-process caches, so scripts converted
+    under the old limits are checked again. The length limit is checked
+    before any cache lookup; the disk tier (configure_cache) may still
+    return a result for a script that is now too deep, since a stored
+    result costs no parsing.
+
+    Args:
+        mode: "recursive" (default) or "iterative"
+        max_length: Longest accepted equation, in characters
+        max_depth: Deepest accepted nesting, in iterative parser frames
+
+    Raises:
+        ValueError: If *mode* is unknown
+    """
+    global _parser_mode, _max_length, _max_depth
+    if mode is not None:
+        if mode not in PARSER_MODES:
+            raise ValueError(f"Unknown parser mode: {mode}. Available: {PARSER_MODES}")
+        _parser_mode = mode
+    limits = (_max_length, _max_depth)
+    if max_length is not None:
+        _max_length = max_length
+    if max_depth is not None:
+        _max_depth = max_depth
+    if (_max_length, _max_depth) != limits:
+        clear_cache()
+
+
+def _check_length(script: str) -> None:
+    if len(script) > _max_length:
+        raise EquationTooComplex(
+            f"equation too long ({len(script)} characters, limit {_max_length})"
+        )
+
+
+def _convert_script(script: str) -> str:
+    tokens = _tokenize(script)
+    if _parser_mode == "iterative":
+        result = _IterativeParser(tokens, _max_depth).parse()
+    else:
+        try:
+            result = _Parser(tokens).parse()
+        except RecursionError:
+            result = _IterativeParser(tokens, _max_depth).parse()
+    # Clean up extra spaces
+    return re.sub(r"\s+", " ", result).strip()
+
+
 def hancom_to_latex(script: str) -> str:
     """Convert a Hancom equation script string to LaTeX.
 
@@ -541,23 +1085,83 @@ def hancom_to_latex(script: str) -> str:
 
     Returns:
         LaTeX string (e.g. "\\frac{x+1}{x-1}")
+
+    Raises:
+        EquationTooComplex: If the script exceeds the length or nesting
+            limit (see configure_parser)
     """
     if not script or not script.strip():
         return ""
-    tokens = _tokenize(script.strip())
-    parser = _Parser(tokens)
-    result = parser.parse()
-    # Clean up extra spaces
-    result = re.sub(r"\s+", " ", result).strip()
+    start = time.perf_counter()
+    script = script.strip()
+    _STATS["calls"] += 1
+    _check_length(script)
+    with _cache_lock:
+        result = _cache.get(script)
+        if result is not None:
+            _cache.move_to_end(script)
+    if result is not None:
+        _STATS["hits"] += 1
+    else:
+        if _disk_cache is not None:
+            result = _disk_cache.get(script)
+        if result is not None:
+            _STATS["disk_hits"] += 1
+        else:
+            result = _convert_script(script)
+            _STATS["converted"] += 1
+            if _disk_cache is not None:
+                _disk_cache.put(script, result)
+        if _cache_size:
+            with _cache_lock:
+                _cache[script] = result
+                if len(_cache) > _cache_size:
+                    _cache.popitem(last=False)
+    _STATS["seconds"] += time.perf_counter() - start
     return result
 
 
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def _parse_tree(script: str) -> Node:
+    return _IterativeParser(_tokenize(script), _max_depth).parse_tree()
+
+
+def parse_hancom(script: str) -> Node:
+    """Parse a Hancom equation script into an AST.
+
+    Results are cached (bounded LRU), so the returned tree is shared and
+    must not be modified. Trees pickle compactly, so a batch worker can
+    parse once and hand the tree to several renderers.
+
+    Args:
+        script: Hancom equation script (e.g. "{x+1} over {x-1}")
+
+    Returns:
+        Root node: a Group for a sequence of atoms, the atom itself for a
+        single one (an empty Group for an empty script)
+
+    Raises:
+        EquationTooComplex: If the script exceeds the length or nesting
+            limit (see configure_parser)
+    """
+    if not script or not script.strip():
+        return _EMPTY
+    script = script.strip()
+    _check_length(script)
+    return _parse_tree(script)
+
+
+def to_latex(node: Node) -> str:
+    """Render an AST to LaTeX, exactly as hancom_to_latex() would."""
+    return re.sub(r"\s+", " ", _emit(node)).strip()
+
+
 def convert_choice(choice: str) -> str:
     """Convert a choice string, handling $...$ wrapping.
 
     If the choice is wrapped in $...$, the inner content is converted
-    from Hancom script to LaTeX and re-wrapped.
-    Plain text choices are returned as-is.
+    from Hancom script to LaTeX and re-wrapped (through the same cache as
+    hancom_to_latex). Plain text choices are returned as-is.
     """
     if choice.startswith("$") and choice.endswith("$") and len(choice) > 1:
         inner = choice[1:-1]
@@ -760,6 +1364,43 @@ def _self_test():
             print(f"    expected: {norm_expected!r}")
             print(f"    got:      {norm_result!r}")
 
+    # Parser limits: deep nesting, EquationTooComplex, and limits lowered
+    # after a script was cached
+    deep = "{" * 1000 + "x" + "}" * 1000  # beyond Python's recursion limit
+    saved = (_parser_mode, _max_length, _max_depth)
+    limit_tests = [
+        ("deep nesting (iterative)", dict(mode="iterative"), deep, "x"),
+        ("deep nesting (recursive fallback)", dict(mode="recursive"), deep, "x"),
+        ("length limit", dict(max_length=10), "a + b + c + d", EquationTooComplex),
+        ("depth limit", dict(mode="iterative", max_depth=50),
+         "{" * 100 + "x" + "}" * 100, EquationTooComplex),
+        ("lowered limit after caching", dict(max_length=4), "x + 1 = 2", EquationTooComplex),
+    ]
+    hancom_to_latex("x + 1 = 2")  # cached under the default limits
+    parse_hancom("x + 1 = 2")
+    for name, config, inp, expected in limit_tests:
+        configure_parser(**config)
+        try:
+            try:
+                result = hancom_to_latex(inp)
+            except EquationTooComplex as e:
+                result = e
+            ok = (isinstance(result, expected) if isinstance(expected, type)
+                  else result == expected)
+            if expected is EquationTooComplex and ok:
+                try:
+                    parse_hancom(inp)
+                    ok = False
+                except EquationTooComplex:
+                    pass
+        finally:
+            configure_parser(*saved)
+        if ok:
+            passed += 1
+        else:
+            failed += 1
+            print(f"  FAIL limits: {name}: got {result!r}")
+
     total = passed + failed
     print(f"\nSelf-test: {passed}/{total} passed", end="")
     if failed:
@@ -769,5 +1410,78 @@ def _self_test():
     return failed == 0
 
 
+# ═══════════════════════════════════════════════════════════════════════
+#  Benchmark
+# ═══════════════════════════════════════════════════════════════════════
+
+_INLINE_RE = re.compile(r"\$([^$]+)\$")
+
+
+def _bench_corpus(paths: list[Path]) -> list[str]:
+    """Collect equation scripts ("equation" fields and $...$ spans) from JSONs."""
+    import json
+
+    scripts: list[str] = []
+
+    def _walk(node, key=None):
+        if isinstance(node, dict):
+            for k, v in node.items():
+                _walk(v, k)
+        elif isinstance(node, list):
+            for v in node:
+                _walk(v, key)
+        elif isinstance(node, str):
+            if key == "equation":
+                scripts.append(node)
+            else:
+                scripts.extend(_INLINE_RE.findall(node))
+
+    for path in paths:
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for f in files:
+            _walk(json.loads(f.read_text(encoding="utf-8")))
+    return [s.strip() for s in scripts if s.strip()]
+
+
+def _benchmark(paths: list[Path], repeat: int, rounds: int = 5) -> None:
+    """Print uncached conversion throughput over a corpus of problem JSONs.
+
+    The LRU is bypassed so every conversion tokenizes and parses; the best
+    of *rounds* timings is reported.
+    """
+    corpus = _bench_corpus(paths) * repeat
+    if not corpus:
+        raise SystemExit("No equations found in the benchmark corpus")
+    tokens = sum(len(_tokenize(s)) for s in corpus)
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for script in corpus:
+            _convert_script(script)
+        best = min(best, time.perf_counter() - start)
+    print(f"{len(corpus)} conversions, {tokens} tokens: {best * 1000:.1f} ms "
+          f"({len(corpus) / best:,.0f} conversions/s, {tokens / best:,.0f} tokens/s)")
+
+
 if __name__ == "__main__":
-    _self_test()
+    import argparse
+
+    _parser = argparse.ArgumentParser(
+        description="Run the converter self-test, or benchmark it with --bench"
+    )
+    _parser.add_argument(
+        "--bench", nargs="*", type=Path, metavar="JSON",
+        help="Measure conversion throughput over problem JSON files or "
+             "directories (default: ../examples)",
+    )
+    _parser.add_argument("--repeat", type=int, default=200,
+                         help="Benchmark: corpus repetitions (default: %(default)s)")
+    _parser.add_argument("--parser", choices=PARSER_MODES, default="recursive",
+                         help="Parser used by the self-test / benchmark")
+    _args = _parser.parse_args()
+    configure_parser(mode=_args.parser)
+    if _args.bench is None:
+        _self_test()
+    else:
+        _benchmark(_args.bench or [Path(__file__).resolve().parent.parent / "examples"],
+                   _args.repeat)
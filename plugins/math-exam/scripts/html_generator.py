@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Generate HTML previews from problem JSON data.
+
+The HTML counterpart of latex_generator.py: the same JSON, the same two
+layouts, but no TeX. Equations go through hancom_to_latex and are typeset
+in the browser by KaTeX from a local bundle (no network access needed);
+the exam and worksheet layouts are reproduced with CSS columns. Generating
+a page takes milliseconds, so it is meant for authoring previews and web
+UIs, with the PDF build kept for publishing.
+
+Two formats are supported:
+- exam (학력평가/수능): header, two columns with a rule, horizontal choices
+- worksheet: title/info header, two columns, vertical choices
+
+Usage:
+    from html_generator import generate_html, write_html
+    html_source = generate_html(data, image_urls, katex_href="preview_files/katex")
+    with open("preview.html", "w", encoding="utf-8") as f:
+        write_html(data, image_urls, f, katex_href="preview_files/katex")
+"""
+
+from __future__ import annotations
+
+import html
+from pathlib import Path
+from typing import Iterator, TextIO
+from urllib.parse import quote
+
+from hancom_to_latex import hancom_to_latex
+from latex_generator import CHOICE_LABELS
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Page template
+# ═══════════════════════════════════════════════════════════════════════
+
+_STYLE = """
+body { font-family: "Nanum Myeongjo", "NanumMyeongjo", "Batang", serif;
+       max-width: 210mm; margin: 0 auto; padding: 15mm 12mm;
+       line-height: 1.6; color: #000; background: #fff; }
+.title { text-align: center; font-weight: bold; margin: 0 0 .4em; }
+.worksheet .title { font-size: 1.4em; }
+.subtitle { text-align: center; font-weight: bold; margin: 0 0 .6em; }
+.session { text-align: center; margin: 0 0 .4em; }
+.session strong { font-size: 1.45em; margin-left: 1em; }
+.info { display: flex; justify-content: space-between; margin: 0 0 .6em; }
+.blank { display: inline-block; border-bottom: 1px solid #000; }
+.examrule { border: 0; border-top: 0.8pt solid #000; margin: 0 0 1.5em; }
+.problems { column-count: 2; column-gap: 8mm; }
+.exam .problems { column-rule: 0.4pt solid #000; }
+.problem { break-inside: avoid; margin: 0 0 3mm; }
+.worksheet .problem { margin-bottom: 4mm; }
+.problem p { margin: 0 0 .5em; }
+.num { font-weight: bold; }
+.exam .num { font-style: italic; }
+.points { float: right; }
+.section-label { display: inline-block; border: 1px solid #000;
+                 padding: 0 .4em; font-size: .9em; margin: 0 0 .5em; }
+.display { text-align: center; margin: .6em 0; }
+.worksheet .sub, .worksheet .choice { padding-left: 1em; }
+.graph { text-align: center; margin: .5em 0; }
+.graph img { width: 60%; }
+.choices { display: grid; margin: 0 0 .5em; }
+.math-error { color: #c00; font-family: monospace; }
+@media print { body { padding: 0; } }
+"""
+
+# Typesets every .math element; without the bundle the LaTeX source stays
+# visible, so a preview is never blank
+_RENDER_SCRIPT = """
+(function () {
+  if (typeof katex === "undefined") return;
+  document.querySelectorAll(".math").forEach(function (el) {
+    katex.render(el.textContent, el, {
+      displayMode: el.classList.contains("display"),
+      throwOnError: false
+    });
+  });
+})();
+"""
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Equation and text helpers
+# ═══════════════════════════════════════════════════════════════════════
+
+def _math(script: str, display: bool = False) -> str:
+    """A Hancom equation as a KaTeX element.
+
+    A script the converter rejects is shown in place instead of failing
+    the whole preview.
+    """
+    try:
+        latex = hancom_to_latex(script)
+    except Exception as e:  # noqa: BLE001 — shown in the preview
+        return (f'<span class="math-error" title="{html.escape(f"{type(e).__name__}: {e}")}">'
+                f"{html.escape(script)}</span>")
+    if display:
+        return f'<div class="math display">{html.escape(latex)}</div>'
+    return f'<span class="math">{html.escape(latex)}</span>'
+
+
+def _choice(choice: str) -> str:
+    """Render a choice; $...$ choices are Hancom equations (as convert_choice)."""
+    if choice.startswith("$") and choice.endswith("$") and len(choice) > 1:
+        return _math(choice[1:-1])
+    return html.escape(choice)
+
+
+def _text(value) -> str:
+    return html.escape(str(value))
+
+
+def _graph(url: Path | str) -> str:
+    src = quote(Path(url).as_posix()) if isinstance(url, Path) else quote(url)
+    return f'<div class="graph"><img src="{src}" alt=""></div>'
+
+
+def _page_start(data: dict, layout: str, katex_href: str) -> Iterator[str]:
+    title = data.get("title", "") or "문제 미리보기"
+    href = quote(katex_href.rstrip("/"))
+    yield "<!DOCTYPE html>"
+    yield '<html lang="ko">'
+    yield "<head>"
+    yield '<meta charset="utf-8">'
+    yield f"<title>{_text(title)}</title>"
+    yield f'<link rel="stylesheet" href="{href}/katex.min.css">'
+    yield f"<style>{_STYLE}</style>"
+    yield "</head>"
+    yield f'<body class="{layout}">'
+
+
+def _page_end(katex_href: str) -> Iterator[str]:
+    href = quote(katex_href.rstrip("/"))
+    yield f'<script src="{href}/katex.min.js"></script>'
+    yield f"<script>{_RENDER_SCRIPT}</script>"
+    yield "</body>"
+    yield "</html>"
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Exam format generator
+# ═══════════════════════════════════════════════════════════════════════
+
+def _exam_document(
+    data: dict,
+    image_paths: dict[int, Path | str],
+    katex_href: str,
+) -> Iterator[str]:
+    """Lines of the exam page (layout of latex_generator's exam format)."""
+    yield from _page_start(data, "exam", katex_href)
+
+    # ── Header ──
+    year = data.get("year", "")
+    month = data.get("month", "")
+    grade = data.get("grade", "")
+    session = data.get("session", 2)
+    subject_area = data.get("subject_area", "수학")
+
+    title = data.get("title", "")
+    if not title and year:
+        title = f"{year}학년도 {month}월 {grade} 전국연합학력평가 문제지"
+    if title:
+        yield f'<p class="title">{_text(title)}</p>'
+    yield (f'<p class="session">제 {_text(session)} 교시'
+           f"<strong>{_text(subject_area)} 영역</strong></p>")
+    yield '<hr class="examrule">'
+
+    # ── Problems in 2 columns ──
+    yield '<main class="problems">'
+    for i, prob in enumerate(data.get("problems", []), 1):
+        yield _exam_problem(i, prob, image_paths)
+    yield "</main>"
+    yield from _page_end(katex_href)
+
+
+def _exam_problem(num: int, prob: dict, image_paths: dict[int, Path | str]) -> str:
+    """HTML for a single exam problem."""
+    parts = ['<section class="problem">']
+    section_label = prob.get("section_label", "")
+    if section_label:
+        parts.append(f'<div class="section-label">{_text(section_label)}</div>')
+
+    line = f'<p><span class="num">{num}.</span>'
+    text = prob.get("text", "")
+    if text:
+        line += f" {_text(text)}"
+    points = prob.get("points", "")
+    if points:
+        line += f' <span class="points">[{_text(points)}점]</span>'
+    parts.append(line + "</p>")
+
+    equation = prob.get("equation", "")
+    if equation:
+        parts.append(_math(equation, display=True))
+
+    for j, sub in enumerate(prob.get("sub_problems", [])):
+        content = [f"({j + 1})"]
+        if sub.get("text"):
+            content.append(_text(sub["text"]))
+        if sub.get("equation"):
+            content.append(_math(sub["equation"]))
+        parts.append(f'<p class="sub">{" ".join(content)}</p>')
+
+    if num in image_paths:
+        parts.append(_graph(image_paths[num]))
+
+    # Choices in one row of equal columns (tabularx in the PDF)
+    choices = prob.get("choices", [])
+    if choices:
+        cells = "".join(
+            f'<span class="choice">{_label(k)} {_choice(choice)}</span>'
+            for k, choice in enumerate(choices)
+        )
+        parts.append(f'<div class="choices" style="grid-template-columns: '
+                     f'repeat({len(choices)}, 1fr)">{cells}</div>')
+
+    parts.append("</section>")
+    return "".join(parts)
+
+
+def _label(k: int) -> str:
+    return CHOICE_LABELS[k] if k < len(CHOICE_LABELS) else f"({k + 1})"
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Worksheet format generator
+# ═══════════════════════════════════════════════════════════════════════
+
+def _worksheet_document(
+    data: dict,
+    image_paths: dict[int, Path | str],
+    katex_href: str,
+) -> Iterator[str]:
+    """Lines of the worksheet page (layout of latex_generator's worksheet)."""
+    yield from _page_start(data, "worksheet", katex_href)
+
+    # ── Header ──
+    title = data.get("title", "")
+    subtitle = data.get("subtitle", "")
+    if title:
+        yield f'<p class="title">{_text(title)}</p>'
+        if subtitle:
+            yield f'<p class="subtitle">{_text(subtitle)}</p>'
+
+    info = data.get("info", "")
+    if info:
+        yield f'<p class="info">{_text(info)}</p>'
+    else:
+        yield ('<p class="info"><span>이름: <span class="blank" style="width: 3cm"></span></span>'
+               '<span>날짜: <span class="blank" style="width: 2cm"></span></span>'
+               '<span>점수: <span class="blank" style="width: 1.5cm"></span></span></p>')
+    yield '<hr class="examrule">'
+
+    # ── Problems in 2 columns ──
+    yield '<main class="problems">'
+    for i, prob in enumerate(data.get("problems", []), 1):
+        yield _worksheet_problem(i, prob, image_paths)
+    yield "</main>"
+    yield from _page_end(katex_href)
+
+
+def _worksheet_problem(num: int, prob: dict, image_paths: dict[int, Path | str]) -> str:
+    """HTML for a single worksheet problem."""
+    parts = ['<section class="problem">']
+    line = f'<p><span class="num">{num}.</span>'
+    text = prob.get("text", "")
+    if text:
+        line += f" {_text(text)}"
+    parts.append(line + "</p>")
+
+    equation = prob.get("equation", "")
+    if equation:
+        parts.append(_math(equation, display=True))
+
+    for j, sub in enumerate(prob.get("sub_problems", [])):
+        content = [f"({j + 1})"]
+        if sub.get("text"):
+            content.append(_text(sub["text"]))
+        if sub.get("equation"):
+            content.append(_math(sub["equation"]))
+        parts.append(f'<p class="sub">{" ".join(content)}</p>')
+
+    if num in image_paths:
+        parts.append(_graph(image_paths[num]))
+
+    # Choices one per line (vertical, as in the PDF worksheet)
+    for k, choice in enumerate(prob.get("choices", [])):
+        parts.append(f'<p class="choice">{_label(k)} {_choice(choice)}</p>')
+
+    parts.append("</section>")
+    return "".join(parts)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Router
+# ═══════════════════════════════════════════════════════════════════════
+
+def _document_lines(
+    data: dict,
+    image_paths: dict[int, Path | str] | None,
+    katex_href: str,
+) -> Iterator[str]:
+    """Lines of the page for data["exam_type"] (joined by newlines)."""
+    if image_paths is None:
+        image_paths = {}
+    if data.get("exam_type", "학력평가") == "worksheet":
+        return _worksheet_document(data, image_paths, katex_href)
+    return _exam_document(data, image_paths, katex_href)
+
+
+def generate_html(
+    data: dict,
+    image_paths: dict[int, Path | str] | None = None,
+    katex_href: str = "katex",
+) -> str:
+    """Generate a complete HTML page from problem data.
+
+    Routes to exam or worksheet layout based on data["exam_type"], like
+    generate_latex().
+
+    Args:
+        data: Problem data dict
+        image_paths: Mapping of problem number (1-based) → graph image URL,
+            relative to the HTML file (SVG or PNG)
+        katex_href: URL of the directory holding katex.min.js/.css
+
+    Returns:
+        Complete HTML source string
+    """
+    return "\n".join(_document_lines(data, image_paths, katex_href))
+
+
+def write_html(
+    data: dict,
+    image_paths: dict[int, Path | str] | None,
+    fp: TextIO,
+    katex_href: str = "katex",
+) -> None:
+    """Stream the HTML page to *fp*, one problem at a time (see write_latex)."""
+    lines = _document_lines(data, image_paths, katex_href)
+    fp.write(next(lines))
+    for line in lines:
+        fp.write("\n")
+        fp.write(line)
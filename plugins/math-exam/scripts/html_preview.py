@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Fast HTML + KaTeX preview of problem JSON, without xelatex.
+
+Writes <output>.html next to a <stem>_files/ directory holding the KaTeX
+bundle and the graphs as SVG. The page has the exam / worksheet layout of
+the PDF (CSS columns) and opens offline in any browser; equations are
+typeset by KaTeX. A preview of a typical exam takes a few milliseconds
+plus any graphs that changed, against seconds for a xelatex build.
+
+KaTeX is not shipped with the plugin. Install a release once; it is kept
+in the cache directory and copied next to every preview:
+
+    <cache root>/katex/katex.min.js, katex.min.css, fonts/
+
+MATH_EXAM_KATEX_DIR points at an unpacked bundle instead. Without KaTeX
+the preview still opens, with equations shown as LaTeX source.
+
+Graphs are named by a hash of their spec, so unchanged graphs are reused
+from the previous preview and only edited ones are rendered again.
+
+Usage:
+    # One-time: install KaTeX (release archive, npm tarball or directory)
+    python html_preview.py --install-katex katex.tar.gz
+
+    python html_preview.py -p problems.json -o preview.html
+    python html_preview.py -p review.jsonl --exam-type worksheet -o review.html
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from html_generator import write_html
+from problem_stream import load_problem_data
+from toolchain import cache_root
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Files of a KaTeX release needed by the preview
+KATEX_FILES = ("katex.min.js", "katex.min.css")
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  KaTeX bundle
+# ═══════════════════════════════════════════════════════════════════════
+
+def katex_dir() -> Path:
+    """Installed KaTeX bundle ($MATH_EXAM_KATEX_DIR or <cache root>/katex)."""
+    env = os.environ.get("MATH_EXAM_KATEX_DIR")
+    return Path(env) if env else cache_root() / "katex"
+
+
+def _find_bundle(root: Path) -> Path | None:
+    """Directory under root holding katex.min.js and katex.min.css.
+
+    Accepts the layouts of a GitHub release (katex/) and of the npm
+    tarball (package/dist/), or the bundle directory itself.
+    """
+    candidates = sorted(root.rglob("katex.min.js"), key=lambda p: len(p.parts))
+    for js in candidates:
+        if all((js.parent / name).is_file() for name in KATEX_FILES):
+            return js.parent
+    return None
+
+
+def _safe_members(archive: tarfile.TarFile, source: Path) -> list[tarfile.TarInfo]:
+    """Members of *archive* that stay inside the extraction directory.
+
+    The manual equivalent of the "data" extraction filter: absolute or
+    ".." paths, links pointing outside and device files are rejected.
+    """
+    members = []
+    for member in archive.getmembers():
+        paths = [member.name]
+        if member.issym():
+            paths.append(os.path.join(os.path.dirname(member.name), member.linkname))
+        elif member.islnk():
+            paths.append(member.linkname)
+        for name in paths:
+            if os.path.isabs(name) or ".." in Path(os.path.normpath(name)).parts:
+                raise ValueError(f"{source}: unsafe path in archive: {member.name}")
+        if member.isdev():
+            raise ValueError(f"{source}: device file in archive: {member.name}")
+        members.append(member)
+    return members
+
+
+def install_katex(source: Path, dest: Path | None = None) -> Path:
+    """Copy a KaTeX release into the cache for offline previews.
+
+    Args:
+        source: Directory, .tar.gz/.tgz or .zip of a KaTeX release
+        dest: Install directory (default: katex_dir())
+
+    Returns:
+        The install directory
+    """
+    dest = dest or katex_dir()
+    with tempfile.TemporaryDirectory() as tmp:
+        if source.is_dir():
+            root = source
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as z:
+                z.extractall(tmp)
+            root = Path(tmp)
+        elif tarfile.is_tarfile(source):
+            with tarfile.open(source) as t:
+                if hasattr(tarfile, "data_filter"):
+                    t.extractall(tmp, filter="data")
+                else:  # Python without extraction filters (< 3.11.4)
+                    t.extractall(tmp, members=_safe_members(t, source))
+            root = Path(tmp)
+        else:
+            raise ValueError(f"{source}: not a directory, tar or zip archive")
+
+        bundle = _find_bundle(root)
+        if bundle is None:
+            raise ValueError(f"{source}: no katex.min.js / katex.min.css found")
+
+        staging = dest.with_name(dest.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name in KATEX_FILES:
+            shutil.copy2(bundle / name, staging / name)
+        if (bundle / "fonts").is_dir():
+            shutil.copytree(bundle / "fonts", staging / "fonts")
+        shutil.rmtree(dest, ignore_errors=True)
+        staging.rename(dest)
+    return dest
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _bundle_digest(bundle: Path) -> str:
+    """Content hash of the bundle's katex.min.js and katex.min.css."""
+    h = hashlib.sha256()
+    for name in KATEX_FILES:
+        h.update((bundle / name).read_bytes())
+    return h.hexdigest()
+
+
+def _stage_katex(assets: Path) -> bool:
+    """Mirror the installed bundle into assets/katex; False if not installed.
+
+    The copy is kept while its recorded content hash matches the installed
+    bundle, so installing another KaTeX release (even one of the same
+    size) replaces it on the next preview.
+    """
+    bundle = katex_dir()
+    if not all((bundle / name).is_file() for name in KATEX_FILES):
+        return False
+    target = assets / "katex"
+    stamp = target / ".bundle-sha256"
+    digest = _bundle_digest(bundle)
+    try:
+        if stamp.read_text(encoding="utf-8") == digest:
+            return True
+    except OSError:
+        pass
+    shutil.rmtree(target, ignore_errors=True)
+    target.mkdir(parents=True)
+    for src in bundle.rglob("*"):
+        dst = target / src.relative_to(bundle)
+        if src.is_dir():
+            dst.mkdir(exist_ok=True)
+        else:
+            _link_or_copy(src, dst)
+    # Written last: an interrupted copy is redone next time
+    stamp.write_text(digest, encoding="utf-8")
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Graphs
+# ═══════════════════════════════════════════════════════════════════════
+
+def _graph_name(spec: dict, salt: str) -> str:
+    """File name of one SVG graph: hash of its spec and the generator."""
+    raw = json.dumps(spec, sort_keys=True, ensure_ascii=False) + salt
+    return f"graph_{hashlib.sha256(raw.encode()).hexdigest()[:12]}.svg"
+
+
+def _render_graphs(
+    problems: list[dict],
+    assets: Path,
+    graph_jobs: int | None,
+) -> dict[int, str]:
+    """Render (or reuse) every graph as SVG; returns number → relative URL.
+
+    Failed graphs are reported and left out of the page. SVGs no longer
+    referenced by the problems are removed.
+    """
+    salt = hashlib.sha256((SCRIPT_DIR / "graph_generator.py").read_bytes()).hexdigest()
+    wanted: dict[int, Path] = {}
+    for num, prob in enumerate(problems, 1):
+        if prob.get("graph"):
+            wanted[num] = assets / _graph_name(prob["graph"], salt)
+
+    missing = [(num, problems[num - 1]) for num, path in wanted.items() if not path.exists()]
+    if missing:
+        # Lazy: only previews with new graphs pay for the graph pipeline
+        from build_math_pdf import _start_graphs
+
+        print(f"  Rendering {len(missing)} graph(s)...")
+        pool, pending = _start_graphs(missing, wanted, graph_jobs)
+        try:
+            for num, future in pending:
+                error, _ = future.result()
+                if error:
+                    print(f"  Warning: graph for problem {num} failed: {error}",
+                          file=sys.stderr)
+                    wanted[num].unlink(missing_ok=True)
+                    del wanted[num]
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    keep = {path.name for path in wanted.values()}
+    for old in assets.glob("graph_*.svg"):
+        if old.name not in keep:
+            old.unlink(missing_ok=True)
+    return {num: f"{assets.name}/{path.name}" for num, path in wanted.items()}
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Preview
+# ═══════════════════════════════════════════════════════════════════════
+
+def build_preview(
+    problems_file: Path,
+    output: Path,
+    exam_type: str | None = None,
+    graphs: bool = True,
+    graph_jobs: int | None = None,
+) -> Path:
+    """Write the HTML preview of a problem file.
+
+    Args:
+        problems_file: JSON or JSONL problem file
+        output: HTML file to write; assets go to <stem>_files/ beside it
+        exam_type: Override exam type (worksheet, 학력평가, etc.)
+        graphs: Render graphs as SVG (False leaves them out)
+        graph_jobs: Worker processes for graph rendering
+
+    Returns:
+        Path to the HTML file
+    """
+    data = load_problem_data(problems_file)
+    if exam_type:
+        data["exam_type"] = exam_type
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    assets = output.with_name(output.stem + "_files")
+    assets.mkdir(exist_ok=True)
+
+    if not _stage_katex(assets):
+        print(f"  Warning: KaTeX not installed in {katex_dir()}; equations are "
+              "shown as LaTeX source (install with --install-katex)", file=sys.stderr)
+
+    image_urls: dict[int, str] = {}
+    if graphs:
+        image_urls = _render_graphs(data.get("problems", []), assets, graph_jobs)
+
+    # Written to a temporary file so an open browser never sees half a page
+    tmp = output.with_name(f".{output.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        write_html(data, image_urls, f, katex_href=f"{assets.name}/katex")
+    os.replace(tmp, output)
+    return output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="HTML + KaTeX preview of problem data (no xelatex)"
+    )
+    parser.add_argument(
+        "--problems", "-p",
+        type=Path,
+        help="JSON (or JSONL) file containing problem data",
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=Path,
+        help="Output HTML path",
+    )
+    parser.add_argument(
+        "--exam-type",
+        choices=["worksheet", "학력평가", "수능", "exam"],
+        default=None,
+        help="Exam type (default: from JSON or 학력평가)",
+    )
+    parser.add_argument(
+        "--no-graphs",
+        action="store_true",
+        help="Leave graphs out of the preview",
+    )
+    parser.add_argument(
+        "--graph-jobs",
+        type=int,
+        default=None,
+        help="Worker processes for graph rendering (default: CPU count)",
+    )
+    parser.add_argument(
+        "--install-katex",
+        type=Path,
+        metavar="SRC",
+        help="Install a KaTeX release (directory, .tar.gz or .zip) for offline previews",
+    )
+    args = parser.parse_args()
+
+    if args.graph_jobs is not None and args.graph_jobs < 1:
+        parser.error("--graph-jobs must be at least 1")
+
+    if args.install_katex:
+        try:
+            dest = install_katex(args.install_katex)
+        except (OSError, ValueError, tarfile.TarError, zipfile.BadZipFile) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            raise SystemExit(1)
+        print(f"KaTeX installed: {dest}")
+        if not args.problems:
+            return
+
+    if not args.problems or not args.output:
+        parser.error("--problems and --output are required")
+
+    start = time.perf_counter()
+    try:
+        output = build_preview(
+            problems_file=args.problems,
+            output=args.output,
+            exam_type=args.exam_type,
+            graphs=not args.no_graphs,
+            graph_jobs=args.graph_jobs,
+        )
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"OUTPUT: {output} ({elapsed:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
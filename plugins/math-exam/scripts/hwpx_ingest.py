@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Extract problems from 한컴 .hwpx documents into problem JSON.
+
+An .hwpx file is a zip (OWPML): Contents/content.hpf lists the sections
+in reading order and each Contents/sectionN.xml holds the paragraphs.
+Sections are read with ElementTree.iterparse and every paragraph is
+released as soon as it has been collected, so memory stays bounded by
+one paragraph rather than the document. Equations are stored in the
+document as Hancom scripts (<hp:equation><hp:script>), which is exactly
+what the problem JSON expects.
+
+Paragraph → problem mapping:
+    "3. ...", "3) ..."      starts problem 3 (typed numbers only; automatic
+                            paragraph numbering is not part of the text;
+                            "2.5배 ..." is text, not problem 2)
+    "[3점]"                 points (removed from the text)
+    "① ... ② ..."          choices; a choice with equations becomes a
+                            $...$ Hancom choice, its text quoted ("개")
+    "[주관식]"               section_label of the next problem
+    other text             appended to the problem text
+    equations              first → equation; any further ones are kept in
+                            unplaced_equations (not rendered) and reported,
+                            since the JSON has no place for an equation in
+                            the middle of the text
+Text before the first problem becomes the title.
+
+Every extracted script is converted with hancom_to_latex and the result
+is checked with hancom_lint; failures are reported, not fatal.
+
+Usage:
+    python3 hwpx_ingest.py exam.hwpx -o exam.json
+    python3 hwpx_ingest.py hwpx_dir/ --output-dir json/ --jobs 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+from xml.etree import ElementTree as ET
+
+from hancom_lint import lint_problems
+from hancom_to_latex import hancom_to_latex
+
+# A paragraph is a list of ("text", str) / ("eq", script) segments
+Segment = tuple[str, str]
+
+_PROBLEM_RE = re.compile(r"^\s*(\d{1,3})\s*[.)．](?!\d)\s*")
+_POINTS_RE = re.compile(r"\[\s*(\d+(?:\.\d+)?)\s*점\s*\]")
+_SECTION_RE = re.compile(r"^\s*\[([^\]\d][^\]]*)\]\s*$")
+_CHOICE_MARKS = "①②③④⑤⑥⑦⑧⑨⑩"
+
+
+def _local(tag: str) -> str:
+    """'{namespace}p' → 'p'"""
+    return tag.rsplit("}", 1)[-1]
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Streaming extraction
+# ═══════════════════════════════════════════════════════════════════════
+
+def _section_names(zf: zipfile.ZipFile) -> list[str]:
+    """Section XML entries in reading order (content.hpf spine, else by number)."""
+    names = set(zf.namelist())
+    if "Contents/content.hpf" in names:
+        hrefs: dict[str, str] = {}
+        spine: list[str] = []
+        with zf.open("Contents/content.hpf") as f:
+            for _, elem in ET.iterparse(f):
+                tag = _local(elem.tag)
+                if tag == "item" and elem.get("id") and elem.get("href"):
+                    hrefs[elem.get("id")] = elem.get("href")
+                elif tag == "itemref" and elem.get("idref"):
+                    spine.append(elem.get("idref"))
+        ordered = [hrefs[ref] for ref in spine if ref in hrefs]
+        ordered = [h if h in names else f"Contents/{h}" for h in ordered]
+        ordered = [h for h in ordered if h in names and "section" in h]
+        if ordered:
+            return ordered
+    sections = [n for n in names if re.fullmatch(r"Contents/section\d+\.xml", n)]
+    return sorted(sections, key=lambda n: int(re.search(r"\d+", n).group()))
+
+
+def iter_paragraphs(path: Path) -> Iterator[list[Segment]]:
+    """Yield the non-empty paragraphs of an .hwpx file as segment lists.
+
+    Paragraphs nested in tables or text boxes are yielded on their own,
+    before the paragraph that contains them.
+    """
+    with zipfile.ZipFile(path) as zf:
+        for name in _section_names(zf):
+            with zf.open(name) as f:
+                stack: list[list[Segment]] = []
+                root = None
+                depth = 0
+                for event, elem in ET.iterparse(f, events=("start", "end")):
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        depth += 1
+                        if _local(elem.tag) == "p":
+                            stack.append([])
+                        continue
+                    depth -= 1
+                    tag = _local(elem.tag)
+                    if tag == "t" and stack:
+                        text = "".join(elem.itertext())
+                        if text and stack[-1] and stack[-1][-1][0] == "text":
+                            # Runs split text at every formatting change
+                            stack[-1][-1] = ("text", stack[-1][-1][1] + text)
+                        elif text:
+                            stack[-1].append(("text", text))
+                    elif tag == "script" and stack:
+                        script = (elem.text or "").strip()
+                        if script:
+                            stack[-1].append(("eq", script))
+                    elif tag == "p" and stack:
+                        segments = stack.pop()
+                        if any(kind == "eq" or value.strip() for kind, value in segments):
+                            yield segments
+                        elem.clear()
+                    if depth == 1 and root is not None:
+                        root.clear()  # drop finished top-level elements
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Paragraphs → problems
+# ═══════════════════════════════════════════════════════════════════════
+
+def _text_of(segments: list[Segment]) -> str:
+    return " ".join(" ".join(v.split()) for k, v in segments if k == "text").strip()
+
+
+def _choice(segments: list[Segment]) -> str:
+    """One choice: plain text, or a $...$ Hancom script with quoted text."""
+    if not any(kind == "eq" for kind, _ in segments):
+        return _text_of(segments)
+    parts = []
+    for kind, value in segments:
+        if kind == "eq":
+            parts.append(value)
+        elif value.strip():
+            parts.append('"' + " ".join(value.split()).replace('"', "'") + '"')
+    return "$" + " ".join(parts) + "$"
+
+
+def _split_choices(segments: list[Segment]) -> tuple[list[Segment], list[str]]:
+    """Split at ①..⑩ marks; return (segments before the first mark, choices)."""
+    head: list[Segment] = []
+    choices: list[list[Segment]] = []
+    for kind, value in segments:
+        if kind == "eq":
+            (choices[-1] if choices else head).append((kind, value))
+            continue
+        pieces = re.split(f"([{_CHOICE_MARKS}])", value)
+        for piece in pieces:
+            if piece and piece in _CHOICE_MARKS:
+                choices.append([])
+            elif piece:
+                (choices[-1] if choices else head).append(("text", piece))
+    return head, [_choice(c) for c in choices]
+
+
+def paragraphs_to_data(paragraphs, source: str = "") -> dict:
+    """Assemble problem JSON from extracted paragraphs.
+
+    Args:
+        paragraphs: Iterable of segment lists (see iter_paragraphs)
+        source: Document name, used for the default title
+
+    Returns:
+        Problem JSON dict (worksheet layout)
+    """
+    title_parts: list[str] = []
+    problems: list[dict] = []
+    section_label = ""
+    current: dict | None = None
+
+    for segments in paragraphs:
+        first = segments[0]
+        text_only = all(kind == "text" for kind, _ in segments)
+        if text_only and _SECTION_RE.match(_text_of(segments)) \
+                and not _POINTS_RE.search(_text_of(segments)):
+            section_label = _SECTION_RE.match(_text_of(segments)).group(1).strip()
+            continue
+
+        match = _PROBLEM_RE.match(first[1]) if first[0] == "text" else None
+        if match:
+            current = {"number": int(match.group(1))}
+            if section_label:
+                current["section_label"] = section_label
+                section_label = ""
+            problems.append(current)
+            segments = [("text", first[1][match.end():])] + segments[1:]
+        elif current is None:
+            title_parts.append(_text_of(segments))
+            continue
+
+        head, choices = _split_choices(segments)
+        if choices:
+            current.setdefault("choices", []).extend(choices)
+        text = _text_of(head)
+        points = _POINTS_RE.search(text)
+        if points:
+            value = float(points.group(1))
+            current["points"] = int(value) if value.is_integer() else value
+            text = _POINTS_RE.sub("", text).strip()
+        if text:
+            current["text"] = f"{current['text']} {text}" if current.get("text") else text
+        for kind, script in head:
+            if kind != "eq":
+                continue
+            if "equation" not in current:
+                current["equation"] = script
+            else:
+                current.setdefault("unplaced_equations", []).append(script)
+
+    title = " ".join(t for t in title_parts if t) or Path(source).stem
+    return {"exam_type": "worksheet", "title": title, "problems": problems}
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Per-file job
+# ═══════════════════════════════════════════════════════════════════════
+
+def _check(data: dict) -> list[str]:
+    """Convert every script and lint the document; return problems found."""
+    messages = [issue.format() for issue in lint_problems(data)
+                if issue.severity == "error"]
+    for prob in data["problems"]:
+        scripts = [prob.get("equation", "")]
+        scripts += [sub["equation"] for sub in prob.get("sub_problems", [])]
+        scripts += [c[1:-1] for c in prob.get("choices", []) if c.startswith("$")]
+        scripts += prob.get("unplaced_equations", [])
+        if prob.get("unplaced_equations"):
+            messages.append(f"problem {prob['number']}: "
+                            f"{len(prob['unplaced_equations'])} equation(s) after the "
+                            "first kept in unplaced_equations; place them by hand")
+        for script in scripts:
+            try:
+                hancom_to_latex(script)
+            except Exception as e:  # noqa: BLE001 — reported, not fatal
+                messages.append(f"problem {prob['number']}: {type(e).__name__}: {e}")
+    return messages
+
+
+def ingest_file(path: Path, output: Path) -> tuple[int, int, list[str]]:
+    """Convert one .hwpx file to problem JSON at *output*.
+
+    Returns:
+        (problems, equations, messages); messages describe equations that
+        failed to convert or lint
+    """
+    data = paragraphs_to_data(iter_paragraphs(path), source=str(path))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n",
+                      encoding="utf-8")
+    equations = sum(
+        ("equation" in p) + len(p.get("sub_problems", []))
+        + len(p.get("unplaced_equations", []))
+        + sum(c.startswith("$") for c in p.get("choices", []))
+        for p in data["problems"]
+    )
+    return len(data["problems"]), equations, _check(data)
+
+
+def _ingest_job(path: Path, output: Path) -> tuple[int, int, list[str], str | None]:
+    try:
+        return (*ingest_file(path, output), None)
+    except (OSError, zipfile.BadZipFile, ET.ParseError) as e:
+        return 0, 0, [], f"{type(e).__name__}: {e}"
+
+
+def _collect_inputs(specs: list[str]) -> list[Path]:
+    """Files, directories (*.hwpx inside) and glob patterns → .hwpx paths."""
+    inputs: list[Path] = []
+    for spec in specs:
+        path = Path(spec)
+        if path.is_dir():
+            inputs += sorted(p for p in path.glob("*.hwpx") if p.is_file())
+        elif glob.has_magic(spec):
+            inputs += sorted(Path(p) for p in glob.glob(spec, recursive=True)
+                             if Path(p).is_file())
+        else:
+            inputs.append(path)
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract problems from .hwpx documents into problem JSON"
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help=".hwpx files, directories or glob patterns")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="Output JSON (single input only)")
+    parser.add_argument("--output-dir", type=Path,
+                        help="Directory for <name>.json (default: next to each input)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    inputs = _collect_inputs(args.inputs)
+    if not inputs:
+        parser.error("no .hwpx files found")
+    if args.output and len(inputs) != 1:
+        parser.error("--output needs exactly one input; use --output-dir")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    def _output_for(src: Path) -> Path:
+        if args.output:
+            return args.output
+        return (args.output_dir or src.parent) / (src.stem + ".json")
+
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(inputs)))
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(_ingest_job, src, _output_for(src)): src for src in inputs}
+        for future in as_completed(futures):
+            src = futures[future]
+            problems, equations, messages, error = future.result()
+            if error:
+                failed += 1
+                print(f"  FAIL  {src}: {error}", file=sys.stderr)
+                continue
+            print(f"  OK    {src} → {_output_for(src)} "
+                  f"({problems} problem(s), {equations} equation(s))")
+            for message in messages:
+                print(f"        {message}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"\nIngested {len(inputs) - failed}/{len(inputs)} file(s) in {elapsed:.1f}s")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,25 @@ Two formats are supported:
 - worksheet: Simple 2-column math worksheet
 
 Usage:
-    from latex_generator import generate_latex
+    from latex_generator import generate_latex, write_latex
     tex_source = generate_latex(data, image_paths)
+    with open("exam.tex", "w", encoding="utf-8") as f:
+        write_latex(data, image_paths, f)    # streamed, problem by problem
 """
 
 from __future__ import annotations
 
-import platform
+import hashlib
+import json
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, TextIO
 
-from hancom_to_latex import hancom_to_latex, convert_choice
+from hancom_to_latex import converter_version, hancom_to_latex, convert_choice
+from tikz_graphs import PGFPLOTS_SETUP
+from toolchain import toolchain
+
+if TYPE_CHECKING:
+    from fragment_cache import FragmentCache
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -28,89 +37,104 @@ from hancom_to_latex import hancom_to_latex, convert_choice
 
 CHOICE_LABELS = ["①", "②", "③", "④", "⑤"]
 
+# Placeholders inside problem fragments. The problem number and the graph
+# block depend on the position in the document and on the work directory,
+# so they are filled in after a fragment is rendered (or reused)
+_NUM_SLOT = "\x00num\x00"
+_GRAPH_SLOT = "\x00graph\x00"
+
 
 # ═══════════════════════════════════════════════════════════════════════
 #  Font detection
 # ═══════════════════════════════════════════════════════════════════════
 
 def _detect_korean_font() -> str:
-    """Detect an available Korean font for the current platform."""
-    system = platform.system()
-    if system == "Darwin":
-        # macOS: try common Korean fonts
-        candidates = ["AppleGothic", "Apple SD Gothic Neo", "NanumGothic"]
-    elif system == "Windows":
-        candidates = ["Malgun Gothic", "NanumGothic", "Batang"]
-    else:
-        # Linux
-        candidates = ["NanumGothic", "UnBatang", "Noto Sans CJK KR"]
-
-    # Try to detect which fonts are available via fc-list
-    try:
-        import subprocess
-        result = subprocess.run(
-            ["fc-list", ":lang=ko", "family"],
-            capture_output=True, text=True, timeout=5,
-        )
-        available = result.stdout
-        for font in candidates:
-            if font in available:
-                return font
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        pass
-
-    # Fallback
-    if system == "Darwin":
-        return "AppleGothic"
-    elif system == "Windows":
-        return "Malgun Gothic"
-    return "NanumGothic"
+    """Korean font for the current platform (cached toolchain probe)."""
+    return toolchain().korean_font
 
 
 # ═══════════════════════════════════════════════════════════════════════
 #  LaTeX preamble
 # ═══════════════════════════════════════════════════════════════════════
 
-def _make_preamble(korean_font: str | None = None) -> str:
+def _make_preamble(
+    korean_font: str | None = None,
+    image_paths: dict[int, Path] | None = None,
+) -> str:
     """Generate the LaTeX preamble with all required packages."""
     if korean_font is None:
         korean_font = _detect_korean_font()
 
-    return rf"""\documentclass[10pt, a4paper]{{article}}
+    return (format_preamble() + _make_graphics_setup(image_paths)
+            + _make_font_setup(korean_font))
 
-% ── Fonts ──
-\usepackage{{fontspec}}
-\usepackage{{kotex}}
+
+def _make_graphics_setup(image_paths: dict[int, Path] | None) -> str:
+    """Packages needed only by some graph formats (kept out of the format)."""
+    suffixes = {p.suffix for p in (image_paths or {}).values()}
+    setup = ""
+    if ".pgf" in suffixes:
+        setup += r"""
+% ── PGF graphs ──
+\usepackage{pgf}
+"""
+    if ".tikz" in suffixes:
+        setup += "\n% ── TikZ graphs ──\n" + PGFPLOTS_SETUP
+    return setup
+
+
+def _make_font_setup(korean_font: str) -> str:
+    """Font selection lines that follow the format preamble.
+
+    XeTeX cannot \\dump a format with native (OpenType) fonts loaded, so
+    the font choice always stays in the document itself.
+    """
+    return rf"""
+% ── Korean font ──
 \setmainhangulfont{{{korean_font}}}
+"""
+
+
+def format_preamble() -> str:
+    """Return the font-independent part of the preamble.
+
+    Every generated document starts with exactly this text, so it can be
+    precompiled into an xelatex format file (see build_math_pdf.py).
+    """
+    return r"""\documentclass[10pt, a4paper]{article}
+
+% ── Fonts ──
+\usepackage{fontspec}
+\usepackage{kotex}
 
 % ── Math ──
-\usepackage{{amsmath, amssymb, amsthm}}
+\usepackage{amsmath, amssymb, amsthm}
 
 % ── Layout ──
-\usepackage[left=20mm, right=20mm, top=15mm, bottom=15mm]{{geometry}}
-\usepackage{{multicol}}
-\setlength{{\columnsep}}{{8mm}}
-\setlength{{\columnseprule}}{{0pt}}
+\usepackage[left=20mm, right=20mm, top=15mm, bottom=15mm]{geometry}
+\usepackage{multicol}
+\setlength{\columnsep}{8mm}
+\setlength{\columnseprule}{0pt}
 
 % ── Graphics ──
-\usepackage{{graphicx}}
+\usepackage{graphicx}
 
 % ── Page numbering ──
-\usepackage{{fancyhdr}}
-\pagestyle{{fancy}}
-\fancyhf{{}}
-\renewcommand{{\headrulewidth}}{{0pt}}
-\fancyfoot[C]{{\thepage}}
+\usepackage{fancyhdr}
+\pagestyle{fancy}
+\fancyhf{}
+\renewcommand{\headrulewidth}{0pt}
+\fancyfoot[C]{\thepage}
 
 % ── Misc ──
-\usepackage{{enumitem}}
-\usepackage{{tabularx}}
-\usepackage{{setspace}}
+\usepackage{enumitem}
+\usepackage{tabularx}
+\usepackage{setspace}
 
 % ── Custom commands ──
-\newcommand{{\examrule}}{{\noindent\rule{{\textwidth}}{{0.8pt}}}}
-\newcommand{{\points}}[1]{{\hfill\textnormal{{[#1점]}}}}
-\newcommand{{\sectionbox}}[1]{{\fbox{{\small #1}}}}
+\newcommand{\examrule}{\noindent\rule{\textwidth}{0.8pt}}
+\newcommand{\points}[1]{\hfill\textnormal{[#1점]}}
+\newcommand{\sectionbox}[1]{\fbox{\small #1}}
 """
 
 
@@ -154,27 +178,112 @@ def _tex_escape(text: str) -> str:
     return text
 
 
+def _append_graph(lines: list[str], img_path: Path) -> None:
+    """Append a centered graph.
+
+    .tikz graphs (tikz_graphs.py) are inlined, .pgf is typeset via \\input,
+    and raster/PDF images are included.
+    """
+    lines.append(r"\begin{center}")
+    if img_path.suffix == ".tikz":
+        if img_path.is_file():  # missing only if rendering failed (reported later)
+            lines.append(img_path.read_text(encoding="utf-8").rstrip("\n"))
+    elif img_path.suffix == ".pgf":
+        lines.append(rf"\resizebox{{0.6\linewidth}}{{!}}{{\input{{{img_path}}}}}")
+    else:
+        lines.append(rf"\includegraphics[width=0.6\linewidth]{{{img_path}}}")
+    lines.append(r"\end{center}")
+    lines.append("")
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Problem fragments
+# ═══════════════════════════════════════════════════════════════════════
+
+def fragment_version() -> str:
+    """Hash of this module and the converter; fragments of another version
+    must not be reused."""
+    source = Path(__file__).read_bytes()
+    return hashlib.sha256(converter_version().encode() + source).hexdigest()[:16]
+
+
+def fragment_key(layout: str, prob: dict, has_graph: bool) -> str:
+    """Cache key of one problem's fragment (independent of its number)."""
+    payload = json.dumps([layout, has_graph, prob], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _problem_lines(
+    layout: str,
+    num: int,
+    prob: dict,
+    image_paths: dict[int, Path],
+    fragment_cache: dict | FragmentCache | None,
+    render: Callable[[list[str], int | str, dict, bool], None],
+) -> list[str]:
+    """One problem's lines, reusing a cached fragment if unchanged.
+
+    *fragment_cache* is anything with get(key) and item assignment: a dict
+    (--watch) or fragment_cache.FragmentCache (persistent, shared by runs).
+    Fragments are keyed by content, so renumbered problems are reused too.
+    """
+    has_graph = num in image_paths
+    fragment = None
+    if fragment_cache is not None:
+        key = fragment_key(layout, prob, has_graph)
+        fragment = fragment_cache.get(key)
+    if fragment is None:
+        fragment = []
+        render(fragment, _NUM_SLOT, prob, has_graph)
+        if fragment_cache is not None:
+            fragment_cache[key] = fragment
+
+    number = str(num)
+    lines: list[str] = []
+    for line in fragment:
+        if line == _GRAPH_SLOT:
+            _append_graph(lines, image_paths[num])
+        else:
+            lines.append(line.replace(_NUM_SLOT, number))
+    return lines
+
+
 # ═══════════════════════════════════════════════════════════════════════
 #  Exam format generator
 # ═══════════════════════════════════════════════════════════════════════
 
-def generate_exam_latex(data: dict, image_paths: dict[int, Path] | None = None) -> str:
+def generate_exam_latex(
+    data: dict,
+    image_paths: dict[int, Path] | None = None,
+    fragment_cache: dict | FragmentCache | None = None,
+) -> str:
     """Generate LaTeX for standardized exam format (학력평가/수능).
 
     Args:
         data: Problem data dict with exam_type, year, month, etc.
         image_paths: Mapping of problem number → image file path
+        fragment_cache: Optional fragment cache (dict or FragmentCache)
+            reused across calls; unchanged problems are taken from it
+            instead of being re-rendered
     """
+    return "\n".join(_exam_document(data, image_paths, fragment_cache))
+
+
+def _exam_document(
+    data: dict,
+    image_paths: dict[int, Path] | None = None,
+    fragment_cache: dict | FragmentCache | None = None,
+) -> Iterator[str]:
+    """Lines of the exam document (see generate_exam_latex)."""
     if image_paths is None:
         image_paths = {}
 
     korean_font = _detect_korean_font()
-    lines: list[str] = []
 
     # Preamble
-    lines.append(_make_preamble(korean_font))
-    lines.append(r"\begin{document}")
-    lines.append("")
+    yield _make_preamble(korean_font, image_paths)
+    yield r"\begin{document}"
+    yield ""
 
     # ── Header (full width, before multicols) ──
     year = data.get("year", "")
@@ -188,37 +297,36 @@ def generate_exam_latex(data: dict, image_paths: dict[int, Path] | None = None)
         title = f"{year}학년도 {month}월 {grade} 전국연합학력평가 문제지"
 
     if title:
-        lines.append(r"\begin{center}")
-        lines.append(rf"\textbf{{{title}}}")
-        lines.append(r"\end{center}")
-        lines.append("")
+        yield r"\begin{center}"
+        yield rf"\textbf{{{title}}}"
+        yield r"\end{center}"
+        yield ""
 
-    lines.append(r"\begin{center}")
-    lines.append(rf"제 {session} 교시 \quad \textbf{{\Large {subject_area} 영역}}")
-    lines.append(r"\end{center}")
-    lines.append(r"\examrule")
-    lines.append(r"\vspace{2mm}")
+    yield r"\begin{center}"
+    yield rf"제 {session} 교시 \quad \textbf{{\Large {subject_area} 영역}}"
+    yield r"\end{center}"
+    yield r"\examrule"
+    yield r"\vspace{2mm}"
 
     # ── Problems in 2 columns ──
-    lines.append(r"\begin{multicols}{2}")
-    lines.append(r"\raggedcolumns")
-    lines.append("")
+    yield r"\begin{multicols}{2}"
+    yield r"\raggedcolumns"
+    yield ""
 
     problems = data.get("problems", [])
     for i, prob in enumerate(problems, 1):
-        _generate_exam_problem(lines, i, prob, image_paths)
-
-    lines.append(r"\end{multicols}")
-    lines.append(r"\end{document}")
+        yield from _problem_lines("exam", i, prob, image_paths, fragment_cache,
+                                  _generate_exam_problem)
 
-    return "\n".join(lines)
+    yield r"\end{multicols}"
+    yield r"\end{document}"
 
 
 def _generate_exam_problem(
     lines: list[str],
-    num: int,
+    num: int | str,
     prob: dict,
-    image_paths: dict[int, Path],
+    has_graph: bool,
 ) -> None:
     """Append LaTeX lines for a single exam problem."""
     # Section label (e.g., 주관식)
@@ -261,13 +369,9 @@ def _generate_exam_problem(
             lines.append(rf"\noindent {label} {sub_text}")
         lines.append("")
 
-    # Graph image
-    if num in image_paths:
-        img_path = image_paths[num]
-        lines.append(r"\begin{center}")
-        lines.append(rf"\includegraphics[width=0.6\linewidth]{{{img_path}}}")
-        lines.append(r"\end{center}")
-        lines.append("")
+    # Graph image (filled in by _problem_lines)
+    if has_graph:
+        lines.append(_GRAPH_SLOT)
 
     # Choices (5-choice horizontal layout)
     choices = prob.get("choices", [])
@@ -299,67 +403,81 @@ def _generate_horizontal_choices(lines: list[str], choices: list[str]) -> None:
 #  Worksheet format generator
 # ═══════════════════════════════════════════════════════════════════════
 
-def generate_worksheet_latex(data: dict, image_paths: dict[int, Path] | None = None) -> str:
+def generate_worksheet_latex(
+    data: dict,
+    image_paths: dict[int, Path] | None = None,
+    fragment_cache: dict | FragmentCache | None = None,
+) -> str:
     """Generate LaTeX for simple worksheet format.
 
     Args:
         data: Problem data dict with title, subtitle, problems
         image_paths: Mapping of problem number → image file path
+        fragment_cache: Optional fragment cache (dict or FragmentCache)
+            reused across calls; unchanged problems are taken from it
+            instead of being re-rendered
     """
+    return "\n".join(_worksheet_document(data, image_paths, fragment_cache))
+
+
+def _worksheet_document(
+    data: dict,
+    image_paths: dict[int, Path] | None = None,
+    fragment_cache: dict | FragmentCache | None = None,
+) -> Iterator[str]:
+    """Lines of the worksheet document (see generate_worksheet_latex)."""
     if image_paths is None:
         image_paths = {}
 
     korean_font = _detect_korean_font()
-    lines: list[str] = []
 
     # Preamble
-    lines.append(_make_preamble(korean_font))
-    lines.append(r"\begin{document}")
-    lines.append("")
+    yield _make_preamble(korean_font, image_paths)
+    yield r"\begin{document}"
+    yield ""
 
     # ── Header ──
     title = data.get("title", "")
     subtitle = data.get("subtitle", "")
 
     if title:
-        lines.append(r"\begin{center}")
-        lines.append(rf"\textbf{{\Large {title}}}")
+        yield r"\begin{center}"
+        yield rf"\textbf{{\Large {title}}}"
         if subtitle:
-            lines.append(r"\\[2mm]")
-            lines.append(rf"\textbf{{{subtitle}}}")
-        lines.append(r"\end{center}")
-        lines.append("")
+            yield r"\\[2mm]"
+            yield rf"\textbf{{{subtitle}}}"
+        yield r"\end{center}"
+        yield ""
 
     # Info line
     info = data.get("info", "")
     if info:
-        lines.append(rf"\noindent {info}")
+        yield rf"\noindent {info}"
     else:
-        lines.append(r"\noindent 이름:\underline{\hspace{3cm}} \hfill 날짜:\underline{\hspace{2cm}} \hfill 점수:\underline{\hspace{1.5cm}}")
-    lines.append(r"\vspace{3mm}")
-    lines.append(r"\examrule")
-    lines.append(r"\vspace{3mm}")
+        yield r"\noindent 이름:\underline{\hspace{3cm}} \hfill 날짜:\underline{\hspace{2cm}} \hfill 점수:\underline{\hspace{1.5cm}}"
+    yield r"\vspace{3mm}"
+    yield r"\examrule"
+    yield r"\vspace{3mm}"
 
     # ── Problems in 2 columns ──
-    lines.append(r"\begin{multicols}{2}")
-    lines.append(r"\raggedcolumns")
-    lines.append("")
+    yield r"\begin{multicols}{2}"
+    yield r"\raggedcolumns"
+    yield ""
 
     problems = data.get("problems", [])
     for i, prob in enumerate(problems, 1):
-        _generate_worksheet_problem(lines, i, prob, image_paths)
+        yield from _problem_lines("worksheet", i, prob, image_paths, fragment_cache,
+                                  _generate_worksheet_problem)
 
-    lines.append(r"\end{multicols}")
-    lines.append(r"\end{document}")
-
-    return "\n".join(lines)
+    yield r"\end{multicols}"
+    yield r"\end{document}"
 
 
 def _generate_worksheet_problem(
     lines: list[str],
-    num: int,
+    num: int | str,
     prob: dict,
-    image_paths: dict[int, Path],
+    has_graph: bool,
 ) -> None:
     """Append LaTeX lines for a single worksheet problem."""
     text = _tex_escape(prob.get("text", ""))
@@ -392,13 +510,9 @@ def _generate_worksheet_problem(
             lines.append(rf"\noindent \quad {label} {sub_text}")
         lines.append("")
 
-    # Graph image
-    if num in image_paths:
-        img_path = image_paths[num]
-        lines.append(r"\begin{center}")
-        lines.append(rf"\includegraphics[width=0.6\linewidth]{{{img_path}}}")
-        lines.append(r"\end{center}")
-        lines.append("")
+    # Graph image (filled in by _problem_lines)
+    if has_graph:
+        lines.append(_GRAPH_SLOT)
 
     # Choices (vertical for worksheet)
     choices = prob.get("choices", [])
@@ -417,7 +531,11 @@ def _generate_worksheet_problem(
 #  Router
 # ═══════════════════════════════════════════════════════════════════════
 
-def generate_latex(data: dict, image_paths: dict[int, Path] | None = None) -> str:
+def generate_latex(
+    data: dict,
+    image_paths: dict[int, Path] | None = None,
+    fragment_cache: dict | FragmentCache | None = None,
+) -> str:
     """Generate a complete .tex document from problem data.
 
     Routes to exam or worksheet format based on data["exam_type"].
@@ -426,11 +544,49 @@ def generate_latex(data: dict, image_paths: dict[int, Path] | None = None) -> st
     Args:
         data: Problem data dict
         image_paths: Mapping of problem number (1-based) → image file Path
+        fragment_cache: Optional cache of rendered problem fragments, reused
+            across calls: a dict (build_math_pdf.py --watch) or a persistent
+            FragmentCache (--fragment-cache)
 
     Returns:
         Complete LaTeX source string
     """
+    return "\n".join(_document_lines(data, image_paths, fragment_cache))
+
+
+def _document_lines(
+    data: dict,
+    image_paths: dict[int, Path] | None,
+    fragment_cache: dict | FragmentCache | None,
+) -> Iterator[str]:
+    """Lines of the document for data["exam_type"] (joined by newlines)."""
     exam_type = data.get("exam_type", "학력평가")
     if exam_type == "worksheet":
-        return generate_worksheet_latex(data, image_paths)
-    return generate_exam_latex(data, image_paths)
+        return _worksheet_document(data, image_paths, fragment_cache)
+    return _exam_document(data, image_paths, fragment_cache)
+
+
+def write_latex(
+    data: dict,
+    image_paths: dict[int, Path] | None,
+    fp: TextIO,
+    fragment_cache: dict | FragmentCache | None = None,
+) -> None:
+    """Stream the .tex document to *fp*, one problem at a time.
+
+    Writes exactly what generate_latex() returns, but never holds the whole
+    document: each problem is rendered, written and dropped. data["problems"]
+    may be any iterable (e.g. a generator over a JSONL file), so memory stays
+    flat regardless of the problem count.
+
+    Args:
+        data: Problem data dict
+        image_paths: Mapping of problem number (1-based) → image file Path
+        fp: Text file object opened for writing
+        fragment_cache: Optional cache of rendered problem fragments
+    """
+    lines = _document_lines(data, image_paths, fragment_cache)
+    fp.write(next(lines))
+    for line in lines:
+        fp.write("\n")
+        fp.write(line)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Incremental reading of problem files, one problem at a time.
+
+Two layouts are accepted:
+
+    problems.json    the usual {"exam_type": ..., "problems": [{...}, ...]};
+                     read incrementally with JSONDecoder.raw_decode over a
+                     sliding buffer, never as one document
+    problems.jsonl   a header line (every top-level field except problems;
+                     {} if there are none) followed by one problem object
+                     per line
+
+    {"exam_type": "worksheet", "title": "복습 문제집"}
+    {"text": "다음 식을 간단히 하여라.", "equation": "x^2 + 2x + 1", "points": 3}
+    {"text": "...", "graph": {"type": "quadratic", ...}, "points": 4}
+
+iter_problems() yields the problems lazily, so a caller that renders each
+problem and drops it (write_latex) keeps memory flat for any book size.
+read_header() returns the other fields; for .json it has to scan past
+the problems array, since fields may follow it.
+
+Usage:
+    from problem_stream import read_header, iter_problems, load_problem_data
+    data = {**read_header(path), "problems": iter_problems(path)}
+    data = load_problem_data(path)      # everything in memory (JSON or JSONL)
+    for number, field, script, shift in script_fields(data): ...
+    files = collect_problem_files("exams/")   # directory, glob or manifest
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import re
+from pathlib import Path
+from typing import Iterator
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+# Characters read from the file per refill
+_CHUNK = 1 << 16
+
+# Keys of a problem object; a JSONL first line with any of them is a
+# problem, not the header
+PROBLEM_FIELDS = ("text", "equation", "choices", "sub_problems", "graph", "points")
+
+_WS = re.compile(r"\s*")
+_decoder = json.JSONDecoder()
+
+
+def is_jsonl(path: Path) -> bool:
+    """True for JSONL problem files (by suffix)."""
+    return Path(path).suffix.lower() in JSONL_SUFFIXES
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Incremental JSON
+# ═══════════════════════════════════════════════════════════════════════
+
+class _JSONReader:
+    """Pull parser for one JSON document: whitespace, punctuation, values."""
+
+    def __init__(self, f, name: str):
+        self.f = f
+        self.name = name
+        self.buf = ""
+        self.pos = 0
+        self.base = 0   # characters dropped from the front of buf
+        self.eof = False
+
+    def _more(self) -> bool:
+        """Append the next chunk (dropping consumed text); False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.f.read(_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.base += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of input)."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            found = repr(ch) if ch else "end of file"
+            raise ValueError(f"{self.name}: expected {' or '.join(map(repr, chars))}, "
+                             f"found {found} (char {self.base + self.pos})")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next complete value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._more():
+                    continue
+                raise ValueError(f"{self.name}: {e.msg} (char {self.base + e.pos})") from None
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._more():
+                continue
+            self.pos = end
+            return value
+
+
+def _json_events(path: Path) -> Iterator[tuple[str, object]]:
+    """Yield ("field", (key, value)) and ("problem", dict) in file order."""
+    with open(path, encoding="utf-8") as f:
+        reader = _JSONReader(f, str(path))
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError(f"{path}: object keys must be strings")
+            reader.expect(":")
+            if key == "problems" and reader.peek() == "[":
+                reader.expect("[")
+                if reader.peek() != "]":
+                    while True:
+                        yield "problem", reader.value()
+                        if reader.expect(",]") == "]":
+                            break
+                else:
+                    reader.expect("]")
+            else:
+                yield "field", (key, reader.value())
+            if reader.expect(",}") == "}":
+                return
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  JSONL
+# ═══════════════════════════════════════════════════════════════════════
+
+def _jsonl_records(path: Path) -> Iterator[tuple[int, dict]]:
+    """(line number, object) for every non-blank line."""
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{lineno}: {e}") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{lineno}: expected a JSON object")
+            yield lineno, record
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Public API
+# ═══════════════════════════════════════════════════════════════════════
+
+def _jsonl_header(path: Path, records: Iterator[tuple[int, dict]]) -> dict:
+    """Consume and check the header line of a JSONL file."""
+    for lineno, record in records:
+        if "problems" in record:
+            raise ValueError(f"{path}:{lineno}: the header line must not "
+                             "contain problems (one problem per line follows it)")
+        fields = [key for key in PROBLEM_FIELDS if key in record]
+        if fields:
+            raise ValueError(f"{path}:{lineno}: the first line looks like a problem "
+                             f"({', '.join(fields)}); start the file with a header "
+                             "line ({} if there are no fields)")
+        return record
+    return {}
+
+
+def read_header(path: Path) -> dict:
+    """Every top-level field except "problems"."""
+    if is_jsonl(path):
+        return _jsonl_header(path, _jsonl_records(path))
+    return dict(item for kind, item in _json_events(path) if kind == "field")
+
+
+def iter_problems(path: Path) -> Iterator[dict]:
+    """Yield the problems of a JSON or JSONL file one at a time."""
+    if is_jsonl(path):
+        records = _jsonl_records(path)
+        _jsonl_header(path, records)
+        for _, record in records:
+            yield record
+        return
+    for kind, item in _json_events(path):
+        if kind == "problem":
+            if not isinstance(item, dict):
+                raise ValueError(f"{path}: problems must be JSON objects")
+            yield item
+
+
+def load_problem_data(path: Path) -> dict:
+    """The whole problem file as one dict (JSON or JSONL)."""
+    if is_jsonl(path):
+        return {**read_header(path), "problems": list(iter_problems(path))}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def script_fields(data: dict) -> Iterator[tuple[object, str, object, int]]:
+    """Yield (problem number, field path, script, offset shift) per Hancom script.
+
+    Covers problems[i].equation, problems[i].sub_problems[j].equation and
+    $...$-wrapped problems[i].choices[k] (shift 1: the script starts after
+    the "$"). "problems" may be any iterable, e.g. iter_problems().
+    """
+    for i, prob in enumerate(data.get("problems", [])):
+        number = prob.get("number", i + 1)
+        base = f"problems[{i}]"
+        if "equation" in prob:
+            yield number, f"{base}.equation", prob["equation"], 0
+        for j, sub in enumerate(prob.get("sub_problems", [])):
+            if "equation" in sub:
+                yield number, f"{base}.sub_problems[{j}].equation", sub["equation"], 0
+        for k, choice in enumerate(prob.get("choices", [])):
+            # Same rule as convert_choice: only $...$ choices are Hancom
+            if (isinstance(choice, str) and len(choice) > 1
+                    and choice.startswith("$") and choice.endswith("$")):
+                yield number, f"{base}.choices[{k}]", choice, 1
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  Input discovery
+# ═══════════════════════════════════════════════════════════════════════
+
+def collect_problem_files(spec: str) -> list[Path]:
+    """Resolve an input spec into a sorted list of problem files.
+
+    The spec may be:
+    - a directory → every ``*.json`` / ``*.jsonl`` directly inside it
+    - a glob pattern (``exams/**/*.json``) → every matching file
+    - a manifest file → one JSON path per line (``#`` comments allowed),
+      relative paths resolved against the manifest's directory
+
+    Raises:
+        SystemExit: If the spec matches nothing on disk
+    """
+    path = Path(spec)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir()
+                      if p.suffix in (".json", *JSONL_SUFFIXES) and p.is_file())
+
+    if glob.has_magic(spec):
+        return sorted(Path(p) for p in glob.glob(spec, recursive=True)
+                      if Path(p).is_file())
+
+    if path.is_file():
+        inputs: list[Path] = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = Path(line)
+            if not entry.is_absolute():
+                entry = path.parent / entry
+            inputs.append(entry)
+        return inputs
+
+    raise SystemExit(f"Batch input not found: {spec}")
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""TikZ/pgfplots backend for function graphs.
+
+Emits pgfplots code for the analytic graph types of graph_generator.py, so
+exams whose graphs are all function plots are built without importing
+matplotlib or rasterizing anything. The code is inlined into the .tex, so
+labels and tick numbers use the document's fonts.
+
+Supported: polynomial, quadratic, trig, exp_log, rational, derivative,
+integral_area, number_line. Other types (geometry, conic, normal, custom)
+have no TikZ implementation, and neither have degenerate specs of a
+supported type (exp_log with base 1 or a log domain ending at or below
+0.01, rational with c = d = 0); callers fall back to graph_generator (PNG).
+
+The plots use the "exam graph" / "exam number line" pgfplots styles that
+latex_generator.py adds to the preamble when a TikZ graph is present.
+
+This module must not import matplotlib or numpy.
+
+Usage:
+    from tikz_graphs import generate_tikz, tikz_supported
+    if tikz_supported(spec):
+        generate_tikz(spec, "graph_1.tikz")
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+# pgfplots styles shared by every TikZ graph (see latex_generator.py)
+PGFPLOTS_SETUP = r"""\usepackage{pgfplots}
+\pgfplotsset{compat=1.16}
+\pgfplotsset{
+  exam graph/.style={
+    axis lines=middle, axis line style={-stealth},
+    xlabel={$x$}, ylabel={$y$},
+    xlabel style={anchor=west}, ylabel style={anchor=south},
+    width=0.6\linewidth, height=0.6\linewidth,
+    tick align=inside, ticklabel style={font=\scriptsize},
+    every axis plot/.append style={black, thick, no markers},
+    unbounded coords=jump,
+  },
+  exam number line/.style={
+    axis x line=middle, axis y line=none, axis line style={-stealth},
+    ymin=-0.5, ymax=0.5, width=0.75\linewidth, height=2.2cm,
+    tick align=center, ticklabel style={font=\scriptsize},
+    clip=false,
+  },
+}
+"""
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _n(value: float) -> str:
+    """Format a number for pgfmath (no exponent notation, no "-0")."""
+    text = f"{float(value):.6f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _horner(coeffs: list[float], var: str = "x") -> str:
+    """pgfmath expression for a polynomial with coefficients high → low."""
+    if not coeffs:
+        return "0"
+    expr = f"({_n(coeffs[0])})"
+    for c in coeffs[1:]:
+        expr = f"({expr}*{var}+({_n(c)}))"
+    return expr
+
+
+def _polyval(coeffs: list[float], x: float) -> float:
+    y = 0.0
+    for c in coeffs:
+        y = y * x + c
+    return y
+
+
+def _polyder(coeffs: list[float]) -> list[float]:
+    n = len(coeffs) - 1
+    return [c * (n - i) for i, c in enumerate(coeffs[:-1])] or [0.0]
+
+
+def _real_roots(coeffs: list[float], lo: float, hi: float) -> list[float]:
+    """Real roots of a polynomial inside (lo, hi)."""
+    while len(coeffs) > 1 and coeffs[0] == 0:
+        coeffs = coeffs[1:]
+    degree = len(coeffs) - 1
+    if degree < 1:
+        return []
+    if degree == 1:
+        roots = [-coeffs[1] / coeffs[0]]
+    elif degree == 2:
+        a, b, c = coeffs
+        disc = b * b - 4 * a * c
+        if disc < -1e-12:
+            return []
+        s = math.sqrt(max(disc, 0.0))
+        roots = sorted({(-b - s) / (2 * a), (-b + s) / (2 * a)})
+    else:
+        # Sign changes on a fine grid, refined by bisection
+        roots = []
+        steps = 2000
+        xs = [lo + (hi - lo) * k / steps for k in range(steps + 1)]
+        for x0, x1 in zip(xs, xs[1:]):
+            y0, y1 = _polyval(coeffs, x0), _polyval(coeffs, x1)
+            if y0 == 0:
+                roots.append(x0)
+            elif y0 * y1 < 0:
+                for _ in range(60):
+                    mid = (x0 + x1) / 2
+                    if _polyval(coeffs, x0) * _polyval(coeffs, mid) <= 0:
+                        x1 = mid
+                    else:
+                        x0 = mid
+                roots.append((x0 + x1) / 2)
+    return [r for r in roots if lo < r < hi]
+
+
+def _axis(xlim, ylim, options: str = "") -> list[str]:
+    """Opening lines of an exam-style axis over xlim × ylim."""
+    opts = (f"exam graph, xmin={_n(xlim[0])}, xmax={_n(xlim[1])}, "
+            f"ymin={_n(ylim[0])}, ymax={_n(ylim[1])}")
+    if options:
+        opts += ", " + options
+    return [r"\begin{tikzpicture}", rf"\begin{{axis}}[{opts}]"]
+
+
+def _restrict(ylim) -> str:
+    """Drop samples far outside the view (asymptotes) instead of overflowing."""
+    span = ylim[1] - ylim[0]
+    return f"restrict y to domain={_n(ylim[0] - 10 * span)}:{_n(ylim[1] + 10 * span)}"
+
+
+def _plot(
+    expr: str,
+    lo: float,
+    hi: float,
+    samples: int = 200,
+    style: str = "",
+    closed: bool = False,
+) -> str:
+    """\\addplot of *expr* over [lo, hi]; *closed* fills down to the x-axis."""
+    opts = f"domain={_n(lo)}:{_n(hi)}, samples={samples}"
+    if style:
+        opts = f"{style}, {opts}"
+    cycle = r" \closedcycle" if closed else ""
+    return rf"\addplot[{opts}] {{{expr}}}{cycle};"
+
+
+def _dot(x: float, y: float) -> str:
+    return rf"\fill (axis cs:{_n(x)},{_n(y)}) circle[radius=1.5pt];"
+
+
+def _text(x: float, y: float, text: str, anchor: str = "south west") -> str:
+    return (rf"\node[anchor={anchor}, font=\scriptsize, inner sep=1pt] "
+            rf"at (axis cs:{_n(x)},{_n(y)}) {{{text}}};")
+
+
+def _vline(x: float, ylim) -> str:
+    return (rf"\draw[densely dashed, thin] (axis cs:{_n(x)},{_n(ylim[0])}) -- "
+            rf"(axis cs:{_n(x)},{_n(ylim[1])});")
+
+
+def _hline(y: float, xlim) -> str:
+    return (rf"\draw[densely dashed, thin] (axis cs:{_n(xlim[0])},{_n(y)}) -- "
+            rf"(axis cs:{_n(xlim[1])},{_n(y)});")
+
+
+def _finish(lines: list[str], xlim, ylim, label: str) -> str:
+    """Origin mark, top-right label, and closing environments."""
+    if xlim[0] < 0 < xlim[1] and ylim[0] < 0 < ylim[1]:
+        lines.append(r"\node[anchor=north east, font=\small, inner sep=2pt] "
+                     r"at (axis cs:0,0) {$O$};")
+    if label:
+        lines.append(rf"\node[anchor=north east, font=\small] "
+                     rf"at (rel axis cs:0.95,0.95) {{${label}$}};")
+    lines.append(r"\end{axis}")
+    lines.append(r"\end{tikzpicture}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Graph types (mirror graph_generator._plot_*)
+# ---------------------------------------------------------------------------
+
+def _tikz_polynomial(spec: dict) -> str:
+    coeffs = spec.get("coeffs", [1, 0, 0, -1])
+    xlim = spec.get("xlim", (-5, 5))
+    ylim = spec.get("ylim", (-5, 5))
+
+    lines = _axis(xlim, ylim, _restrict(ylim))
+    lines.append(_plot(_horner(coeffs), xlim[0], xlim[1]))
+    for pt in spec.get("points", []):
+        lines.append(_dot(pt["x"], pt["y"]))
+        if "label" in pt:
+            lines.append(_text(pt["x"] + 0.2, pt["y"] + 0.3, pt["label"]))
+    for r in spec.get("roots", []):
+        lines.append(_dot(r, 0))
+        lines.append(_text(r, -0.5, str(r), anchor="north"))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+def _tikz_quadratic(spec: dict) -> str:
+    a = spec.get("a", 1)
+    p = spec.get("p", 0)
+    q = spec.get("q", 0)
+    xlim = spec.get("xlim", (-5, 5))
+    ylim = spec.get("ylim", (-5, 5))
+
+    lines = _axis(xlim, ylim, _restrict(ylim))
+    expr = f"({_n(a)})*(x-({_n(p)}))*(x-({_n(p)}))+({_n(q)})"
+    lines.append(_plot(expr, xlim[0], xlim[1]))
+    if spec.get("show_vertex", True):
+        lines.append(_dot(p, q))
+        lines.append(_text(p + 0.2, q - 0.5, f"$({p},\\;{q})$", anchor="north west"))
+    if spec.get("show_axis", False):
+        lines.append(_vline(p, ylim))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+_PI_TICKS = [
+    (0.5, r"$\frac{\pi}{2}$"), (1, r"$\pi$"), (1.5, r"$\frac{3\pi}{2}$"),
+    (2, r"$2\pi$"), (2.5, r"$\frac{5\pi}{2}$"), (3, r"$3\pi$"),
+]
+
+
+def _tikz_trig(spec: dict) -> str:
+    func = spec.get("func", "sin")
+    a = spec.get("amplitude", 1)
+    b = spec.get("period_coeff", 1)
+    c = spec.get("phase", 0)
+    d = spec.get("shift", 0)
+    xlim = spec.get("xlim", (-0.5, 2 * math.pi + 0.5))
+    ylim = spec.get("ylim", (-2, 2))
+    if func not in ("sin", "cos", "tan"):
+        raise ValueError(f"Unknown trig func: {func}")
+
+    options = [_restrict(ylim)]
+    if spec.get("pi_ticks", True) and func != "tan":
+        ticks = [(m * math.pi, lbl) for m, lbl in _PI_TICKS
+                 if xlim[0] < m * math.pi < xlim[1]]
+        if ticks:
+            options.append("xtick={" + ",".join(_n(v) for v, _ in ticks) + "}")
+            options.append("xticklabels={" + ",".join(f"{{{l}}}" for _, l in ticks) + "}")
+
+    lines = _axis(xlim, ylim, ", ".join(options))
+    # pgfmath trig functions take degrees
+    arg = f"deg(({_n(b)})*x+({_n(c)}))"
+    expr = f"({_n(a)})*{func}({arg})+({_n(d)})"
+    if func == "tan":
+        period = math.pi / abs(b)
+        k_start = math.floor((xlim[0] + math.pi / (2 * b) - c / b) / period)
+        k_end = math.ceil((xlim[1] + math.pi / (2 * b) - c / b) / period)
+        asymptotes = sorted(
+            x for x in ((k * math.pi - c + math.pi / 2) / b
+                        for k in range(k_start, k_end + 1))
+            if xlim[0] < x < xlim[1]
+        )
+        for x in asymptotes:
+            lines.append(_vline(x, ylim))
+        # Plot each branch separately so no line crosses an asymptote
+        bounds = [xlim[0]] + asymptotes + [xlim[1]]
+        eps = 1e-3 / abs(b)
+        for lo, hi in zip(bounds, bounds[1:]):
+            lo = lo + eps if lo in asymptotes else lo
+            hi = hi - eps if hi in asymptotes else hi
+            if hi > lo:
+                lines.append(_plot(expr, lo, hi, samples=150))
+    else:
+        lines.append(_plot(expr, xlim[0], xlim[1], samples=300))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+def _tikz_exp_log(spec: dict) -> str:
+    kind = spec.get("kind", "exp")
+    base = spec.get("base", math.e)
+    xlim = spec.get("xlim", (-3, 4))
+    ylim = spec.get("ylim", (-3, 5))
+
+    lines = _axis(xlim, ylim, _restrict(ylim))
+    if kind in ("exp", "both"):
+        expr = "exp(x)" if base == math.e else f"exp({_n(math.log(base))}*x)"
+        lines.append(_plot(expr, xlim[0], min(xlim[1], 5)))
+        lines.append(_dot(0, 1))
+    if kind in ("log", "both"):
+        expr = "ln(x)" if base == math.e else f"ln(x)/{_n(math.log(base))}"
+        style = "dashed" if kind == "both" else ""
+        lines.append(_plot(expr, 0.01, xlim[1], style=style))
+        lines.append(_dot(1, 0))
+    if kind == "both":
+        lines.append(_plot("x", xlim[0], xlim[1], samples=2, style="densely dotted, thin"))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+def _tikz_rational(spec: dict) -> str:
+    a = spec.get("a", 1)
+    b = spec.get("b", 0)
+    c = spec.get("c", 1)
+    d = spec.get("d", -1)
+    xlim = spec.get("xlim", (-5, 5))
+    ylim = spec.get("ylim", (-5, 5))
+
+    lines = _axis(xlim, ylim, _restrict(ylim))
+    expr = f"(({_n(a)})*x+({_n(b)}))/(({_n(c)})*x+({_n(d)}))"
+    x_asym = -d / c if c != 0 else None
+    y_asym = a / c if c != 0 else None
+
+    if x_asym is not None and xlim[0] < x_asym < xlim[1]:
+        eps = 0.05 / abs(c)
+        # A segment squeezed between the asymptote and the frame is dropped
+        # rather than given a reversed domain
+        if xlim[0] < x_asym - eps:
+            lines.append(_plot(expr, xlim[0], x_asym - eps))
+        if x_asym + eps < xlim[1]:
+            lines.append(_plot(expr, x_asym + eps, xlim[1]))
+        lines.append(_vline(x_asym, ylim))
+    else:
+        lines.append(_plot(expr, xlim[0], xlim[1]))
+    if y_asym is not None and ylim[0] < y_asym < ylim[1]:
+        lines.append(_hline(y_asym, xlim))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+def _tikz_derivative(spec: dict) -> str:
+    coeffs = spec.get("coeffs", [1, 0, -3, 0])
+    show_f = spec.get("show_f", True)
+    show_fp = spec.get("show_fp", True)
+    xlim = spec.get("xlim", (-3, 3))
+    ylim = spec.get("ylim", (-5, 5))
+    deriv = _polyder(coeffs)
+
+    lines = _axis(xlim, ylim, _restrict(ylim))
+    if show_f:
+        lines.append(_plot(_horner(coeffs), xlim[0], xlim[1]))
+    if show_fp:
+        lines.append(_plot(_horner(deriv), xlim[0], xlim[1],
+                           style="dashed" if show_f else ""))
+    if spec.get("show_extrema", False) and show_f:
+        for r in _real_roots(deriv, xlim[0], xlim[1]):
+            lines.append(_dot(r, _polyval(coeffs, r)))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+def _tikz_integral_area(spec: dict) -> str:
+    coeffs = spec.get("coeffs", [1, 0, -1])
+    a_val = spec.get("a", 0)
+    b_val = spec.get("b", 2)
+    xlim = spec.get("xlim", (-2, 3))
+    ylim = spec.get("ylim", (-2, 4))
+    expr = _horner(coeffs)
+
+    lines = _axis(xlim, ylim, _restrict(ylim))
+    lines.append(_plot(expr, a_val, b_val, samples=100,
+                       style="fill=gray!25, draw=black, very thin", closed=True))
+    lines.append(_plot(expr, xlim[0], xlim[1]))
+    for val in (a_val, b_val):
+        y_at = _polyval(coeffs, val)
+        if abs(y_at) > 0.01:
+            lines.append(rf"\draw[densely dashed, thin] (axis cs:{_n(val)},0) -- "
+                         rf"(axis cs:{_n(val)},{_n(y_at)});")
+    lines.append(_text(a_val, -0.1, f"${a_val}$" if a_val != 0 else "$a$", anchor="north"))
+    lines.append(_text(b_val, -0.1, f"${b_val}$" if b_val != 0 else "$b$", anchor="north"))
+    return _finish(lines, xlim, ylim, spec.get("label", ""))
+
+
+def _tikz_number_line(spec: dict) -> str:
+    intervals = spec.get("intervals", [])
+    points = spec.get("points", [])
+    xlim = spec.get("xlim", (-5, 5))
+    ticks = ",".join(str(t) for t in range(int(xlim[0]), int(xlim[1]) + 1))
+
+    open_mark = r"\draw[thick, fill=white] (axis cs:{},0) circle[radius=2.5pt];"
+    closed_mark = r"\fill (axis cs:{},0) circle[radius=2pt];"
+    lines = [
+        r"\begin{tikzpicture}",
+        rf"\begin{{axis}}[exam number line, xmin={_n(xlim[0])}, xmax={_n(xlim[1])}, "
+        rf"xtick={{{ticks}}}]",
+    ]
+    for iv in intervals:
+        fr, to = iv["from"], iv["to"]
+        lines.append(rf"\draw[line width=2pt] (axis cs:{_n(fr)},0) -- (axis cs:{_n(to)},0);")
+        for val, is_open in ((fr, iv.get("open_left", False)),
+                             (to, iv.get("open_right", False))):
+            lines.append((open_mark if is_open else closed_mark).format(_n(val)))
+    for pt in points:
+        mark = open_mark if pt.get("open", False) else closed_mark
+        lines.append(mark.format(_n(pt["x"])))
+    lines.append(r"\end{axis}")
+    lines.append(r"\end{tikzpicture}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Dispatcher
+# ---------------------------------------------------------------------------
+
+TIKZ_TYPES = {
+    "polynomial": _tikz_polynomial,
+    "quadratic": _tikz_quadratic,
+    "trig": _tikz_trig,
+    "exp_log": _tikz_exp_log,
+    "rational": _tikz_rational,
+    "derivative": _tikz_derivative,
+    "integral_area": _tikz_integral_area,
+    "number_line": _tikz_number_line,
+}
+
+
+def _exp_log_plottable(spec: dict) -> bool:
+    """exp_log needs log(base) as a divisor and a non-empty log domain."""
+    kind = spec.get("kind", "exp")
+    base = spec.get("base", math.e)
+    if base <= 0:
+        return False
+    if kind in ("log", "both"):
+        return base != 1 and spec.get("xlim", (-3, 4))[1] > 0.01
+    return True
+
+
+def _rational_plottable(spec: dict) -> bool:
+    """rational needs a denominator cx + d that is not identically zero."""
+    return spec.get("c", 1) != 0 or spec.get("d", -1) != 0
+
+
+# Specs of a supported type that still cannot be emitted as pgfplots code
+_PLOTTABLE = {
+    "exp_log": _exp_log_plottable,
+    "rational": _rational_plottable,
+}
+
+
+def tikz_supported(spec: dict) -> bool:
+    """True if *spec* can be drawn by this backend (else fall back to PNG)."""
+    graph_type = spec.get("type", "custom")
+    if graph_type not in TIKZ_TYPES:
+        return False
+    check = _PLOTTABLE.get(graph_type)
+    return check is None or check(spec)
+
+
+def generate_tikz(spec: dict, output_path: str | Path) -> Path:
+    """Write the tikzpicture for *spec* to *output_path*.
+
+    Raises:
+        ValueError: If the graph type has no TikZ implementation, or the
+            spec cannot be plotted by pgfplots (see tikz_supported)
+    """
+    output_path = Path(output_path)
+    graph_type = spec.get("type", "custom")
+    if graph_type not in TIKZ_TYPES:
+        raise ValueError(f"No TikZ backend for graph type: {graph_type}. "
+                         f"Available: {list(TIKZ_TYPES.keys())}")
+    if not tikz_supported(spec):
+        raise ValueError(f"{graph_type} spec cannot be plotted by pgfplots "
+                         "(degenerate base, denominator or domain)")
+    output_path.write_text(TIKZ_TYPES[graph_type](spec) + "\n", encoding="utf-8")
+    return output_path
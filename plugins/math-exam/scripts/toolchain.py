@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Cached discovery of the external toolchain (xelatex, Korean font, packages).
+
+Finding xelatex, asking it for its version, listing Korean fonts with
+fc-list and locating LaTeX packages with kpsewhich each cost a subprocess
+or a PATH scan. Under batch load those probes add up, so the result is
+stored in a per-user cache file and reused until the environment changes.
+
+Invalidation is by fingerprint: PATH, the platform, the resolved xelatex
+binary and the mtimes of the xelatex binary, the TeX file database (ls-R)
+and the font directories. Computing the fingerprint only stats files, so
+a cache hit runs no subprocess at all. Upgrading TeX Live, installing a
+package (tlmgr/apt rebuild ls-R) or installing a font (fc-cache) changes
+a watched mtime and triggers a fresh probe.
+
+Layout:
+    <cache root>/toolchain.json      {"fingerprint": {...}, "toolchain": {...}}
+
+Usage:
+    from toolchain import toolchain
+    tc = toolchain()
+    tc.xelatex, tc.xelatex_version, tc.korean_font, tc.korean_font_file
+    tc.missing_packages(["kotex", "pgfplots"])
+
+    python3 toolchain.py             # show the (cached) probe
+    python3 toolchain.py --refresh   # probe again and rewrite the cache
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+# Bump to invalidate every cached probe after a change to this module
+TOOLCHAIN_FORMAT = 1
+
+# Packages the generated documents load (see latex_generator / tikz_graphs)
+PROBED_PACKAGES = (
+    "fontspec", "kotex", "amsmath", "amssymb", "amsthm", "geometry",
+    "multicol", "graphicx", "fancyhdr", "enumitem", "tabularx", "setspace",
+    "pgf", "pgfplots",
+)
+
+_XELATEX_CANDIDATES = (
+    Path("/Library/TeX/texbin/xelatex"),          # macOS (MacTeX)
+    Path("/usr/local/texlive/2025/bin/x86_64-linux/xelatex"),
+    Path("/usr/local/texlive/2024/bin/x86_64-linux/xelatex"),
+    Path("/usr/bin/xelatex"),                       # Linux package
+)
+
+_FONT_DIRS = (
+    "/usr/share/fonts", "/usr/local/share/fonts", "~/.local/share/fonts",
+    "~/.fonts", "/var/cache/fontconfig", "~/.cache/fontconfig",
+    "/Library/Fonts", "~/Library/Fonts", "/System/Library/Fonts",
+    "C:/Windows/Fonts",
+)
+
+
+def cache_root() -> Path:
+    """Per-user cache directory ($MATH_EXAM_CACHE_DIR or XDG cache)."""
+    env = os.environ.get("MATH_EXAM_CACHE_DIR")
+    if env:
+        return Path(env)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "math-exam"
+
+
+@dataclass
+class Toolchain:
+    """Result of one toolchain probe."""
+
+    xelatex: str | None = None
+    xelatex_version: str = ""
+    korean_font: str = "NanumGothic"
+    korean_font_file: str | None = None
+    # Package name → available; empty when kpsewhich could not be run
+    packages: dict[str, bool] = field(default_factory=dict)
+
+    def missing_packages(self, names) -> list[str]:
+        """Names known to be missing (unknown packages are not reported)."""
+        return [n for n in names if self.packages.get(n) is False]
+
+
+# ---------------------------------------------------------------------------
+# Probes
+# ---------------------------------------------------------------------------
+
+def find_xelatex() -> Path | None:
+    """Find xelatex binary on the system (PATH, then common TeX Live paths)."""
+    xelatex = shutil.which("xelatex")
+    if xelatex:
+        return Path(xelatex)
+    for p in _XELATEX_CANDIDATES:
+        if p.is_file():
+            return p
+    return None
+
+
+def _probe_xelatex_version(xelatex: Path) -> str:
+    """First line of ``xelatex --version`` (empty string if unavailable)."""
+    try:
+        result = subprocess.run([str(xelatex), "--version"],
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    lines = result.stdout.splitlines()
+    return lines[0].strip() if lines else ""
+
+
+def _font_candidates() -> tuple[list[str], str]:
+    """Preferred Korean font families for this platform, and the fallback."""
+    system = platform.system()
+    if system == "Darwin":
+        return ["AppleGothic", "Apple SD Gothic Neo", "NanumGothic"], "AppleGothic"
+    if system == "Windows":
+        return ["Malgun Gothic", "NanumGothic", "Batang"], "Malgun Gothic"
+    return ["NanumGothic", "UnBatang", "Noto Sans CJK KR"], "NanumGothic"
+
+
+def _probe_korean_font() -> tuple[str, str | None]:
+    """Pick an installed Korean font via fc-list; return (family, file)."""
+    candidates, fallback = _font_candidates()
+    try:
+        result = subprocess.run(
+            ["fc-list", ":lang=ko", "--format", "%{file}\t%{family}\n"],
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return fallback, None
+
+    fonts = []
+    for line in result.stdout.splitlines():
+        path, _, families = line.partition("\t")
+        fonts.append((path, families.split(",")))
+    for font in candidates:
+        for path, families in fonts:
+            if font in families:
+                return font, path
+    # Older fc-list versions ignore --format; match the raw text instead
+    for font in candidates:
+        if font in result.stdout:
+            return font, None
+    return fallback, None
+
+
+def _probe_packages(xelatex: Path | None) -> dict[str, bool]:
+    """Locate PROBED_PACKAGES with one kpsewhich call (next to xelatex)."""
+    kpsewhich = None
+    if xelatex is not None:
+        sibling = xelatex.parent / ("kpsewhich" + xelatex.suffix)
+        if sibling.is_file():
+            kpsewhich = str(sibling)
+    kpsewhich = kpsewhich or shutil.which("kpsewhich")
+    if kpsewhich is None:
+        return {}
+    try:
+        result = subprocess.run(
+            [kpsewhich, *(f"{name}.sty" for name in PROBED_PACKAGES)],
+            capture_output=True, text=True, timeout=20,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    found = {Path(line.strip()).stem for line in result.stdout.splitlines()}
+    return {name: name in found for name in PROBED_PACKAGES}
+
+
+def probe() -> Toolchain:
+    """Run every probe now, ignoring the cache."""
+    xelatex = find_xelatex()
+    font, font_file = _probe_korean_font()
+    return Toolchain(
+        xelatex=str(xelatex) if xelatex else None,
+        xelatex_version=_probe_xelatex_version(xelatex) if xelatex else "",
+        korean_font=font,
+        korean_font_file=font_file,
+        packages=_probe_packages(xelatex),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def _mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _watched_paths(xelatex: Path | None) -> list[Path]:
+    """Files and directories whose mtime invalidates the cached probe."""
+    paths = [Path(p).expanduser() for p in _FONT_DIRS]
+    if xelatex is not None:
+        real = xelatex.resolve()
+        paths.append(real)
+        # TeX Live: <root>/bin/<arch>/xelatex → <root>/texmf-dist/ls-R
+        if len(real.parents) > 2:
+            paths.append(real.parents[2] / "texmf-dist" / "ls-R")
+        paths += [Path("/usr/share/texlive/texmf-dist/ls-R"),
+                  Path("/var/lib/texmf/ls-R")]
+    return paths
+
+
+def fingerprint() -> dict:
+    """Cheap (stat-only) description of the environment the probe depends on."""
+    xelatex = find_xelatex()
+    return {
+        "format": TOOLCHAIN_FORMAT,
+        "platform": platform.system(),
+        "path": os.environ.get("PATH", ""),
+        "xelatex": str(xelatex) if xelatex else None,
+        "mtimes": {str(p): _mtime(p) for p in _watched_paths(xelatex)},
+    }
+
+
+def _cache_file() -> Path:
+    return cache_root() / "toolchain.json"
+
+
+def _load(fp: dict) -> Toolchain | None:
+    try:
+        payload = json.loads(_cache_file().read_text(encoding="utf-8"))
+        if payload.get("fingerprint") != fp:
+            return None
+        return Toolchain(**payload["toolchain"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _store(fp: dict, tc: Toolchain) -> None:
+    path = _cache_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".toolchain-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fp, "toolchain": asdict(tc)}, f,
+                      ensure_ascii=False, indent=1)
+        os.replace(tmp, path)  # concurrent builders may race on the file
+    except OSError:
+        pass  # read-only cache dir: just probe again next time
+
+
+# In-process memo, revalidated against the fingerprint on every call so a
+# long-running build daemon notices a new TeX Live or font installation
+_memo: tuple[dict, Toolchain] | None = None
+
+
+def toolchain(refresh: bool = False) -> Toolchain:
+    """The current toolchain, from memory, the cache file or a fresh probe.
+
+    Args:
+        refresh: Probe again even if the cached result is still valid
+
+    Returns:
+        Toolchain for the current environment
+    """
+    global _memo
+    fp = fingerprint()
+    if not refresh:
+        if _memo is not None and _memo[0] == fp:
+            return _memo[1]
+        tc = _load(fp)
+        if tc is not None:
+            _memo = (fp, tc)
+            return tc
+    tc = probe()
+    _store(fp, tc)
+    _memo = (fp, tc)
+    return tc
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the detected toolchain")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Probe again and rewrite the cache file")
+    args = parser.parse_args()
+    tc = toolchain(refresh=args.refresh)
+    print(json.dumps(asdict(tc), ensure_ascii=False, indent=2))
+    print(f"cache: {_cache_file()}")
+
+
+if __name__ == "__main__":
+    main()